@@ -9,21 +9,41 @@ Autor: Análisis de Datos - Curso
 Dataset: Overwatch Competitive Seasons (all_seasons.csv)
 """
 
+import os
+
 import pandas as pd
 import numpy as np
 
+from report_generator import render_report
+from sr_trajectory import build_trajectories
+from rank_tiers import build_tier_index, tier_summary
+from bootstrap_stats import flag_anomalies, winrate_ci
+from matchmaking import ALL_SEASONS, analyze_matchmaking, win_probability
+from winrate_shrinkage import add_shrinkage
+from sessions import decay_curve, has_session_data, session_stats, sessionize, stop_after_loss
+import derived_tables
+import sql_backend
+
 # =============================================================================
 # CARGA Y PREPARACIÓN DE DATOS
 # =============================================================================
 
-# Cargar el dataset
-df = pd.read_csv('/mnt/user-data/uploads/all_seasons__1_.csv')
+# 'pandas' calcula las agregaciones en memoria; 'sqlite' las delega a la
+# base embebida de sql_backend.py (mismos resultados)
+BACKEND = 'pandas'
+
+# Cargar el dataset (con 'sqlite' se lee de la base ya ingerida, sin
+# volver a parsear el CSV)
+CSV_PATH = '/mnt/user-data/uploads/all_seasons__1_.csv'
+if BACKEND == 'sqlite':
+    con = sql_backend.connect(CSV_PATH)
+    df = sql_backend.load_matches(con)
+else:
+    df = pd.read_csv(CSV_PATH)
 
 # Convertir columnas SR a numérico (tienen valores 'P' para placement)
 df['Start SR Numeric'] = pd.to_numeric(df['Start SR'], errors='coerce')
 df['End SR Numeric'] = pd.to_numeric(df['End SR'], errors='coerce')
-df['Team SR avg Numeric'] = pd.to_numeric(df['Team SR avg'], errors='coerce')
-df['Enemy SR avg Numeric'] = pd.to_numeric(df['Enemy SR avg'], errors='coerce')
 
 # =============================================================================
 # ANÁLISIS CON SERIES
@@ -65,72 +85,33 @@ print("\n" + "=" * 60)
 print("ANÁLISIS CON PANDAS DATAFRAMES")
 print("=" * 60)
 
-# DataFrame 1: Estadísticas por temporada
-season_stats = df.groupby('season').agg({
-    'Game #': 'max',  # Número de partidas
-    'Result': lambda x: (x == 'Win').sum(),  # Victorias
-    'SR Change': ['mean', 'sum'],  # Cambio de SR
-    'Elim': 'mean',
-    'Death': 'mean',
-    'Heal': 'mean',
-    'Dmg': 'mean'
-}).round(2)
-
-season_stats.columns = ['Partidas', 'Victorias', 'SR_Promedio', 'SR_Total', 
-                        'Elim_Promedio', 'Muertes_Promedio', 'Heal_Promedio', 'Dmg_Promedio']
-
-# Calcular winrate
-season_stats['Winrate %'] = (season_stats['Victorias'] / season_stats['Partidas'] * 100).round(1)
+if BACKEND == 'sqlite':
+    # Las mismas agregaciones resueltas por SQLite (ver sql_backend.py)
+    season_stats = sql_backend.season_stats(con)
+    map_stats = sql_backend.map_stats(con)
+    role_stats = sql_backend.role_stats(con)
+    mode_stats = sql_backend.mode_stats(con)
+    con.close()
+else:
+    # Tablas memoizadas (derived_tables.py): los demás scripts reutilizan
+    # el mismo cálculo desde .memo_cache/
+    season_stats = derived_tables.season_stats(df)
+    map_stats = derived_tables.map_stats(df)
+    role_stats = derived_tables.role_stats(df)
+    mode_stats = derived_tables.mode_stats(df)
+
+# Ranking por winrate encogido (Bayes empírico, ver winrate_shrinkage.py):
+# un mapa con pocas partidas no encabeza la tabla por azar
+map_stats = add_shrinkage(map_stats, df, 'Map')
+role_stats = add_shrinkage(role_stats, df, 'Role 1')
+mode_stats = add_shrinkage(mode_stats, df, 'Mode')
 
 print("\n1. DataFrame de Estadísticas por Temporada:")
 print(season_stats)
-
-# DataFrame 2: Análisis por mapa
-map_stats = df[df['Map'].notna()].groupby('Map').agg({
-    'Result': [
-        lambda x: len(x),  # Total partidas
-        lambda x: (x == 'Win').sum(),  # Victorias
-        lambda x: ((x == 'Win').sum() / len(x) * 100)  # Winrate
-    ],
-    'SR Change': 'mean'
-}).round(2)
-
-map_stats.columns = ['Partidas', 'Victorias', 'Winrate %', 'SR_Promedio']
-map_stats = map_stats.sort_values('Winrate %', ascending=False)
-
 print("\n2. DataFrame de Estadísticas por Mapa:")
 print(map_stats)
-
-# DataFrame 3: Análisis por rol
-role_stats = df[df['Role 1'].notna()].groupby('Role 1').agg({
-    'Result': [
-        lambda x: len(x),
-        lambda x: (x == 'Win').sum(),
-        lambda x: ((x == 'Win').sum() / len(x) * 100)
-    ],
-    'Elim': 'mean',
-    'Death': 'mean',
-    'Heal': 'mean',
-    'Dmg': 'mean'
-}).round(2)
-
-role_stats.columns = ['Partidas', 'Victorias', 'Winrate %', 'Elim', 'Muertes', 'Heal', 'Dmg']
-
 print("\n3. DataFrame de Estadísticas por Rol:")
 print(role_stats)
-
-# DataFrame 4: Análisis por modo de juego
-mode_stats = df[df['Mode'].notna()].groupby('Mode').agg({
-    'Result': [
-        lambda x: len(x),
-        lambda x: (x == 'Win').sum(),
-        lambda x: ((x == 'Win').sum() / len(x) * 100)
-    ],
-    'SR Change': 'mean'
-}).round(2)
-
-mode_stats.columns = ['Partidas', 'Victorias', 'Winrate %', 'SR_Promedio']
-
 print("\n4. DataFrame de Estadísticas por Modo de Juego:")
 print(mode_stats)
 
@@ -157,11 +138,11 @@ print(f"\n2. Rachas:")
 print(f"   Máxima racha de victorias: {max_win_streak}")
 print(f"   Máxima racha de derrotas: {abs(max_loss_streak)}")
 
-# Análisis de leavers
-leaver_impact = df.groupby('Leaver').agg({
-    'Result': lambda x: (x == 'Win').sum() / len(x) * 100
-}).round(2)
-print("\n3. Impacto de Leavers en Winrate:")
+# Análisis de leavers: winrate con intervalo bootstrap del 95%; se marcan
+# como anomalía los grupos cuyo intervalo no contiene el winrate global
+overall_winrate = (df['Result'] == 'Win').mean() * 100
+leaver_impact = flag_anomalies(winrate_ci(df, 'Leaver'), overall_winrate)
+print("\n3. Impacto de Leavers en Winrate (IC 95% bootstrap):")
 print(leaver_impact)
 
 # Correlaciones
@@ -170,6 +151,49 @@ correlations = df[numeric_cols].corr()
 print("\n4. Matriz de Correlaciones (primeras 3 columnas):")
 print(correlations.iloc[:, :3].round(3))
 
+# Tiempo en cada tier: partidas y winrate según el tier en el que se jugó
+tier_index = build_tier_index(df, build_trajectories(df))
+print("\n5. Partidas y Winrate por Tier de SR:")
+print(tier_summary(tier_index))
+promotions = tier_index.transitions['ascenso']
+print(f"   Cambios de tier: {len(promotions)} ({promotions.sum()} ascensos, "
+      f"{(~promotions).sum()} descensos)")
+
+# Emparejamiento: diferencia Team SR avg - Enemy SR avg y P(victoria)
+matchmaking = analyze_matchmaking(df)
+overall_mm = matchmaking[ALL_SEASONS]
+gap_stats = overall_mm['distribucion']
+print("\n6. Emparejamiento (Team SR avg - Enemy SR avg):")
+print(f"   Diferencia media: {gap_stats['media']:+.1f} SR "
+      f"(|dif| media {gap_stats['abs_media']:.1f}, p5-p95: {gap_stats['p5']:+.0f} a {gap_stats['p95']:+.0f})")
+print(overall_mm['por_rango'])
+fit = overall_mm['fit']
+print(f"   Ajuste logístico: P(victoria | dif=0) = {win_probability(fit, 0):.1%}, "
+      f"+100 SR -> {win_probability(fit, 100):.1%}")
+for season, result in matchmaking.items():
+    if season != ALL_SEASONS:
+        print(f"   Temporada {season}: P(victoria | +100 SR) = "
+              f"{win_probability(result['fit'], 100):.1%}")
+
+# Sesiones: solo si el CSV permite observarlas (columna de tiempo o
+# 'Session'). Sin ellas cualquier corte sería un bloque arbitrario de
+# partidas y las tablas describirían el bloque, no el comportamiento
+SESSION_CSV = '/home/claude/overwatch_analysis/data_session_stats.csv'
+per_session = None
+if has_session_data(df):
+    sessions = sessionize(df)
+    per_session = session_stats(df, sessions)
+    print(f"\n7. Sesiones ({sessions.method}): {len(per_session)} sesiones, "
+          f"{per_session['Partidas'].mean():.1f} partidas de media")
+    print(f"   Winrate por sesión: mediana {per_session['Winrate %'].median():.1f}%, "
+          f"deriva de SR media {per_session['Deriva_SR'].mean():+.1f}")
+    print("   Rendimiento por partida dentro de la sesión:")
+    print(decay_curve(df, sessions)[['Partidas', 'Winrate %', 'SR Change', 'Elim_rel', 'Death_rel']])
+    print("   Escenarios 'parar tras perder':")
+    print(stop_after_loss(df, sessions))
+else:
+    print("\n7. Sesiones: el CSV no tiene columna de tiempo ni 'Session'; análisis omitido")
+
 # =============================================================================
 # GUARDAR RESULTADOS
 # =============================================================================
@@ -179,6 +203,11 @@ season_stats.to_csv('/home/claude/overwatch_analysis/data_season_stats.csv')
 map_stats.to_csv('/home/claude/overwatch_analysis/data_map_stats.csv')
 role_stats.to_csv('/home/claude/overwatch_analysis/data_role_stats.csv')
 mode_stats.to_csv('/home/claude/overwatch_analysis/data_mode_stats.csv')
+if per_session is not None:
+    per_session.to_csv(SESSION_CSV)
+elif os.path.exists(SESSION_CSV):
+    # Una tabla de una ejecución anterior ya no corresponde a este CSV
+    os.remove(SESSION_CSV)
 
 print("\n" + "=" * 60)
 print("ARCHIVOS GENERADOS:")
@@ -186,4 +215,42 @@ print("- data_season_stats.csv")
 print("- data_map_stats.csv")
 print("- data_role_stats.csv")
 print("- data_mode_stats.csv")
+if per_session is not None:
+    print("- data_session_stats.csv")
 print("=" * 60)
+
+# =============================================================================
+# ACTUALIZAR REPORTE HTML
+# =============================================================================
+
+# Las tablas de index.html se generan con los mismos agregados en memoria
+results_counts = results_series.value_counts()
+report_stats = render_report({
+    'general': {
+        'total': len(df),
+        'victorias': int(results_counts.get('Win', 0)),
+        'derrotas': int(results_counts.get('Loss', 0)),
+        'empates': int(results_counts.get('Draw', 0)),
+        'winrate': results_counts.get('Win', 0) / len(df) * 100,
+        'mapas': int(df['Map'].nunique()),
+        'temporadas': sorted(int(s) for s in df['season'].unique()),
+    },
+    'results': results_counts,
+    'sr_changes': {
+        'media': sr_changes.mean(),
+        'mediana': sr_changes.median(),
+        'std': sr_changes.std(),
+        'max': sr_changes.max(),
+        'min': sr_changes.min(),
+    },
+    'season_stats': season_stats,
+    'map_stats': map_stats,
+    'role_stats': role_stats,
+    'mode_stats': mode_stats,
+    'correlations': correlations,
+})
+
+print(f"\nReporte index.html: {len(report_stats['renderizadas'])} secciones renderizadas, "
+      f"{len(report_stats['reutilizadas'])} reutilizadas desde caché")
+if report_stats['imagenes_faltantes']:
+    print(f"   Imágenes referenciadas sin generar: {', '.join(report_stats['imagenes_faltantes'])}")
@@ -16,6 +16,15 @@ import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.gridspec import GridSpec
 
+from figure_writer import get_writer, savefig_async
+from sr_trajectory import build_trajectories
+from sr_timeline import build_timeline, plot_timeline
+from rank_tiers import TIER_FLOORS
+from figure_spec import query, render, export_specs
+from figure_template import (FigureTemplate, bar_labels, rescale, update_bars, update_line,
+                             update_scatter)
+from match_query import load_matches
+
 # Configuración global de estilo
 plt.style.use('seaborn-v0_8-whitegrid')
 plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -27,11 +36,13 @@ plt.rcParams['axes.labelsize'] = 10
 # CARGA DE DATOS
 # =============================================================================
 
-df = pd.read_csv('/mnt/user-data/uploads/all_seasons__1_.csv')
-df['Start SR Numeric'] = pd.to_numeric(df['Start SR'], errors='coerce')
-df['End SR Numeric'] = pd.to_numeric(df['End SR'], errors='coerce')
+CSV_PATH = '/mnt/user-data/uploads/all_seasons__1_.csv'
+df = pd.read_csv(CSV_PATH)
 df['SR Change'] = pd.to_numeric(df['SR Change'], errors='coerce')
 
+# Trayectorias de SR por temporada (ordenadas, con posicionamiento y huecos resueltos)
+trajectories = build_trajectories(df)
+
 # Colores personalizados para el tema de Overwatch
 COLORS = {
     'win': '#4CAF50',      # Verde
@@ -46,6 +57,11 @@ COLORS = {
     'seasons': ['#E91E63', '#9C27B0', '#3F51B5', '#00BCD4']  # Paleta temporadas
 }
 
+# Las gráficas de agregados se declaran como especificaciones (figure_spec):
+# se dibujan aquí con Matplotlib y se exportan a data/figures.json para la
+# versión interactiva de index.html
+specs = []
+
 # =============================================================================
 # FIGURA 1: DASHBOARD PRINCIPAL
 # =============================================================================
@@ -117,13 +133,13 @@ ax2.text(0, 0, f'Total\n{len(df)}', ha='center', va='center', fontsize=12, fontw
 # -----------------------------------------------------------------------------
 ax3 = fig.add_subplot(gs[0, 2])
 
-for idx, season in enumerate(df['season'].unique()):
-    season_data = df[df['season'] == season].copy()
-    season_data = season_data.sort_values('Game #')
-    ax3.plot(season_data['Game #'], season_data['End SR Numeric'], 
-             label=f'Temporada {season}', 
-             color=COLORS['seasons'][idx % len(COLORS['seasons'])],
-             linewidth=2, alpha=0.8)
+# Cada temporada se dibuja desde su pirámide M4 (sr_timeline.py): solo los
+# puntos que caben en el ancho del panel, sea cual sea el largo del historial
+for idx, (season, trajectory) in enumerate(trajectories.items()):
+    plot_timeline(ax3, build_timeline(trajectory.game, trajectory.sr), dpi=150,
+                  label=f'Temporada {season}',
+                  color=COLORS['seasons'][idx % len(COLORS['seasons'])],
+                  linewidth=2, alpha=0.8)
 
 ax3.set_xlabel('Número de Partida', fontsize=10, fontweight='bold')
 ax3.set_ylabel('SR', fontsize=10, fontweight='bold')
@@ -131,8 +147,8 @@ ax3.set_title('Plot: Evolución del SR por Temporada', fontsize=11, fontweight='
 ax3.legend(loc='best', fontsize=8, framealpha=0.9)
 
 # Añadir líneas de referencia para rangos
-ax3.axhline(y=2500, color='gold', linestyle=':', linewidth=1.5, alpha=0.7, label='Platino')
-ax3.axhline(y=3000, color='silver', linestyle=':', linewidth=1.5, alpha=0.7, label='Diamante')
+ax3.axhline(y=TIER_FLOORS['Platino'], color='gold', linestyle=':', linewidth=1.5, alpha=0.7, label='Platino')
+ax3.axhline(y=TIER_FLOORS['Diamante'], color='silver', linestyle=':', linewidth=1.5, alpha=0.7, label='Diamante')
 ax3.tick_params(axis='both', which='major', labelsize=9)
 
 # -----------------------------------------------------------------------------
@@ -140,28 +156,26 @@ ax3.tick_params(axis='both', which='major', labelsize=9)
 # -----------------------------------------------------------------------------
 ax4 = fig.add_subplot(gs[1, :2])
 
-map_data = df[df['Map'].notna()].groupby('Map').agg({
-    'Result': [lambda x: len(x), lambda x: (x == 'Win').sum() / len(x) * 100]
-}).round(2)
-map_data.columns = ['Partidas', 'Winrate']
-map_data = map_data.sort_values('Winrate', ascending=True)
-
-bars = ax4.barh(range(len(map_data)), map_data['Winrate'], 
-                color=[COLORS['win'] if wr >= 50 else COLORS['loss'] for wr in map_data['Winrate']],
-                height=0.7, edgecolor='white', linewidth=0.5)
-
-ax4.set_yticks(range(len(map_data)))
-ax4.set_yticklabels(map_data.index, fontsize=9)
-ax4.set_xlabel('Winrate (%)', fontsize=10, fontweight='bold')
-ax4.set_title('Barras Horizontales: Winrate por Mapa', fontsize=11, fontweight='bold', pad=10)
-ax4.axvline(x=50, color='gray', linestyle='--', linewidth=2, alpha=0.7)
-
-# Añadir valores al final de cada barra
-for i, (bar, wr) in enumerate(zip(bars, map_data['Winrate'])):
-    ax4.text(bar.get_width() + 1, bar.get_y() + bar.get_height()/2, 
-             f'{wr:.1f}%', va='center', fontsize=8, fontweight='bold')
-
-ax4.set_xlim(0, 85)
+map_data = query(df, groupby='Map', dropna=['Map'], sort='Winrate',
+                 measures={'Partidas': ('Result', 'count'), 'Winrate': ('Result', 'winrate')})
+map_data['_color'] = np.where(map_data['Winrate'] >= 50, COLORS['win'], COLORS['loss'])
+
+specs.append({
+    'id': 'winrate_mapa',
+    'title': 'Barras Horizontales: Winrate por Mapa',
+    'data': map_data,
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'Winrate', 'type': 'quantitative', 'title': 'Winrate (%)',
+              'scale': {'domain': [0, 85]}},
+        'y': {'field': 'Map', 'type': 'nominal', 'title': 'Mapa', 'sort': None},
+        'color': {'field': '_color', 'scale': None},
+    },
+    'rules': [{'x': 50, 'dash': True, 'width': 2}],
+    'text': {'format': '{:.1f}%', 'dx': 1},
+})
+render(specs[-1], ax4)
+ax4.set_ylabel('')
 ax4.tick_params(axis='x', which='major', labelsize=9)
 
 # -----------------------------------------------------------------------------
@@ -169,23 +183,23 @@ ax4.tick_params(axis='x', which='major', labelsize=9)
 # -----------------------------------------------------------------------------
 ax5 = fig.add_subplot(gs[1, 2])
 
-season_results = df.groupby(['season', 'Result']).size().unstack(fill_value=0)
-season_results = season_results[['Win', 'Loss', 'Draw']]
-
-x = np.arange(len(season_results))
-width = 0.6
-
-bottom = np.zeros(len(season_results))
-for col, color in zip(['Win', 'Loss', 'Draw'], [COLORS['win'], COLORS['loss'], COLORS['draw']]):
-    ax5.bar(x, season_results[col], width, label=col, bottom=bottom, color=color, edgecolor='white')
-    bottom += season_results[col]
-
-ax5.set_xlabel('Temporada', fontsize=10, fontweight='bold')
-ax5.set_ylabel('Número de Partidas', fontsize=10, fontweight='bold')
-ax5.set_title('Barras Apiladas: Resultados por Temporada', fontsize=11, fontweight='bold', pad=10)
-ax5.set_xticks(x)
-ax5.set_xticklabels([f'S{s}' for s in season_results.index], fontsize=9)
-ax5.legend(loc='upper right', fontsize=8, framealpha=0.9)
+season_results = query(df, groupby=['season', 'Result'], measures={'Partidas': ('Result', 'count')})
+season_results['Temporada'] = 'S' + season_results['season'].astype(str)
+
+specs.append({
+    'id': 'resultados_temporada',
+    'title': 'Barras Apiladas: Resultados por Temporada',
+    'data': season_results,
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'Temporada', 'type': 'nominal', 'title': 'Temporada',
+              'sort': list(pd.unique(season_results['Temporada']))},
+        'y': {'field': 'Partidas', 'type': 'quantitative', 'title': 'Número de Partidas'},
+        'color': {'field': 'Result', 'domain': ['Win', 'Loss', 'Draw'],
+                  'range': [COLORS['win'], COLORS['loss'], COLORS['draw']]},
+    },
+})
+render(specs[-1], ax5)
 ax5.tick_params(axis='y', which='major', labelsize=9)
 
 # -----------------------------------------------------------------------------
@@ -193,38 +207,34 @@ ax5.tick_params(axis='y', which='major', labelsize=9)
 # -----------------------------------------------------------------------------
 ax6 = fig.add_subplot(gs[2, 0])
 
-role_data = df[df['Role 1'].notna()].groupby('Role 1').agg({
-    'Elim': 'mean',
-    'Death': 'mean'
-}).round(2)
-
-x = np.arange(len(role_data))
-width = 0.35
-
-bars1 = ax6.bar(x - width/2, role_data['Elim'], width, label='Eliminaciones', 
-                color=COLORS['secondary'], edgecolor='white')
-bars2 = ax6.bar(x + width/2, role_data['Death'], width, label='Muertes', 
-                color=COLORS['loss'], edgecolor='white')
-
-ax6.set_xlabel('Rol', fontsize=10, fontweight='bold')
-ax6.set_ylabel('Promedio', fontsize=10, fontweight='bold')
-ax6.set_title('Barras Agrupadas: Elim/Muertes por Rol', fontsize=11, fontweight='bold', pad=10)
-ax6.set_xticks(x)
-ax6.set_xticklabels(role_data.index, fontsize=9)
-ax6.legend(loc='upper right', fontsize=8, framealpha=0.9)
-
-# Añadir valores sobre las barras
-for bar in bars1:
-    height = bar.get_height()
-    ax6.text(bar.get_x() + bar.get_width()/2., height, f'{height:.1f}',
-             ha='center', va='bottom', fontsize=8)
+role_data = query(df, groupby='Role 1', dropna=['Role 1'],
+                  measures={'Eliminaciones': ('Elim', 'mean'), 'Muertes': ('Death', 'mean')})
+role_data = role_data.melt(id_vars='Role 1', var_name='Estadística', value_name='Promedio')
+
+specs.append({
+    'id': 'elim_muertes_rol',
+    'title': 'Barras Agrupadas: Elim/Muertes por Rol',
+    'data': role_data,
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'Role 1', 'type': 'nominal', 'title': 'Rol'},
+        'y': {'field': 'Promedio', 'type': 'quantitative', 'title': 'Promedio'},
+        'xOffset': {'field': 'Estadística'},
+        'color': {'field': 'Estadística', 'domain': ['Eliminaciones', 'Muertes'],
+                  'range': [COLORS['secondary'], COLORS['loss']]},
+    },
+    'text': {'format': '{:.1f}'},
+})
+render(specs[-1], ax6)
 
 # -----------------------------------------------------------------------------
 # Gráfica 7: SCATTER con tamaño variable - Rendimiento vs Medallas
 # -----------------------------------------------------------------------------
 ax7 = fig.add_subplot(gs[2, 1])
 
-medal_data = df[df['Dmg'].notna() & df['Gold medals'].notna()].copy()
+# Solo las filas con daño y medallas, leídas del almacén de columnas
+medal_data = load_matches(CSV_PATH, ['Dmg', 'Heal', 'Gold medals'],
+                          ('Dmg', 'notnull'), ('Gold medals', 'notnull'))
 sizes = (medal_data['Gold medals'] + 1) * 30
 
 scatter2 = ax7.scatter(medal_data['Dmg'], medal_data['Heal'], 
@@ -245,24 +255,31 @@ ax7.tick_params(axis='both', which='major', labelsize=9)
 # -----------------------------------------------------------------------------
 ax8 = fig.add_subplot(gs[2, 2])
 
-streak_data = df[df['SR Change'].notna()].groupby('Streak')['SR Change'].mean().round(2)
-streak_data = streak_data.sort_index()
-
-colors_streak = [COLORS['win'] if s > 0 else COLORS['loss'] for s in streak_data.index]
-
-ax8.bar(streak_data.index.astype(str), streak_data.values, color=colors_streak, 
-        edgecolor='white', linewidth=0.5)
-ax8.set_xlabel('Racha', fontsize=10, fontweight='bold')
-ax8.set_ylabel('SR Change Promedio', fontsize=10, fontweight='bold')
-ax8.set_title('Barras: SR Change por Racha', fontsize=11, fontweight='bold', pad=10)
-ax8.axhline(y=0, color='gray', linestyle='-', linewidth=1)
-ax8.tick_params(axis='x', which='major', labelsize=8, rotation=45)
+streak_data = query(df, groupby='Streak', dropna=['SR Change'],
+                    measures={'SR Change': ('SR Change', 'mean')})
+streak_data['_color'] = np.where(streak_data['Streak'] > 0, COLORS['win'], COLORS['loss'])
+
+specs.append({
+    'id': 'sr_racha',
+    'title': 'Barras: SR Change por Racha',
+    'data': streak_data,
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'Streak', 'type': 'ordinal', 'title': 'Racha'},
+        'y': {'field': 'SR Change', 'type': 'quantitative', 'title': 'SR Change Promedio'},
+        'color': {'field': '_color', 'scale': None},
+    },
+    'rules': [{'y': 0}],
+    'label_angle': 45,
+})
+render(specs[-1], ax8)
+ax8.tick_params(axis='x', which='major', labelsize=8)
 ax8.tick_params(axis='y', which='major', labelsize=9)
 
 # Guardar figura
-plt.savefig('/home/claude/overwatch_analysis/images/01_dashboard_principal.png', 
-            dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
-plt.close()
+savefig_async(fig, '/home/claude/overwatch_analysis/images/01_dashboard_principal.png', 
+              dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
+plt.close(fig)
 
 print("✓ Dashboard Principal guardado: images/01_dashboard_principal.png")
 
@@ -276,32 +293,29 @@ fig2, ax = plt.subplots(figsize=(10, 8))
 numeric_cols = ['SR Change', 'Elim', 'Death', 'Heal', 'Dmg', 'Gold medals', 'Silver medals', 'Bronze medals']
 corr_matrix = df[numeric_cols].corr()
 
-# Crear heatmap manual (mapa de pixeles)
-im = ax.imshow(corr_matrix, cmap='RdBu_r', aspect='auto', vmin=-1, vmax=1)
-
-# Configuración de ejes
-ax.set_xticks(np.arange(len(numeric_cols)))
-ax.set_yticks(np.arange(len(numeric_cols)))
-ax.set_xticklabels(numeric_cols, rotation=45, ha='right', fontsize=10)
-ax.set_yticklabels(numeric_cols, fontsize=10)
-
-# Añadir valores en cada celda
-for i in range(len(numeric_cols)):
-    for j in range(len(numeric_cols)):
-        text = ax.text(j, i, f'{corr_matrix.iloc[i, j]:.2f}',
-                       ha='center', va='center', color='black' if abs(corr_matrix.iloc[i, j]) < 0.5 else 'white',
-                       fontsize=9, fontweight='bold')
-
-# Colorbar
-cbar = ax.figure.colorbar(im, ax=ax, shrink=0.8)
-cbar.set_label('Correlación', fontsize=11, fontweight='bold')
-
-ax.set_title('Mapa de Pixeles: Matriz de Correlaciones\nEntre Variables de Rendimiento', 
+corr_long = corr_matrix.rename_axis('Variable Y').rename_axis('Variable X', axis=1) \
+    .stack().rename('Correlación').round(2).reset_index()
+
+# Mapa de pixeles: una celda por par de variables
+specs.append({
+    'id': 'correlaciones',
+    'title': 'Mapa de Pixeles: Matriz de Correlaciones Entre Variables de Rendimiento',
+    'data': corr_long,
+    'mark': 'rect',
+    'encoding': {
+        'x': {'field': 'Variable X', 'type': 'nominal', 'sort': numeric_cols},
+        'y': {'field': 'Variable Y', 'type': 'nominal', 'sort': numeric_cols},
+        'color': {'field': 'Correlación', 'type': 'quantitative', 'title': 'Correlación',
+                  'scheme': 'redblue', 'reverse': True, 'domain': [-1, 1]},
+    },
+})
+render(specs[-1], ax)
+ax.set_title('Mapa de Pixeles: Matriz de Correlaciones\nEntre Variables de Rendimiento',
              fontsize=14, fontweight='bold', pad=15)
 
-plt.savefig('/home/claude/overwatch_analysis/images/02_heatmap_correlaciones.png', 
-            dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
-plt.close()
+savefig_async(fig2, '/home/claude/overwatch_analysis/images/02_heatmap_correlaciones.png', 
+              dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
+plt.close(fig2)
 
 print("✓ Heatmap de Correlaciones guardado: images/02_heatmap_correlaciones.png")
 
@@ -314,35 +328,60 @@ fig3.suptitle('Análisis por Modo de Juego', fontsize=16, fontweight='bold', y=0
 
 mode_data = df[df['Mode'].notna()]
 
-# Gráfica 1: Winrate por modo
-ax_mode1 = axes[0, 0]
-mode_winrate = mode_data.groupby('Mode').apply(lambda x: (x['Result'] == 'Win').sum() / len(x) * 100)
 colors_mode = ['#E91E63', '#9C27B0', '#3F51B5', '#00BCD4']
-bars = ax_mode1.bar(mode_winrate.index, mode_winrate.values, color=colors_mode, edgecolor='white')
-ax_mode1.set_ylabel('Winrate (%)', fontweight='bold')
-ax_mode1.set_title('Winrate por Modo de Juego', fontweight='bold')
-ax_mode1.axhline(y=50, color='gray', linestyle='--', linewidth=1.5)
-ax_mode1.tick_params(axis='x', rotation=15)
-for bar, val in zip(bars, mode_winrate.values):
-    ax_mode1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1, f'{val:.1f}%', 
-                  ha='center', fontsize=10, fontweight='bold')
+mode_stats = query(mode_data, groupby='Mode', measures={
+    'Partidas': ('Result', 'count'),
+    'Winrate': ('Result', 'winrate'),
+    'SR Change': ('SR Change', 'mean'),
+})
+mode_color = {'field': 'Mode', 'domain': list(mode_stats['Mode']), 'range': colors_mode}
+
+# Gráfica 1: Winrate por modo
+specs.append({
+    'id': 'winrate_modo',
+    'title': 'Winrate por Modo de Juego',
+    'data': mode_stats,
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'Mode', 'type': 'nominal', 'title': 'Modo'},
+        'y': {'field': 'Winrate', 'type': 'quantitative', 'title': 'Winrate (%)'},
+        'color': mode_color,
+    },
+    'rules': [{'y': 50, 'dash': True, 'width': 1.5}],
+    'text': {'format': '{:.1f}%', 'dy': 1},
+    'label_angle': 15,
+})
+render(specs[-1], axes[0, 0])
 
 # Gráfica 2: Distribución de partidas por modo
-ax_mode2 = axes[0, 1]
-mode_counts = mode_data['Mode'].value_counts()
-ax_mode2.pie(mode_counts, labels=mode_counts.index, autopct='%1.1f%%', colors=colors_mode,
-             startangle=90, explode=[0.02]*len(mode_counts))
-ax_mode2.set_title('Distribución de Partidas por Modo', fontweight='bold')
+specs.append({
+    'id': 'partidas_modo',
+    'title': 'Distribución de Partidas por Modo',
+    'data': mode_stats.sort_values('Partidas', ascending=False),
+    'mark': 'arc',
+    'encoding': {
+        'theta': {'field': 'Partidas', 'type': 'quantitative'},
+        'color': mode_color,
+    },
+})
+render(specs[-1], axes[0, 1])
 
 # Gráfica 3: SR Change promedio por modo
-ax_mode3 = axes[1, 0]
-mode_sr = mode_data.groupby('Mode')['SR Change'].mean()
-colors_sr = [COLORS['win'] if sr > 0 else COLORS['loss'] for sr in mode_sr.values]
-bars = ax_mode3.bar(mode_sr.index, mode_sr.values, color=colors_sr, edgecolor='white')
-ax_mode3.set_ylabel('SR Change Promedio', fontweight='bold')
-ax_mode3.set_title('SR Change Promedio por Modo', fontweight='bold')
-ax_mode3.axhline(y=0, color='gray', linestyle='-', linewidth=1)
-ax_mode3.tick_params(axis='x', rotation=15)
+mode_stats['_color'] = np.where(mode_stats['SR Change'] > 0, COLORS['win'], COLORS['loss'])
+specs.append({
+    'id': 'sr_modo',
+    'title': 'SR Change Promedio por Modo',
+    'data': mode_stats[['Mode', 'SR Change', '_color']],
+    'mark': 'bar',
+    'encoding': {
+        'x': {'field': 'Mode', 'type': 'nominal', 'title': 'Modo'},
+        'y': {'field': 'SR Change', 'type': 'quantitative', 'title': 'SR Change Promedio'},
+        'color': {'field': '_color', 'scale': None},
+    },
+    'rules': [{'y': 0}],
+    'label_angle': 15,
+})
+render(specs[-1], axes[1, 0])
 
 # Gráfica 4: Boxplot de rendimiento por modo
 ax_mode4 = axes[1, 1]
@@ -356,10 +395,138 @@ ax_mode4.set_title('Distribución de Eliminaciones por Modo', fontweight='bold')
 ax_mode4.tick_params(axis='x', rotation=15)
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/03_dashboard_modos.png', 
-            dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
-plt.close()
+savefig_async(fig3, '/home/claude/overwatch_analysis/images/03_dashboard_modos.png', 
+              dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
+plt.close(fig3)
 
 print("✓ Dashboard de Modos guardado: images/03_dashboard_modos.png")
 
+# =============================================================================
+# FIGURA 4: DASHBOARDS POR TEMPORADA (PLANTILLA REUTILIZADA)
+# =============================================================================
+
+# Mismo diseño para cada temporada: la figura, la rejilla y los artistas se
+# crean una vez y cada variante solo cambia sus datos (figure_template.py)
+all_maps = sorted(df['Map'].dropna().unique())
+all_roles = sorted(df['Role 1'].dropna().unique())
+result_order = ['Win', 'Loss', 'Draw']
+result_colors = [COLORS['win'], COLORS['loss'], COLORS['draw']]
+NO_DATA = 'sin datos'
+
+
+def no_data_label(ax):
+    """Aviso centrado (oculto) para paneles sin datos en alguna temporada."""
+    return ax.text(0.5, 0.5, NO_DATA, transform=ax.transAxes, ha='center', va='center',
+                   fontsize=12, color='gray', style='italic', visible=False)
+
+
+def build_season_dashboard(fig):
+    gs = GridSpec(2, 3, figure=fig, hspace=0.4, wspace=0.35)
+    title = fig.suptitle('', fontsize=16, fontweight='bold', y=0.99)
+
+    ax_scatter = fig.add_subplot(gs[0, 0])
+    points = ax_scatter.scatter([], [], alpha=0.6, s=50, edgecolors='white', linewidth=0.5)
+    ax_scatter.axhline(y=0, color='gray', linestyle='--', linewidth=1, alpha=0.7)
+    ax_scatter.set_xlim(0, df['Elim'].max() + 5)
+    ax_scatter.set_ylim(df['SR Change'].min() - 5, df['SR Change'].max() + 5)
+    ax_scatter.set_xlabel('Eliminaciones', fontweight='bold')
+    ax_scatter.set_ylabel('Cambio de SR', fontweight='bold')
+    ax_scatter.set_title('SR Change vs Eliminaciones', fontweight='bold')
+
+    ax_sr = fig.add_subplot(gs[0, 1:])
+    sr_line, = ax_sr.plot([], [], color=COLORS['primary'], linewidth=2)
+    for tier, color in (('Platino', 'gold'), ('Diamante', 'silver')):
+        ax_sr.axhline(y=TIER_FLOORS[tier], color=color, linestyle=':', linewidth=1.5, alpha=0.7)
+    ax_sr.set_xlabel('Número de Partida', fontweight='bold')
+    ax_sr.set_ylabel('SR', fontweight='bold')
+    ax_sr.set_title('Evolución del SR', fontweight='bold')
+
+    ax_maps = fig.add_subplot(gs[1, 0])
+    map_bars = ax_maps.barh(all_maps, np.zeros(len(all_maps)), color=COLORS['secondary'],
+                            edgecolor='white')
+    ax_maps.axvline(x=50, color='gray', linestyle='--', linewidth=1.5)
+    ax_maps.set_xlim(0, 100)
+    ax_maps.set_xlabel('Winrate (%)', fontweight='bold')
+    ax_maps.set_title('Winrate por Mapa', fontweight='bold')
+    ax_maps.tick_params(axis='y', labelsize=7)
+
+    ax_roles = fig.add_subplot(gs[1, 1])
+    x = np.arange(len(all_roles))
+    elim_bars = ax_roles.bar(x - 0.2, np.zeros(len(x)), 0.4, label='Eliminaciones',
+                             color=COLORS['secondary'])
+    death_bars = ax_roles.bar(x + 0.2, np.zeros(len(x)), 0.4, label='Muertes', color=COLORS['loss'])
+    ax_roles.set_xticks(x, all_roles)
+    # Escala común a todas las variantes: máximo de las medias por temporada
+    role_means = df.groupby(['season', 'Role 1'])[['Elim', 'Death']].mean()
+    ax_roles.set_ylim(0, np.nanmax(role_means.to_numpy()) * 1.25)
+    ax_roles.set_title('Elim/Muertes por Rol', fontweight='bold')
+    ax_roles.legend(fontsize=8)
+
+    ax_results = fig.add_subplot(gs[1, 2])
+    result_bars = ax_results.bar(result_order, np.zeros(len(result_order)), color=result_colors,
+                                 edgecolor='white')
+    ax_results.set_ylim(0, df.groupby('season')['Result'].value_counts().max() * 1.2)
+    ax_results.set_ylabel('Partidas', fontweight='bold')
+    ax_results.set_title('Resultados', fontweight='bold')
+
+    return {
+        'title': title, 'points': points, 'scatter_empty': no_data_label(ax_scatter),
+        'sr_line': sr_line, 'ax_sr': ax_sr,
+        'map_bars': map_bars, 'map_labels': bar_labels(ax_maps, map_bars, horizontal=True, fontsize=7),
+        'elim_bars': elim_bars, 'death_bars': death_bars, 'roles_empty': no_data_label(ax_roles),
+        'result_bars': result_bars, 'result_labels': bar_labels(ax_results, result_bars,
+                                                                fontweight='bold'),
+    }
+
+
+def update_season_dashboard(artists, season):
+    games = df[df['season'] == season]
+    wins = (games['Result'] == 'Win').mean() * 100
+    artists['title'].set_text(f'Temporada {season} - {len(games)} partidas, winrate {wins:.1f}%')
+
+    scored = games[games['Elim'].notna() & games['SR Change'].notna()]
+    update_scatter(artists['points'], scored['Elim'], scored['SR Change'],
+                   colors=scored['Result'].map(dict(zip(result_order, result_colors))).tolist())
+    artists['scatter_empty'].set_visible(scored.empty)
+
+    trajectory = trajectories[season]
+    update_line(artists['sr_line'], trajectory.game, trajectory.sr)
+    rescale(artists['ax_sr'])
+
+    map_winrate = games.groupby('Map')['Result'].apply(lambda r: (r == 'Win').mean() * 100)
+    map_winrate = map_winrate.reindex(all_maps)
+    update_bars(artists['map_bars'], map_winrate, artists['map_labels'], fmt='{:.0f}%',
+                horizontal=True)
+    for bar, label, value in zip(artists['map_bars'], artists['map_labels'], map_winrate):
+        bar.set_color(COLORS['win'] if value >= 50 else COLORS['loss'])
+        # Mapa sin partidas esta temporada: aviso en lugar de una barra vacía
+        label.set_color('gray' if np.isnan(value) else 'black')
+        if np.isnan(value):
+            label.set_text(NO_DATA)
+
+    role_means = games.groupby('Role 1')[['Elim', 'Death']].mean().reindex(all_roles)
+    update_bars(artists['elim_bars'], role_means['Elim'])
+    update_bars(artists['death_bars'], role_means['Death'])
+    artists['roles_empty'].set_visible(role_means.isna().all(axis=None))
+
+    counts = games['Result'].value_counts().reindex(result_order, fill_value=0)
+    update_bars(artists['result_bars'], counts, artists['result_labels'], fmt='{:.0f}')
+
+
+season_paths = []
+with FigureTemplate(build_season_dashboard, update_season_dashboard, figsize=(16, 10)) as template:
+    for season in sorted(df['season'].unique()):
+        season_paths.append(template.render(
+            season, f'/home/claude/overwatch_analysis/images/01_dashboard_temporada_S{season}.png',
+            dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none'))
+
+print(f"✓ Dashboards por temporada guardados: {len(season_paths)} variantes "
+      "(images/01_dashboard_temporada_S*.png)")
+
+# Versión interactiva (solo datos agregados) para index.html
+export_specs(specs)
+print(f"✓ Especificaciones interactivas exportadas: data/figures.json ({len(specs)} figuras)")
+
+# Esperar a que los hilos escritores terminen de guardar las imágenes
+get_writer().flush()
 print("\n¡Todas las gráficas de Matplotlib generadas exitosamente!")
@@ -12,6 +12,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from figure_writer import get_writer, savefig_async
+from match_query import load_matches
+from density_cache import (kde, kde_by, histogram_by, box_stats_by, plot_kde, plot_histogram,
+                           plot_violins, plot_boxes)
+
 # Configuración de estilo Seaborn
 sns.set_theme(style="whitegrid", palette="husl")
 sns.set_context("notebook", font_scale=1.1)
@@ -20,7 +25,8 @@ sns.set_context("notebook", font_scale=1.1)
 # CARGA DE DATOS
 # =============================================================================
 
-df = pd.read_csv('/mnt/user-data/uploads/all_seasons__1_.csv')
+CSV_PATH = '/mnt/user-data/uploads/all_seasons__1_.csv'
+df = pd.read_csv(CSV_PATH)
 df['Start SR Numeric'] = pd.to_numeric(df['Start SR'], errors='coerce')
 df['End SR Numeric'] = pd.to_numeric(df['End SR'], errors='coerce')
 df['SR Change'] = pd.to_numeric(df['SR Change'], errors='coerce')
@@ -38,24 +44,34 @@ fig.suptitle('Seaborn: Análisis de Distribuciones', fontsize=16, fontweight='bo
 
 # 1. KDE Plot - Distribución de SR Change por resultado
 ax1 = axes[0, 0]
-for result in ['Win', 'Loss']:
-    data = df[df['Result'] == result]['SR Change'].dropna()
-    sns.kdeplot(data=data, ax=ax1, label=result, fill=True, alpha=0.4, color=result_palette[result])
+sr_curves = kde_by(df, 'SR Change', by='Result', order=['Win', 'Loss'])
+for result, curve in sr_curves.items():
+    plot_kde(ax1, curve, color=result_palette[result], label=result, alpha=0.4)
 ax1.set_title('KDE: Distribución SR Change por Resultado', fontweight='bold')
 ax1.set_xlabel('SR Change')
+ax1.set_ylabel('Density')
 ax1.legend()
 ax1.axvline(x=0, color='gray', linestyle='--', alpha=0.7)
 
 # 2. Histogram - Distribución de Eliminaciones
 ax2 = axes[0, 1]
-sns.histplot(data=df, x='Elim', hue='Result', palette=result_palette, ax=ax2, 
-             kde=True, alpha=0.6, bins=20)
+# Bordes comunes para todos los resultados; KDE escalada a conteos
+elim_hists = histogram_by(df, 'Elim', by='Result', bins=20)
+elim_curves = kde_by(df, 'Elim', by='Result')
+for result, hist in elim_hists.items():
+    plot_histogram(ax2, hist, color=result_palette.get(result, '#999'), label=result,
+                   alpha=0.4, curve=elim_curves[result])
+ax2.legend(title='Result')
+ax2.set_ylabel('Count')
 ax2.set_title('Histograma: Eliminaciones por Resultado', fontweight='bold')
 ax2.set_xlabel('Eliminaciones')
 
 # 3. Box Plot - SR Change por temporada
 ax3 = axes[0, 2]
-sns.boxplot(data=df, x='season', y='SR Change', palette='Set2', ax=ax3)
+season_boxes = box_stats_by(df, 'SR Change', by='season')
+plot_boxes(ax3, season_boxes, colors=dict(zip(season_boxes, sns.color_palette('Set2'))),
+           labels=list(season_boxes))
+ax3.set_ylabel('SR Change')
 ax3.set_title('Boxplot: SR Change por Temporada', fontweight='bold')
 ax3.set_xlabel('Temporada')
 ax3.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
@@ -63,8 +79,10 @@ ax3.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
 # 4. Violin Plot - Eliminaciones por rol
 ax4 = axes[1, 0]
 role_data = df[df['Role 1'].notna()]
-sns.violinplot(data=role_data, x='Role 1', y='Elim', palette=role_palette, ax=ax4, 
-               inner='box', cut=0)
+# Violines a partir de KDE precalculadas (cut=0: limitadas al rango de datos)
+plot_violins(ax4, kde_by(role_data, 'Elim', by='Role 1', cut=0), role_palette,
+             boxes=box_stats_by(role_data, 'Elim', by='Role 1'))
+ax4.set_ylabel('Elim')
 ax4.set_title('Violinplot: Eliminaciones por Rol', fontweight='bold')
 ax4.set_xlabel('Rol')
 ax4.tick_params(axis='x', rotation=15)
@@ -86,9 +104,9 @@ ax6.tick_params(axis='x', rotation=15)
 ax6.legend(loc='upper right', fontsize=8)
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/04_seaborn_distribuciones.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig, '/home/claude/overwatch_analysis/images/04_seaborn_distribuciones.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig)
 
 print("✓ Seaborn Distribuciones guardado: images/04_seaborn_distribuciones.png")
 
@@ -133,9 +151,9 @@ sns.heatmap(mode_result_sr, annot=True, fmt='.1f', cmap='RdBu_r', center=0, ax=a
 ax4.set_title('Heatmap: SR Change por Modo y Resultado', fontweight='bold')
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/05_seaborn_relaciones.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig2, '/home/claude/overwatch_analysis/images/05_seaborn_relaciones.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig2)
 
 print("✓ Seaborn Relaciones guardado: images/05_seaborn_relaciones.png")
 
@@ -151,14 +169,18 @@ pair_data = df[pair_cols].dropna()
 if len(pair_data) > 200:
     pair_data = pair_data.sample(200, random_state=42)
 
-g = sns.pairplot(pair_data, hue='Result', palette=result_palette, 
-                 diag_kind='kde', plot_kws={'alpha': 0.6, 's': 30},
-                 height=2.5, aspect=1)
+g = sns.PairGrid(pair_data, hue='Result', palette=result_palette, height=2.5, aspect=1,
+                 diag_sharey=False)
+g.map_offdiag(sns.scatterplot, alpha=0.6, s=30)
+# Diagonal: KDE de la caché de densidades (seaborn llama una vez por resultado)
+g.map_diag(lambda x, color=None, label=None, **kwargs:
+           plot_kde(plt.gca(), kde(x), color=color, label=label, alpha=0.25))
+g.add_legend()
 g.fig.suptitle('Pairplot: Relaciones Multivariables', fontsize=14, fontweight='bold', y=1.02)
 
-plt.savefig('/home/claude/overwatch_analysis/images/06_seaborn_pairplot.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(g.fig, '/home/claude/overwatch_analysis/images/06_seaborn_pairplot.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(g.fig)
 
 print("✓ Seaborn Pairplot guardado: images/06_seaborn_pairplot.png")
 
@@ -167,18 +189,28 @@ print("✓ Seaborn Pairplot guardado: images/06_seaborn_pairplot.png")
 # =============================================================================
 
 # FacetGrid: SR Change por temporada y resultado
-facet_data = df[df['season'].isin([9, 10])].dropna(subset=['SR Change'])
+# Filtro empujado al almacén de columnas: bitmap de temporada AND validez de SR Change
+facet_data = load_matches(CSV_PATH, ['season', 'Result', 'SR Change'],
+                          ('SR Change', 'notnull'), season=[9, 10])
 
 g = sns.FacetGrid(facet_data, col='season', hue='Result', palette=result_palette,
                   height=5, aspect=1.2)
-g.map(sns.histplot, 'SR Change', kde=True, alpha=0.6, bins=15)
-g.add_legend()
+for season, ax in zip(g.col_names, g.axes.flat):
+    season_data = facet_data[facet_data['season'] == season]
+    hists = histogram_by(season_data, 'SR Change', by='Result', bins=15)
+    curves = kde_by(season_data, 'SR Change', by='Result')
+    for result, hist in hists.items():
+        plot_histogram(ax, hist, color=result_palette[result], label=result, curve=curves[result])
+    ax.set_xlabel('SR Change')
+g.axes.flat[0].set_ylabel('Count')
+g.add_legend(legend_data={result: plt.Rectangle((0, 0), 1, 1, color=result_palette[result])
+                          for result in result_palette if result in facet_data['Result'].values})
 g.fig.suptitle('FacetGrid: Distribución SR Change por Temporada y Resultado', 
                fontsize=14, fontweight='bold', y=1.05)
 
-plt.savefig('/home/claude/overwatch_analysis/images/07_seaborn_facetgrid.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(g.fig, '/home/claude/overwatch_analysis/images/07_seaborn_facetgrid.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(g.fig)
 
 print("✓ Seaborn FacetGrid guardado: images/07_seaborn_facetgrid.png")
 
@@ -209,10 +241,12 @@ ax2.set_title('Barplot: Rendimiento Promedio por Rol', fontweight='bold')
 ax2.tick_params(axis='x', rotation=15)
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/08_seaborn_catplot.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig5, '/home/claude/overwatch_analysis/images/08_seaborn_catplot.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig5)
 
 print("✓ Seaborn Catplot guardado: images/08_seaborn_catplot.png")
 
+# Esperar a que los hilos escritores terminen de guardar las imágenes
+get_writer().flush()
 print("\n¡Todas las gráficas de Seaborn generadas exitosamente!")
@@ -15,18 +15,35 @@ from matplotlib.patches import Rectangle
 import warnings
 warnings.filterwarnings('ignore')
 
+from figure_writer import get_writer, savefig_async
+from sr_trajectory import build_trajectories, rated
+from sr_timeline import build_timeline, indices, axis_pixels
+from rank_tiers import TIER_FLOORS, build_tier_index
+
 # =============================================================================
 # CARGA DE DATOS
 # =============================================================================
 
 df = pd.read_csv('/mnt/user-data/uploads/all_seasons__1_.csv')
-df['End SR Numeric'] = pd.to_numeric(df['End SR'], errors='coerce')
 
 # Preparar datos para la animación - usar temporada 10
-season_10 = df[df['season'] == 10].copy()
-season_10 = season_10.sort_values('Game #').reset_index(drop=True)
-season_10['End SR Numeric'] = pd.to_numeric(season_10['End SR'], errors='coerce')
-season_10 = season_10[season_10['End SR Numeric'].notna()].reset_index(drop=True)
+# (trayectoria ya ordenada; solo las partidas con SR)
+trajectories = build_trajectories(df)
+tier_index = build_tier_index(df, trajectories)
+trajectory = trajectories[10]
+has_sr = rated(trajectory)
+season_sr = trajectory.sr[has_sr]
+season_results = df['Result'].to_numpy()[trajectory.rows[has_sr]]
+
+# Pirámide M4 de la temporada (sr_timeline.py) sobre la posición de cada
+# partida con SR: cada frame y la imagen estática piden solo los puntos que
+# caben en el ancho del eje
+timeline = build_timeline(np.arange(1, len(season_sr) + 1), season_sr)
+
+# Historiales largos: como mucho MAX_FRAMES frames, cada uno avanza varias
+# partidas (con pocas partidas, un frame por partida como siempre)
+MAX_FRAMES = 300
+frame_games = np.unique(np.linspace(1, len(season_sr), min(len(season_sr), MAX_FRAMES)).astype(int))
 
 # =============================================================================
 # CREAR ANIMACIÓN
@@ -35,9 +52,9 @@ season_10 = season_10[season_10['End SR Numeric'].notna()].reset_index(drop=True
 fig, ax = plt.subplots(figsize=(12, 6))
 
 # Configuración inicial
-ax.set_xlim(0, len(season_10) + 5)
-sr_min = season_10['End SR Numeric'].min() - 100
-sr_max = season_10['End SR Numeric'].max() + 100
+ax.set_xlim(0, len(season_sr) + 5)
+sr_min = season_sr.min() - 100
+sr_max = season_sr.max() + 100
 ax.set_ylim(sr_min, sr_max)
 
 ax.set_xlabel('Número de Partida', fontsize=12, fontweight='bold')
@@ -45,10 +62,12 @@ ax.set_ylabel('SR (Skill Rating)', fontsize=12, fontweight='bold')
 ax.set_title('Temporada 10: Evolución del SR\n(Animación)', fontsize=14, fontweight='bold')
 
 # Líneas de referencia para rangos
-ax.axhline(y=2500, color='gold', linestyle='--', alpha=0.5, label='Platino')
-ax.axhline(y=3000, color='#C0C0C0', linestyle='--', alpha=0.5, label='Diamante')
-ax.fill_between([0, len(season_10) + 5], 2000, 2500, alpha=0.1, color='gold')
-ax.fill_between([0, len(season_10) + 5], 2500, 3000, alpha=0.1, color='silver')
+ax.axhline(y=TIER_FLOORS['Platino'], color='gold', linestyle='--', alpha=0.5, label='Platino')
+ax.axhline(y=TIER_FLOORS['Diamante'], color='#C0C0C0', linestyle='--', alpha=0.5, label='Diamante')
+ax.fill_between([0, len(season_sr) + 5], TIER_FLOORS['Oro'], TIER_FLOORS['Platino'],
+                alpha=0.1, color='gold')
+ax.fill_between([0, len(season_sr) + 5], TIER_FLOORS['Platino'], TIER_FLOORS['Diamante'],
+                alpha=0.1, color='silver')
 
 # Elementos a animar
 line, = ax.plot([], [], 'b-', linewidth=2, label='SR')
@@ -57,10 +76,6 @@ sr_text = ax.text(0.02, 0.95, '', transform=ax.transAxes, fontsize=12,
                   fontweight='bold', verticalalignment='top',
                   bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
 
-# Datos para la animación
-x_data = []
-y_data = []
-
 def init():
     line.set_data([], [])
     point.set_data([], [])
@@ -68,15 +83,15 @@ def init():
     return line, point, sr_text
 
 def animate(frame):
-    if frame < len(season_10):
-        x_data.append(frame + 1)
-        y_data.append(season_10.iloc[frame]['End SR Numeric'])
-        
-        line.set_data(x_data, y_data)
-        point.set_data([frame + 1], [season_10.iloc[frame]['End SR Numeric']])
+    if frame < len(frame_games):
+        game = frame_games[frame]
+        shown = indices(timeline, axis_pixels(ax), x_range=(1, game))
+        shown = shown[shown < game]
+        line.set_data(timeline.x[shown], timeline.y[shown])
+        point.set_data([game], [season_sr[game - 1]])
         
-        current_sr = int(season_10.iloc[frame]['End SR Numeric'])
-        result = season_10.iloc[frame]['Result']
+        current_sr = int(season_sr[game - 1])
+        result = season_results[game - 1]
         
         # Color del punto según resultado
         if result == 'Win':
@@ -86,13 +101,13 @@ def animate(frame):
         else:
             point.set_color('yellow')
         
-        sr_text.set_text(f'Partida: {frame + 1}\nSR: {current_sr}\nResultado: {result}')
+        sr_text.set_text(f'Partida: {game}\nSR: {current_sr}\nResultado: {result}')
     
     return line, point, sr_text
 
 # Crear animación
 anim = animation.FuncAnimation(fig, animate, init_func=init, 
-                               frames=len(season_10) + 10, 
+                               frames=len(frame_games) + 10, 
                                interval=100, blit=True, repeat=False)
 
 ax.legend(loc='lower right')
@@ -113,29 +128,34 @@ print("✓ Animación guardada: images/09_animated_sr_evolution.gif")
 fig2, ax2 = plt.subplots(figsize=(12, 6))
 
 # Datos completos
-x_full = list(range(1, len(season_10) + 1))
-y_full = season_10['End SR Numeric'].tolist()
+x_full = list(range(1, len(season_sr) + 1))
+y_full = season_sr.tolist()
 
 # Colores por resultado
 colors = ['#4CAF50' if r == 'Win' else '#F44336' if r == 'Loss' else '#FFC107' 
-          for r in season_10['Result']]
+          for r in season_results]
 
-# Gráfica de línea
-ax2.plot(x_full, y_full, 'b-', linewidth=1.5, alpha=0.7, label='Evolución SR')
-ax2.scatter(x_full, y_full, c=colors, s=50, zorder=5, edgecolors='white', linewidth=0.5)
+# Gráfica de línea: puntos de la pirámide para el ancho del eje (todas las
+# partidas mientras quepan)
+shown = indices(timeline, axis_pixels(ax2, dpi=150))
+ax2.plot(timeline.x[shown], timeline.y[shown], 'b-', linewidth=1.5, alpha=0.7, label='Evolución SR')
+ax2.scatter(timeline.x[shown], timeline.y[shown], c=np.asarray(colors)[shown], s=50, zorder=5,
+            edgecolors='white', linewidth=0.5)
 
 # Configuración
-ax2.set_xlim(0, len(season_10) + 5)
+ax2.set_xlim(0, len(season_sr) + 5)
 ax2.set_ylim(sr_min, sr_max)
 ax2.set_xlabel('Número de Partida', fontsize=12, fontweight='bold')
 ax2.set_ylabel('SR (Skill Rating)', fontsize=12, fontweight='bold')
 ax2.set_title('Temporada 10: Evolución Completa del SR', fontsize=14, fontweight='bold')
 
 # Líneas de referencia
-ax2.axhline(y=2500, color='gold', linestyle='--', alpha=0.5, linewidth=2)
-ax2.axhline(y=3000, color='#C0C0C0', linestyle='--', alpha=0.5, linewidth=2)
-ax2.fill_between([0, len(season_10) + 5], 2000, 2500, alpha=0.1, color='gold', label='Platino')
-ax2.fill_between([0, len(season_10) + 5], 2500, 3000, alpha=0.1, color='silver', label='Diamante')
+ax2.axhline(y=TIER_FLOORS['Platino'], color='gold', linestyle='--', alpha=0.5, linewidth=2)
+ax2.axhline(y=TIER_FLOORS['Diamante'], color='#C0C0C0', linestyle='--', alpha=0.5, linewidth=2)
+ax2.fill_between([0, len(season_sr) + 5], TIER_FLOORS['Oro'], TIER_FLOORS['Platino'],
+                 alpha=0.1, color='gold', label='Oro')
+ax2.fill_between([0, len(season_sr) + 5], TIER_FLOORS['Platino'], TIER_FLOORS['Diamante'],
+                 alpha=0.1, color='silver', label='Platino')
 
 # Estadísticas
 sr_inicio = y_full[0]
@@ -145,6 +165,11 @@ sr_min_val = min(y_full)
 
 stats_text = f'SR Inicial: {int(sr_inicio)}\nSR Final: {int(sr_final)}\n'
 stats_text += f'SR Máximo: {int(sr_max_val)}\nSR Mínimo: {int(sr_min_val)}'
+# Partidas y winrate por tier (precalculados en el índice de tiers)
+for tier_name in tier_index.names:
+    games = tier_index.games.loc[10, tier_name]
+    if games:
+        stats_text += f'\n{tier_name}: {games} partidas ({tier_index.winrate.loc[10, tier_name]:.0f}% WR)'
 ax2.text(0.02, 0.95, stats_text, transform=ax2.transAxes, fontsize=10,
          verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
 
@@ -159,9 +184,12 @@ ax2.legend(handles=legend_elements, loc='lower right', fontsize=9)
 
 ax2.grid(True, alpha=0.3)
 
-plt.savefig('/home/claude/overwatch_analysis/images/09b_sr_evolution_static.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig2, '/home/claude/overwatch_analysis/images/09b_sr_evolution_static.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig2)
 
 print("✓ Imagen estática guardada: images/09b_sr_evolution_static.png")
+
+# Esperar a que los hilos escritores terminen de guardar las imágenes
+get_writer().flush()
 print("\n¡Gráficas animadas generadas exitosamente!")
@@ -13,57 +13,92 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Circle, FancyBboxPatch, Polygon
 import matplotlib.colors as mcolors
 
+from derived_tables import map_summary
+from figure_writer import get_writer, savefig_async
+from geo_analytics import (assign_regions, region_stats, plot_region_choropleth,
+                           plot_country_choropleth)
+from radar_charts import group_positions, plot_radar_panels
+from winrate_shrinkage import add_shrinkage_from_rates, shrunk_winrates
+
+# Modo del mapa mundial: 'coropletas' (países coloreados por winrate)
+# o 'circulos' (continentes simplificados con círculos por mapa)
+MAP_MODE = 'coropletas'
+
+# Winrate de las figuras: 'bayes' (encogido hacia la media según las
+# partidas jugadas, ver winrate_shrinkage.py) o 'bruto' (victorias/partidas)
+WINRATE_MODE = 'bayes'
+
 # =============================================================================
 # CARGA DE DATOS
 # =============================================================================
 
 df = pd.read_csv('/mnt/user-data/uploads/all_seasons__1_.csv')
 
-# Calcular estadísticas por mapa
-map_stats = df[df['Map'].notna()].groupby('Map').agg({
-    'Result': [
-        lambda x: len(x),
-        lambda x: (x == 'Win').sum() / len(x) * 100
-    ],
-    'SR Change': 'mean',
-    'Elim': 'mean'
-}).round(2)
-map_stats.columns = ['Partidas', 'Winrate', 'SR_Change', 'Elim_Avg']
-map_stats = map_stats.reset_index()
+# Calcular estadísticas por mapa (memoizado: ver derived_tables.py)
+map_stats = map_summary(df)
+
+# 'Winrate' sigue siendo el bruto (region_stats lo reagrega como victorias);
+# el encogido se calcula aparte en cada nivel que se dibuja (mapa, país,
+# región) para no encoger dos veces
+shrunk = shrunk_winrates(df[['Map', 'Result']], 'Map')
+map_stats['Winrate_Bayes'] = map_stats['Map'].map(shrunk['Winrate_Bayes'])
+WINRATE_COLUMN = 'Winrate_Bayes' if WINRATE_MODE == 'bayes' else 'Winrate'
+if WINRATE_MODE == 'bayes':
+    prior = shrunk.attrs['prior']
+    print(f"Winrate encogido por mapa: prior Beta({prior['alpha']:.1f}, {prior['beta']:.1f}), "
+          f"media {prior['media']:.1f}%")
+    print(shrunk[['Partidas', 'Winrate %', 'Winrate_Bayes', 'IC_inf', 'IC_sup']])
+
+
+def displayed_winrate(stats):
+    """Winrate a dibujar para una tabla reagregada (país o región)."""
+    if WINRATE_MODE == 'bayes':
+        return add_shrinkage_from_rates(stats)['Winrate_Bayes']
+    return stats['Winrate']
 
 # =============================================================================
 # MAPA CONCEPTUAL DE UBICACIONES DE OVERWATCH
 # =============================================================================
 
 # Ubicaciones conceptuales de los mapas (inspiradas en el lore de Overwatch)
-# Formato: (x, y, continente/región)
+# Formato: (x, y) = (longitud, latitud); la región se asigna con un join espacial
 map_locations = {
     # Europa
-    'Eichenwalde': (10, 52, 'Europa'),
-    "King's Row": (0, 51, 'Europa'),
-    'Hollywood': (-118, 34, 'América'),
-    'Numbani': (7, 9, 'África'),
-    'Rialto': (12, 45, 'Europa'),
+    'Eichenwalde': (10, 52),
+    "King's Row": (0, 51),
+    'Hollywood': (-118, 34),
+    'Numbani': (7, 9),
+    'Rialto': (12, 45),
     
     # Asia
-    'Hanamura': (140, 35, 'Asia'),
-    'Lijiang Tower': (104, 30, 'Asia'),
-    'Nepal': (85, 28, 'Asia'),
-    'Temple of Anubis': (31, 30, 'África'),
+    'Hanamura': (140, 35),
+    'Lijiang Tower': (104, 30),
+    'Nepal': (85, 28),
+    'Temple of Anubis': (31, 30),
     
     # América
-    'Route 66': (-110, 35, 'América'),
-    'Dorado': (-105, 20, 'América'),
-    'Blizzard World': (-120, 33, 'América'),
-    'Watchpoint: Gibraltar': (-5, 36, 'Europa'),
-    'Junkertown': (138, -34, 'Oceanía'),
+    'Route 66': (-110, 35),
+    'Dorado': (-105, 20),
+    'Blizzard World': (-120, 33),
+    'Watchpoint: Gibraltar': (-5, 36),
+    'Junkertown': (138, -34),
     
     # Otros
-    'Ilios': (25, 37, 'Europa'),
-    'Oasis': (47, 24, 'Asia'),
-    'Volskaya Industries': (37, 56, 'Europa'),
-    'Horizon Lunar Colony': (0, 70, 'Espacio'),  # Luna
+    'Ilios': (25, 37),
+    'Oasis': (47, 24),
+    'Volskaya Industries': (37, 56),
+    'Horizon Lunar Colony': (0, 70),  # Luna: solo posición de dibujo
 }
+# Mapas fuera de la Tierra: región 'Espacio' sin pasar por el join espacial
+# (su posición de dibujo puede caer dentro de un continente)
+off_world_maps = {'Horizon Lunar Colony'}
+
+# Asignar país/continente a cada mapa con el índice STRtree de países
+locations = pd.DataFrame.from_dict(map_locations, orient='index', columns=['x', 'y'])
+locations = locations.join(assign_regions(locations['x'], locations['y'], unmatched='Espacio',
+                                          off_world=locations.index.isin(off_world_maps))
+                           .set_index(locations.index))
+map_stats = map_stats.merge(locations, left_on='Map', right_index=True, how='left')
 
 # =============================================================================
 # FIGURA 1: MAPA MUNDIAL CON RENDIMIENTO POR UBICACIÓN
@@ -75,47 +110,54 @@ fig, ax = plt.subplots(figsize=(16, 10))
 # Fondo
 ax.set_facecolor('#E8F4F8')
 
-# Continentes simplificados (representación artística)
-# América del Norte
-na_x = [-170, -170, -50, -50, -80, -120, -170]
-na_y = [15, 70, 70, 45, 25, 15, 15]
-ax.fill(na_x, na_y, color='#C8E6C9', alpha=0.7, edgecolor='#388E3C', linewidth=1)
-
-# América del Sur
-sa_x = [-80, -35, -35, -80, -80]
-sa_y = [-55, -55, 10, 10, -55]
-ax.fill(sa_x, sa_y, color='#C8E6C9', alpha=0.7, edgecolor='#388E3C', linewidth=1)
-
-# Europa
-eu_x = [-10, 60, 60, -10, -10]
-eu_y = [35, 35, 70, 70, 35]
-ax.fill(eu_x, eu_y, color='#BBDEFB', alpha=0.7, edgecolor='#1976D2', linewidth=1)
-
-# África
-af_x = [-20, 50, 50, -20, -20]
-af_y = [-35, -35, 35, 35, -35]
-ax.fill(af_x, af_y, color='#FFE0B2', alpha=0.7, edgecolor='#F57C00', linewidth=1)
-
-# Asia
-as_x = [60, 180, 180, 60, 60]
-as_y = [0, 0, 70, 70, 0]
-ax.fill(as_x, as_y, color='#F8BBD9', alpha=0.7, edgecolor='#C2185B', linewidth=1)
-
-# Oceanía
-oc_x = [110, 180, 180, 110, 110]
-oc_y = [-50, -50, 0, 0, -50]
-ax.fill(oc_x, oc_y, color='#D1C4E9', alpha=0.7, edgecolor='#7B1FA2', linewidth=1)
-
 # Colormap para winrate
 cmap = plt.cm.RdYlGn
 norm = mcolors.Normalize(vmin=30, vmax=70)
 
+if MAP_MODE == 'coropletas':
+    # Países coloreados por el winrate de los mapas ubicados en ellos
+    # (una sola PatchCollection con geometrías simplificadas según el DPI)
+    country_stats = region_stats(map_stats.dropna(subset=['country']), region_col='country')
+    plot_country_choropleth(ax, displayed_winrate(country_stats), dpi=150, cmap=cmap, norm=norm,
+                            missing_color='#F5F5F5', edgecolor='#9E9E9E')
+else:
+    # Continentes simplificados (representación artística)
+    # América del Norte
+    na_x = [-170, -170, -50, -50, -80, -120, -170]
+    na_y = [15, 70, 70, 45, 25, 15, 15]
+    ax.fill(na_x, na_y, color='#C8E6C9', alpha=0.7, edgecolor='#388E3C', linewidth=1)
+
+    # América del Sur
+    sa_x = [-80, -35, -35, -80, -80]
+    sa_y = [-55, -55, 10, 10, -55]
+    ax.fill(sa_x, sa_y, color='#C8E6C9', alpha=0.7, edgecolor='#388E3C', linewidth=1)
+
+    # Europa
+    eu_x = [-10, 60, 60, -10, -10]
+    eu_y = [35, 35, 70, 70, 35]
+    ax.fill(eu_x, eu_y, color='#BBDEFB', alpha=0.7, edgecolor='#1976D2', linewidth=1)
+
+    # África
+    af_x = [-20, 50, 50, -20, -20]
+    af_y = [-35, -35, 35, 35, -35]
+    ax.fill(af_x, af_y, color='#FFE0B2', alpha=0.7, edgecolor='#F57C00', linewidth=1)
+
+    # Asia
+    as_x = [60, 180, 180, 60, 60]
+    as_y = [0, 0, 70, 70, 0]
+    ax.fill(as_x, as_y, color='#F8BBD9', alpha=0.7, edgecolor='#C2185B', linewidth=1)
+
+    # Oceanía
+    oc_x = [110, 180, 180, 110, 110]
+    oc_y = [-50, -50, 0, 0, -50]
+    ax.fill(oc_x, oc_y, color='#D1C4E9', alpha=0.7, edgecolor='#7B1FA2', linewidth=1)
+
 # Plotear cada mapa
 for _, row in map_stats.iterrows():
     map_name = row['Map']
     if map_name in map_locations:
-        x, y, region = map_locations[map_name]
-        winrate = row['Winrate']
+        x, y = map_locations[map_name]
+        winrate = row[WINRATE_COLUMN]
         partidas = row['Partidas']
         
         # Color basado en winrate
@@ -124,9 +166,12 @@ for _, row in map_stats.iterrows():
         # Tamaño basado en número de partidas
         size = max(100, partidas * 40)
         
-        # Dibujar círculo
-        circle = ax.scatter(x, y, s=size, c=[color], alpha=0.8, 
-                           edgecolors='black', linewidth=2, zorder=5)
+        # Dibujar círculo (en modo coropletas el país ya lleva el color)
+        if MAP_MODE == 'circulos':
+            circle = ax.scatter(x, y, s=size, c=[color], alpha=0.8, 
+                               edgecolors='black', linewidth=2, zorder=5)
+        else:
+            ax.scatter(x, y, s=30, c='black', zorder=5)
         
         # Etiqueta
         ax.annotate(f'{map_name}\n{winrate:.0f}%', 
@@ -143,7 +188,11 @@ ax.set_xlim(-180, 180)
 ax.set_ylim(-60, 80)
 ax.set_xlabel('Longitud', fontsize=12, fontweight='bold')
 ax.set_ylabel('Latitud', fontsize=12, fontweight='bold')
-ax.set_title('Mapa Mundial: Rendimiento por Ubicación de Mapas de Overwatch\n(Tamaño = Partidas Jugadas, Color = Winrate)', 
+if MAP_MODE == 'coropletas':
+    subtitle = '(Color del país = Winrate de sus mapas)'
+else:
+    subtitle = '(Tamaño = Partidas Jugadas, Color = Winrate)'
+ax.set_title(f'Mapa Mundial: Rendimiento por Ubicación de Mapas de Overwatch\n{subtitle}', 
              fontsize=14, fontweight='bold', pad=15)
 
 # Colorbar
@@ -162,16 +211,48 @@ region_colors = {
 }
 legend_patches = [plt.Rectangle((0, 0), 1, 1, fc=color, alpha=0.7, label=region) 
                   for region, color in region_colors.items()]
-ax.legend(handles=legend_patches, loc='lower left', fontsize=9, title='Regiones')
+if MAP_MODE == 'circulos':
+    ax.legend(handles=legend_patches, loc='lower left', fontsize=9, title='Regiones')
 
 ax.grid(True, alpha=0.3, linestyle='--')
 
-plt.savefig('/home/claude/overwatch_analysis/images/10_world_map_performance.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig, '/home/claude/overwatch_analysis/images/10_world_map_performance.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig)
 
 print("✓ Mapa mundial guardado: images/10_world_map_performance.png")
 
+# =============================================================================
+# FIGURA 1B: COROPLETAS POR REGIÓN (WINRATE Y PARTIDAS)
+# =============================================================================
+
+regional = region_stats(map_stats.dropna(subset=['region']))
+if WINRATE_MODE == 'bayes':
+    regional = add_shrinkage_from_rates(regional)
+print("\nRendimiento por región (join espacial):")
+print(regional)
+
+fig1b, axes1b = plt.subplots(1, 2, figsize=(20, 6))
+fig1b.suptitle('Coropletas por Región: Rendimiento según la Ubicación de los Mapas',
+               fontsize=14, fontweight='bold')
+
+plot_region_choropleth(axes1b[0], regional, WINRATE_COLUMN, cmap='RdYlGn', vmin=30, vmax=70,
+                       label='Winrate (%)')
+axes1b[0].set_title('Winrate por Región', fontsize=12, fontweight='bold')
+
+plot_region_choropleth(axes1b[1], regional, 'Partidas', cmap='Blues', label='Partidas Jugadas')
+axes1b[1].set_title('Partidas Jugadas por Región', fontsize=12, fontweight='bold')
+
+for ax_region in axes1b:
+    ax_region.set_xlabel('Longitud', fontsize=10, fontweight='bold')
+    ax_region.set_ylabel('Latitud', fontsize=10, fontweight='bold')
+
+savefig_async(fig1b, '/home/claude/overwatch_analysis/images/10b_region_choropleth.png',
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig1b)
+
+print("✓ Coropletas por región guardadas: images/10b_region_choropleth.png")
+
 # =============================================================================
 # FIGURA 2: MAPA DE CALOR POR MODO Y MAPA
 # =============================================================================
@@ -203,9 +284,9 @@ ax2.set_title('Mapa de Calor: SR Change Promedio por Mapa y Modo de Juego',
 ax2.set_xlabel('Modo de Juego', fontsize=12, fontweight='bold')
 ax2.set_ylabel('Mapa', fontsize=12, fontweight='bold')
 
-plt.savefig('/home/claude/overwatch_analysis/images/11_map_mode_heatmap.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig2, '/home/claude/overwatch_analysis/images/11_map_mode_heatmap.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig2)
 
 print("✓ Heatmap Mapa/Modo guardado: images/11_map_mode_heatmap.png")
 
@@ -213,48 +294,37 @@ print("✓ Heatmap Mapa/Modo guardado: images/11_map_mode_heatmap.png")
 # FIGURA 3: DIAGRAMA RADIAL DE MAPAS POR TIPO
 # =============================================================================
 
-fig3, axes = plt.subplots(2, 2, figsize=(14, 14), subplot_kw=dict(projection='polar'))
-
 modes = ['Assault', 'Assault/Escort', 'Control', 'Escort']
 colors = ['#E91E63', '#9C27B0', '#3F51B5', '#00BCD4']
 
-for idx, (mode, ax, color) in enumerate(zip(modes, axes.flatten(), colors)):
-    mode_maps = map_stats[map_stats['Map'].isin(
-        df[df['Mode'] == mode]['Map'].unique()
-    )].copy()
-    
-    if len(mode_maps) == 0:
-        continue
-    
-    # Preparar datos para gráfica polar
-    N = len(mode_maps)
-    angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
-    angles += angles[:1]  # Cerrar el círculo
-    
-    values = mode_maps['Winrate'].tolist()
-    values += values[:1]
-    
-    # Dibujar
-    ax.plot(angles, values, 'o-', linewidth=2, color=color, markersize=8)
-    ax.fill(angles, values, alpha=0.25, color=color)
-    
-    # Etiquetas
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(mode_maps['Map'].tolist(), size=8)
-    ax.set_ylim(0, 100)
-    ax.set_title(f'{mode}\n(Winrate por Mapa)', fontsize=12, fontweight='bold', pad=20)
-    
-    # Línea de referencia en 50%
-    ax.axhline(y=50, color='gray', linestyle='--', alpha=0.5)
+# Índice modo -> filas de map_stats, construido una sola vez
+mode_pairs = df[['Mode', 'Map']].dropna().drop_duplicates()
+mode_index = group_positions(mode_pairs['Mode'],
+                             pd.Index(map_stats['Map']).get_indexer(mode_pairs['Map']))
+
+panels = []
+for mode, color in zip(modes, colors):
+    rows = mode_index.get(mode, np.empty(0, dtype=np.int64))
+    panels.append({
+        'title': f'{mode}\n(Winrate por Mapa)',
+        'labels': map_stats['Map'].to_numpy()[rows],
+        'values': map_stats[WINRATE_COLUMN].to_numpy()[rows],
+        'colors': [color],
+    })
+
+# Todos los paneles en una figura; cada serie es un polígono vectorizado
+fig3, axes = plot_radar_panels(panels, ncols=2, reference=50)
 
 plt.suptitle('Diagrama Radial: Winrate por Mapa según Modo de Juego', 
              fontsize=14, fontweight='bold', y=1.02)
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/12_radar_maps.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig3, '/home/claude/overwatch_analysis/images/12_radar_maps.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig3)
 
 print("✓ Diagrama Radial guardado: images/12_radar_maps.png")
 
+# Esperar a que los hilos escritores terminen de guardar las imágenes
+get_writer().flush()
 print("\n¡Todas las visualizaciones de mapas generadas exitosamente!")
@@ -7,10 +7,21 @@ Incluye comparaciones entre temporadas, roles, mapas y rendimiento
 Dataset: Overwatch Competitive Seasons (all_seasons.csv)
 """
 
+from contextlib import closing
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
+
+from figure_writer import get_writer, savefig_async
+from sr_trajectory import build_trajectories, sr_summary
+from rank_tiers import TIER_FLOORS
+from bootstrap_stats import mean_ci
+from density_cache import box_stats_by, plot_boxes
+from column_store import open_store
+from match_model import coefficients, fit_models, predict
+import derived_tables
+import sql_backend
 
 # Configuración
 plt.style.use('seaborn-v0_8-whitegrid')
@@ -19,11 +30,22 @@ plt.style.use('seaborn-v0_8-whitegrid')
 # CARGA DE DATOS
 # =============================================================================
 
-df = pd.read_csv('/mnt/user-data/uploads/all_seasons__1_.csv')
-df['Start SR Numeric'] = pd.to_numeric(df['Start SR'], errors='coerce')
-df['End SR Numeric'] = pd.to_numeric(df['End SR'], errors='coerce')
+# 'pandas' agrega en memoria; 'sqlite' delega el resumen por temporada a
+# la base embebida de sql_backend.py (mismos resultados)
+BACKEND = 'pandas'
+
+CSV_PATH = '/mnt/user-data/uploads/all_seasons__1_.csv'
+df = pd.read_csv(CSV_PATH)
 df['SR Change'] = pd.to_numeric(df['SR Change'], errors='coerce')
 
+# Trayectorias de SR por temporada (ordenadas, con posicionamiento y huecos resueltos)
+trajectories = build_trajectories(df)
+
+# Promedios de Elim/Death por temporada desde el almacén de columnas
+# (solo se mapean las páginas de season, Elim y Death)
+store = open_store(CSV_PATH)
+season_kd = store.group_means('season', ['Elim', 'Death'])
+
 # =============================================================================
 # FIGURA 1: COMPARATIVA ENTRE TEMPORADAS
 # =============================================================================
@@ -33,10 +55,21 @@ fig.suptitle('Análisis Comparativo: Evolución entre Temporadas', fontsize=16,
 
 seasons = sorted(df['season'].unique())
 colors = ['#E91E63', '#9C27B0', '#3F51B5', '#00BCD4']
+medal_columns = ['Gold medals', 'Silver medals', 'Bronze medals']
+
+if BACKEND == 'sqlite':
+    with closing(sql_backend.connect(CSV_PATH)) as con:
+        season_summary = sql_backend.season_summary(con)
+else:
+    # Tabla memoizada (derived_tables.py), compartida con los demás scripts
+    season_summary = derived_tables.season_summary(df)
+season_summary = season_summary.reindex(seasons)
+winrates = season_summary['Winrate'].tolist()
+partidas = season_summary['Partidas'].tolist()
+medal_data = season_summary[medal_columns].to_numpy()
 
 # 1. Winrate por temporada
 ax1 = axes[0, 0]
-winrates = [df[df['season'] == s]['Result'].apply(lambda x: x == 'Win').mean() * 100 for s in seasons]
 bars = ax1.bar([f'S{s}' for s in seasons], winrates, color=colors)
 ax1.axhline(y=50, color='gray', linestyle='--', linewidth=2)
 ax1.set_ylabel('Winrate (%)', fontweight='bold')
@@ -48,7 +81,6 @@ ax1.set_ylim(0, 70)
 
 # 2. Partidas jugadas por temporada
 ax2 = axes[0, 1]
-partidas = [len(df[df['season'] == s]) for s in seasons]
 bars = ax2.bar([f'S{s}' for s in seasons], partidas, color=colors)
 ax2.set_ylabel('Número de Partidas', fontweight='bold')
 ax2.set_title('Partidas Jugadas por Temporada', fontweight='bold')
@@ -59,28 +91,21 @@ for bar, p in zip(bars, partidas):
 # 3. SR Range por temporada
 ax3 = axes[0, 2]
 for i, s in enumerate(seasons):
-    season_data = df[df['season'] == s]
-    sr_start = pd.to_numeric(season_data['Start SR'].iloc[0], errors='coerce')
-    sr_end = pd.to_numeric(season_data['End SR'].iloc[-1], errors='coerce')
-    sr_max = season_data['End SR Numeric'].max()
-    sr_min = season_data['End SR Numeric'].min()
+    summary = sr_summary(trajectories[s])
     
-    if pd.notna(sr_min) and pd.notna(sr_max):
-        ax3.barh(f'S{s}', sr_max - sr_min, left=sr_min, color=colors[i], alpha=0.7)
-        ax3.scatter([sr_start, sr_end], [f'S{s}', f'S{s}'], color=['green', 'red'], s=100, zorder=5)
+    if pd.notna(summary['minimo']) and pd.notna(summary['maximo']):
+        ax3.barh(f'S{s}', summary['maximo'] - summary['minimo'], left=summary['minimo'],
+                 color=colors[i], alpha=0.7)
+        ax3.scatter([summary['inicio'], summary['final']], [f'S{s}', f'S{s}'],
+                    color=['green', 'red'], s=100, zorder=5)
 
 ax3.set_xlabel('Skill Rating (SR)', fontweight='bold')
 ax3.set_title('Rango de SR por Temporada\n(Verde=Inicio, Rojo=Final)', fontweight='bold')
-ax3.axvline(x=2500, color='gold', linestyle='--', alpha=0.5)
+ax3.axvline(x=TIER_FLOORS['Platino'], color='gold', linestyle='--', alpha=0.5)
 
 # 4. Promedio de medallas por temporada
 ax4 = axes[1, 0]
-medal_data = []
-for s in seasons:
-    season_medals = df[df['season'] == s][['Gold medals', 'Silver medals', 'Bronze medals']].mean()
-    medal_data.append(season_medals)
-
-medal_df = pd.DataFrame(medal_data, index=[f'S{s}' for s in seasons])
+medal_df = pd.DataFrame(medal_data, index=[f'S{s}' for s in seasons], columns=medal_columns)
 medal_df.plot(kind='bar', ax=ax4, color=['#FFD700', '#C0C0C0', '#CD7F32'], width=0.7)
 ax4.set_ylabel('Promedio de Medallas', fontweight='bold')
 ax4.set_title('Medallas Promedio por Temporada', fontweight='bold')
@@ -91,9 +116,9 @@ ax4.legend(loc='upper right', fontsize=8)
 ax5 = axes[1, 1]
 kd_data = []
 for s in [9, 10]:  # Solo temporadas con datos de K/D
-    season_data = df[df['season'] == s]
-    avg_elim = season_data['Elim'].mean()
-    avg_death = season_data['Death'].mean()
+    if s not in season_kd.index:
+        continue
+    avg_elim, avg_death = season_kd.loc[s, ['Elim', 'Death']]
     if pd.notna(avg_elim) and pd.notna(avg_death) and avg_death > 0:
         kd_data.append({'Season': f'S{s}', 'Elim': avg_elim, 'Death': avg_death, 'K/D': avg_elim/avg_death})
 
@@ -124,9 +149,9 @@ ax6.axhline(y=0, color='gray', linestyle='-', linewidth=1)
 ax6.legend()
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/13_comparative_seasons.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig, '/home/claude/overwatch_analysis/images/13_comparative_seasons.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig)
 
 print("✓ Comparativa de Temporadas guardada: images/13_comparative_seasons.png")
 
@@ -146,13 +171,15 @@ ax1 = axes2[0, 0]
 metrics = ['Winrate', 'Elim', 'Death', 'Heal', 'Dmg']
 role_metrics = []
 
+# Promedios por rol desde la tabla memoizada (roles sin partidas quedan en NaN)
+role_means = derived_tables.role_stats(df).reindex(roles)
 for role in roles:
-    role_subset = role_data[role_data['Role 1'] == role]
-    winrate = (role_subset['Result'] == 'Win').mean() * 100
-    elim = role_subset['Elim'].mean() / 60 * 100 if role_subset['Elim'].mean() > 0 else 0  # Normalizado
-    death = (1 - role_subset['Death'].mean() / 20) * 100 if role_subset['Death'].mean() > 0 else 0  # Invertido
-    heal = role_subset['Heal'].mean() / 150 if role_subset['Heal'].mean() > 0 else 0
-    dmg = role_subset['Dmg'].mean() / 120 if role_subset['Dmg'].mean() > 0 else 0
+    means = role_means.loc[role]
+    winrate = means['Winrate %']
+    elim = means['Elim'] / 60 * 100 if means['Elim'] > 0 else 0  # Normalizado
+    death = (1 - means['Muertes'] / 20) * 100 if means['Muertes'] > 0 else 0  # Invertido
+    heal = means['Heal'] / 150 if means['Heal'] > 0 else 0
+    dmg = means['Dmg'] / 120 if means['Dmg'] > 0 else 0
     role_metrics.append([winrate, elim, death, heal, dmg])
 
 # Barras agrupadas
@@ -179,30 +206,43 @@ ax2.set_title('Distribución de Partidas por Rol', fontweight='bold')
 
 # 3. SR Change por rol
 ax3 = axes2[1, 0]
-role_sr = role_data.groupby('Role 1')['SR Change'].agg(['mean', 'std'])
+# Intervalo de confianza bootstrap del 95% para la media de cada rol
+role_sr = mean_ci(role_data, 'Role 1', 'SR Change')
+role_err = np.vstack([role_sr['media'] - role_sr['ic_inf'], role_sr['ic_sup'] - role_sr['media']])
 x = np.arange(len(role_sr))
-bars = ax3.bar(x, role_sr['mean'], yerr=role_sr['std'], 
+bars = ax3.bar(x, role_sr['media'], yerr=role_err, 
                color=[role_colors.get(r, '#999') for r in role_sr.index],
                capsize=5, edgecolor='white')
 ax3.set_xticks(x)
 ax3.set_xticklabels(role_sr.index)
 ax3.axhline(y=0, color='gray', linestyle='-', linewidth=1)
 ax3.set_ylabel('SR Change Promedio', fontweight='bold')
-ax3.set_title('SR Change por Rol (con Desv. Estándar)', fontweight='bold')
+ax3.set_title('SR Change por Rol (con IC 95% bootstrap)', fontweight='bold')
 
 # 4. Boxplot de rendimiento
 ax4 = axes2[1, 1]
-role_data_melt = role_data.melt(id_vars=['Role 1'], value_vars=['Elim', 'Death'],
-                                 var_name='Métrica', value_name='Valor')
-sns.boxplot(data=role_data_melt, x='Role 1', y='Valor', hue='Métrica', ax=ax4,
-            palette=['#4CAF50', '#F44336'])
+# Cajas agrupadas (rol x métrica) con estadísticas precalculadas
+roles = list(pd.unique(role_data['Role 1']))
+for offset, (metric, color) in zip([-0.2, 0.2], [('Elim', '#4CAF50'), ('Death', '#F44336')]):
+    # Un rol sin valores de la métrica (todo NaN) no tiene caja ni posición
+    metric_boxes = {role: box for role, box in
+                    box_stats_by(role_data, metric, by='Role 1', order=roles).items()
+                    if box is not None}
+    plot_boxes(ax4, metric_boxes, colors=dict.fromkeys(metric_boxes, color),
+               positions=[roles.index(r) + offset for r in metric_boxes], width=0.35)
+ax4.set_xticks(range(len(roles)))
+ax4.set_xticklabels(roles)
+ax4.set_xlabel('Role 1')
+ax4.set_ylabel('Valor')
+ax4.legend(handles=[plt.Rectangle((0, 0), 1, 1, color=c) for c in ['#4CAF50', '#F44336']],
+           labels=['Elim', 'Death'], title='Métrica')
 ax4.set_title('Distribución de Elim/Death por Rol', fontweight='bold')
 ax4.tick_params(axis='x', rotation=15)
 
 plt.tight_layout()
-plt.savefig('/home/claude/overwatch_analysis/images/14_comparative_roles.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig2, '/home/claude/overwatch_analysis/images/14_comparative_roles.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig2)
 
 print("✓ Comparativa de Roles guardada: images/14_comparative_roles.png")
 
@@ -223,12 +263,11 @@ for s in seasons:
     total = len(season_data)
     winrate = wins / total * 100 if total > 0 else 0
     
-    sr_start = pd.to_numeric(season_data['Start SR'].iloc[0], errors='coerce')
-    sr_end = pd.to_numeric(season_data['End SR'].iloc[-1], errors='coerce')
+    summary = sr_summary(trajectories[s])
+    sr_start, sr_end = summary['inicio'], summary['final']
     sr_change = sr_end - sr_start if pd.notna(sr_start) and pd.notna(sr_end) else 'N/A'
     
-    avg_elim = season_data['Elim'].mean()
-    avg_death = season_data['Death'].mean()
+    avg_elim, avg_death = season_kd.loc[s, ['Elim', 'Death']]
     kd = avg_elim / avg_death if pd.notna(avg_elim) and pd.notna(avg_death) and avg_death > 0 else 'N/A'
     
     summary_data.append([
@@ -265,12 +304,81 @@ for i, row in enumerate(summary_data):
 
 ax.set_title('Tabla Resumen: Estadísticas por Temporada', fontsize=16, fontweight='bold', pad=20)
 
-plt.savefig('/home/claude/overwatch_analysis/images/15_summary_table.png', 
-            dpi=150, bbox_inches='tight', facecolor='white')
-plt.close()
+savefig_async(fig3, '/home/claude/overwatch_analysis/images/15_summary_table.png', 
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig3)
 
 print("✓ Tabla Resumen guardada: images/15_summary_table.png")
 
+# =============================================================================
+# FIGURA 4: SR ESPERADO VS REAL (MODELOS PREDICTIVOS)
+# =============================================================================
+
+# Logística para el resultado y ridge para SR Change (match_model.py); se
+# cargan de .models/ si ya se entrenaron con estos datos
+models = fit_models(df)
+win_prob = predict(models['resultado'], df)
+expected_change = predict(models['sr_change'], df)
+
+for name, model in models.items():
+    metrics = ', '.join(f'{k}={v:.3f}' for k, v in model.metrics.items() if isinstance(v, float))
+    print(f"\nModelo {name} ({model.kind}, validación cruzada): {metrics}")
+    print(coefficients(model).head(5).round(3).to_string())
+
+fig4, axes4 = plt.subplots(1, 3, figsize=(18, 5.5))
+fig4.suptitle('Modelos Predictivos: SR Esperado vs Real', fontsize=16, fontweight='bold', y=1.02)
+
+# 1. SR Change esperado vs real por partida
+ax = axes4[0]
+scored = ~np.isnan(expected_change) & df['SR Change'].notna().to_numpy()
+result_colors = df['Result'].map({'Win': '#4CAF50', 'Loss': '#F44336', 'Draw': '#FFC107'})
+ax.scatter(expected_change[scored], df['SR Change'].to_numpy()[scored],
+           c=result_colors.to_numpy()[scored], alpha=0.5, s=20, edgecolors='none')
+ax.axhline(0, color='gray', linewidth=0.8)
+ax.set_xlabel('SR Change esperado')
+ax.set_ylabel('SR Change real')
+ax.set_title('Por Partida (color = resultado)', fontweight='bold')
+
+# 2. Calibración de la probabilidad de victoria
+ax = axes4[1]
+decided = ~np.isnan(win_prob) & df['Result'].isin(['Win', 'Loss']).to_numpy()
+calibration = pd.DataFrame({
+    'bin': pd.cut(win_prob[decided], np.linspace(0, 1, 11)),
+    'esperado': win_prob[decided],
+    'real': (df['Result'].to_numpy()[decided] == 'Win'),
+}).groupby('bin', observed=True).agg(esperado=('esperado', 'mean'), real=('real', 'mean'),
+                                     partidas=('real', 'size'))
+ax.plot([0, 1], [0, 1], color='gray', linestyle='--', linewidth=1)
+ax.scatter(calibration['esperado'], calibration['real'], s=calibration['partidas'] * 3,
+           color='#3F51B5', alpha=0.7, edgecolors='black')
+ax.set_xlim(0, 1)
+ax.set_ylim(0, 1)
+ax.set_xlabel('P(victoria) esperada')
+ax.set_ylabel('Proporción de victorias')
+ax.set_title('Calibración (tamaño = partidas)', fontweight='bold')
+
+# 3. SR acumulado real vs esperado en la última temporada
+ax = axes4[2]
+last = trajectories[seasons[-1]]
+rated = ~np.isnan(last.sr)
+first = np.argmax(rated)
+steps = np.nan_to_num(expected_change[last.rows][first + 1:])
+expected_sr = last.sr[first] + np.r_[0, np.cumsum(steps)]
+ax.plot(last.game[rated], last.sr[rated], color='#E91E63', linewidth=2, label='SR real')
+ax.plot(last.game[first:], expected_sr, color='#3F51B5', linewidth=2, linestyle='--',
+        label='SR esperado')
+ax.set_xlabel('Partida #')
+ax.set_ylabel('SR')
+ax.set_title(f'Temporada {seasons[-1]}: SR Acumulado', fontweight='bold')
+ax.legend()
+
+plt.tight_layout()
+savefig_async(fig4, '/home/claude/overwatch_analysis/images/16_expected_vs_actual_sr.png',
+              dpi=150, bbox_inches='tight', facecolor='white')
+plt.close(fig4)
+
+print("✓ SR esperado vs real guardado: images/16_expected_vs_actual_sr.png")
+
 # =============================================================================
 # GUARDAR DATOS PROCESADOS PARA EL REPORTE
 # =============================================================================
@@ -298,4 +406,7 @@ stats_df.columns = ['Valor']
 stats_df.to_csv('/home/claude/overwatch_analysis/data_general_stats.csv')
 
 print("✓ Estadísticas generales guardadas: data_general_stats.csv")
+
+# Esperar a que los hilos escritores terminen de guardar las imágenes
+get_writer().flush()
 print("\n¡Análisis comparativo completado!")
@@ -0,0 +1,103 @@
+"""
+bootstrap_stats.py
+==================
+Intervalos de confianza bootstrap para winrate y SR Change promedio por
+cualquier dimensión (leaver, mapa, rol, modo...), y detección de grupos
+anómalos cuyo intervalo no contiene el valor global.
+
+Uso:
+    from bootstrap_stats import winrate_ci, mean_ci, flag_anomalies
+    leavers = winrate_ci(df, 'Leaver')
+    roles = mean_ci(df, 'Role 1', 'SR Change', resamples=10000)
+
+El remuestreo es vectorizado: cada bloque genera una matriz de índices
+(remuestras x partidas) y promedia por filas. El tamaño del bloque se elige
+para no superar `MAX_BLOCK_ELEMENTS` elementos en memoria. Con `workers > 1`
+los bloques se reparten en un pool de procesos.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RESAMPLES = 10000
+DEFAULT_CONFIDENCE = 0.95
+# Elementos máximos de la matriz de índices por bloque (~160 MB en int64)
+MAX_BLOCK_ELEMENTS = 20_000_000
+
+
+def _resample_means(values, resamples, seed, max_elements=MAX_BLOCK_ELEMENTS):
+    """Medias de `resamples` remuestras con reemplazo de `values`."""
+    rng = np.random.default_rng(seed)
+    n = len(values)
+    block = max(1, max_elements // max(n, 1))
+    means = np.empty(resamples)
+    for start in range(0, resamples, block):
+        stop = min(start + block, resamples)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        means[start:stop] = values[idx].mean(axis=1)
+    return means
+
+
+def bootstrap_means(values, resamples=DEFAULT_RESAMPLES, seed=0, workers=1):
+    """Distribución bootstrap de la media de `values` (arreglo de `resamples`)."""
+    values = np.asarray(values, dtype=float)
+    if workers <= 1 or resamples < 2 * workers:
+        return _resample_means(values, resamples, seed)
+    # Semillas independientes por proceso a partir de la semilla principal
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    sizes = np.diff(np.linspace(0, resamples, workers + 1).astype(int))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(_resample_means, [values] * workers, sizes, seeds)
+        return np.concatenate(list(parts))
+
+
+def bootstrap_ci(df, by, values, resamples=DEFAULT_RESAMPLES, confidence=DEFAULT_CONFIDENCE,
+                 seed=0, workers=1, min_size=2):
+    """
+    Media e intervalo percentil por grupo de `by`.
+
+    `values` es una Serie alineada con `df` (NaN se descartan). Los grupos
+    con menos de `min_size` valores quedan sin intervalo.
+    """
+    values = pd.Series(np.asarray(values, dtype=float), index=df.index)
+    keys = df[by]
+    valid = values.notna() & keys.notna()
+    codes, groups = pd.factorize(keys[valid], sort=True)
+    data = values[valid].to_numpy()
+    # Ordenar una sola vez por grupo y cortar con searchsorted
+    order = np.argsort(codes, kind='stable')
+    data, codes = data[order], codes[order]
+    bounds = np.searchsorted(codes, np.arange(len(groups) + 1))
+
+    tail = (1 - confidence) / 2 * 100
+    rows = []
+    for i, group in enumerate(groups):
+        sample = data[bounds[i]:bounds[i + 1]]
+        low = high = np.nan
+        if len(sample) >= min_size:
+            means = bootstrap_means(sample, resamples, seed=[seed, i], workers=workers)
+            low, high = np.percentile(means, [tail, 100 - tail])
+        rows.append({by: group, 'n': len(sample), 'media': sample.mean(),
+                     'ic_inf': low, 'ic_sup': high})
+    return pd.DataFrame(rows).set_index(by).round(2)
+
+
+def winrate_ci(df, by, result_col='Result', **kwargs):
+    """Winrate (%) con intervalo bootstrap por grupo de `by`."""
+    wins = (df[result_col] == 'Win').astype(float) * 100
+    wins[df[result_col].isna()] = np.nan
+    return bootstrap_ci(df, by, wins, **kwargs).rename(columns={'media': 'winrate'})
+
+
+def mean_ci(df, by, column, **kwargs):
+    """Promedio de `column` con intervalo bootstrap por grupo de `by`."""
+    return bootstrap_ci(df, by, pd.to_numeric(df[column], errors='coerce'), **kwargs)
+
+
+def flag_anomalies(ci, reference):
+    """Marca los grupos cuyo intervalo no contiene `reference` (p. ej. el valor global)."""
+    ci = ci.copy()
+    ci['anomalia'] = (ci['ic_inf'] > reference) | (ci['ic_sup'] < reference)
+    return ci
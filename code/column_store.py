@@ -0,0 +1,281 @@
+"""
+column_store.py
+===============
+Almacén binario de las columnas numéricas más usadas: un `.npy` por
+columna con su tipo nativo y un bitmap de validez (`np.packbits`) en lugar
+de NaN. Los archivos se abren con `mmap_mode='r'`, así que un análisis que
+solo necesita 2-3 columnas lee únicamente esas páginas y varios procesos
+comparten la misma caché de páginas del sistema operativo sin copias.
+
+Las dimensiones categóricas (temporada, mapa, modo, rol, resultado...) se
+guardan codificadas con diccionario y con un índice de bitmaps: un bitmap
+empaquetado por valor, de modo que un filtro conjuntivo se resuelve con
+AND de bitmaps (ver match_query.py).
+
+Uso:
+    from column_store import open_store
+    store = open_store(CSV_PATH)              # construye o reutiliza .column_store/
+    elim, ok = store.values('Elim'), store.valid('Elim')
+    store.frame(['season', 'Elim', 'Death'])  # DataFrame con NaN donde no hay dato
+    store.bitmap('Map', ['Ilios', 'Nepal'])   # bitmap empaquetado de esas filas
+
+El almacén se reconstruye solo cuando cambia el CSV de origen (tamaño o
+fecha de modificación) o la versión del formato.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, '..', '.column_store')
+# Se incrementa cuando cambia el formato en disco (invalida el almacén)
+STORE_VERSION = 2
+
+# Columnas calientes y su tipo en disco (enteros: sin NaN, con bitmap)
+HOT_COLUMNS = {
+    'season': np.int16,
+    'Game #': np.int32,
+    'End SR': np.int32,
+    'SR Change': np.int32,
+    'Elim': np.int32,
+    'Death': np.int32,
+    'Heal': np.int32,
+    'Dmg': np.int32,
+    'Gold medals': np.int16,
+    'Silver medals': np.int16,
+    'Bronze medals': np.int16,
+}
+
+# Dimensiones categóricas (codificadas con diccionario + índice de bitmaps)
+# y el tipo de sus valores
+DIMENSION_COLUMNS = {
+    'season': int,
+    'Map': str,
+    'Mode': str,
+    'Role 1': str,
+    'Role 2': str,
+    'Result': str,
+    'Leaver': str,
+    'Account': str,
+}
+
+MANIFEST = 'manifest.json'
+
+
+def _file_name(column):
+    # 'Game #' -> 'game', 'SR Change' -> 'sr_change'
+    return ''.join(c if c.isalnum() else '_' for c in column.lower()).strip('_')
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {'source': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _save_atomic(path, array):
+    tmp_path = f'{path}.tmp-{os.getpid()}.npy'
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def _build_dimension(store_dir, column, raw, kind):
+    if kind is int:
+        # Orden numérico del diccionario (3 < 10), no alfabético
+        raw = pd.to_numeric(raw, errors='coerce').astype('Int64')
+    codes, uniques = pd.factorize(raw, sort=True)
+    dictionary = [kind(value) for value in uniques]
+    codes = codes.astype(np.int16)
+    name = f'dim_{_file_name(column)}'
+    # Un bitmap empaquetado por valor del diccionario (filas x 1 bit)
+    bitmaps = np.stack([np.packbits(codes == code) for code in range(len(dictionary))]) \
+        if dictionary else np.zeros((0, (len(codes) + 7) // 8), dtype=np.uint8)
+    _save_atomic(os.path.join(store_dir, f'{name}.codes.npy'), codes)
+    _save_atomic(os.path.join(store_dir, f'{name}.bitmaps.npy'), bitmaps)
+    _save_atomic(os.path.join(store_dir, f'{name}.valid.npy'), np.packbits(codes >= 0))
+    return {'file': name, 'diccionario': dictionary}
+
+
+def write_store(raw, store_dir=STORE_DIR, stamp=None, columns=HOT_COLUMNS,
+                dimensions=DIMENSION_COLUMNS):
+    """
+    Escribe columnas, bitmaps de validez e índices desde un DataFrame (texto
+    o ya numérico). `stamp` identifica el origen para comprobar frescura.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = dict(stamp or {}, version=STORE_VERSION, rows=len(raw),
+                    solicitadas=list(columns) + list(dimensions), columns={}, dimensions={})
+    for column, kind in dimensions.items():
+        if column in raw:
+            manifest['dimensions'][column] = _build_dimension(store_dir, column, raw[column], kind)
+    for column, dtype in columns.items():
+        if column not in raw:
+            continue
+        # 'P' (posicionamiento), vacíos y texto quedan como no válidos
+        numeric = pd.to_numeric(raw[column], errors='coerce').to_numpy(dtype=float)
+        valid = np.isfinite(numeric)
+        values = np.where(valid, numeric, 0).astype(dtype)
+        name = _file_name(column)
+        _save_atomic(os.path.join(store_dir, f'{name}.npy'), values)
+        _save_atomic(os.path.join(store_dir, f'{name}.valid.npy'), np.packbits(valid))
+        manifest['columns'][column] = {'file': name, 'dtype': np.dtype(dtype).name,
+                                       'validos': int(valid.sum())}
+    # El manifiesto se escribe al final: si existe, el almacén está completo
+    _write_manifest(store_dir, manifest)
+    return manifest
+
+
+def _write_manifest(store_dir, manifest):
+    tmp_path = os.path.join(store_dir, f'{MANIFEST}.tmp-{os.getpid()}')
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST))
+
+
+def update_manifest(store_dir, **fields):
+    """Actualiza campos del manifiesto (p. ej. los orígenes) sin reescribir columnas."""
+    manifest = _read_manifest(store_dir)
+    manifest.update(fields)
+    _write_manifest(store_dir, manifest)
+    return manifest
+
+
+def build_store(csv_path, store_dir=STORE_DIR, columns=HOT_COLUMNS, dimensions=DIMENSION_COLUMNS):
+    """Parsea el CSV una vez y escribe columnas, bitmaps de validez e índices."""
+    raw = pd.read_csv(csv_path, usecols=lambda c: c in columns or c in dimensions, dtype=str)
+    return write_store(raw, store_dir, _source_stamp(csv_path), columns, dimensions)
+
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, MANIFEST), encoding='utf-8') as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(manifest, csv_path, columns, dimensions=()):
+    if manifest is None or manifest.get('version') != STORE_VERSION:
+        return False
+    stamp = _source_stamp(csv_path)
+    return (all(manifest.get(key) == value for key, value in stamp.items())
+            and set(columns) | set(dimensions) <= set(manifest.get('solicitadas', ())))
+
+
+class ColumnStore:
+    """
+    Vista de solo lectura sobre un almacén de columnas.
+
+    Los arreglos se mapean en memoria la primera vez que se piden. Al
+    enviarse a otro proceso solo viaja la ruta: cada proceso vuelve a
+    mapear los mismos archivos.
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        self.manifest = _read_manifest(store_dir)
+        if self.manifest is None:
+            raise FileNotFoundError(f'No hay almacén de columnas en {store_dir}')
+        self.rows = self.manifest['rows']
+        self._arrays = {}
+
+    def __reduce__(self):
+        return (ColumnStore, (self.store_dir,))
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def columns(self):
+        return list(self.manifest['columns'])
+
+    @property
+    def dimensions(self):
+        return list(self.manifest['dimensions'])
+
+    def _load(self, column, suffix='', section='columns'):
+        key = (section, column, suffix)
+        if key not in self._arrays:
+            if column not in self.manifest[section]:
+                raise KeyError(f'Columna no almacenada: {column!r} '
+                               f'(disponibles: {list(self.manifest[section])})')
+            name = self.manifest[section][column]['file']
+            self._arrays[key] = np.load(os.path.join(self.store_dir, f'{name}{suffix}.npy'),
+                                        mmap_mode='r')
+        return self._arrays[key]
+
+    def values(self, column):
+        """Valores crudos (memmap de solo lectura); donde no hay dato vale 0."""
+        return self._load(column)
+
+    def valid(self, column):
+        """Máscara booleana de filas con dato."""
+        return np.unpackbits(self._load(column, '.valid'), count=self.rows).astype(bool)
+
+    def column(self, column):
+        """Columna como float64 con NaN donde no hay dato (como la columna de pandas)."""
+        out = self.values(column).astype(float)
+        out[~self.valid(column)] = np.nan
+        return out
+
+    def frame(self, columns):
+        """DataFrame con solo las columnas pedidas."""
+        return pd.DataFrame({column: self.column(column) for column in columns})
+
+    def valid_bitmap(self, column):
+        """Bitmap de validez empaquetado (uint8) de una columna o dimensión."""
+        section = 'dimensions' if column in self.manifest['dimensions'] else 'columns'
+        return self._load(column, '.valid', section)
+
+    def dictionary(self, dimension):
+        """Valores distintos de la dimensión; el código i corresponde al valor i."""
+        if dimension not in self.manifest['dimensions']:
+            raise KeyError(f'Dimensión sin índice: {dimension!r} (disponibles: {self.dimensions})')
+        return self.manifest['dimensions'][dimension]['diccionario']
+
+    def codes(self, dimension):
+        """Códigos int16 por fila (-1 sin valor)."""
+        return self._load(dimension, '.codes', 'dimensions')
+
+    def bitmap(self, dimension, values):
+        """OR de los bitmaps de `values` (empaquetado); valores ausentes no aportan filas."""
+        dictionary = self.dictionary(dimension)
+        positions = {value: code for code, value in enumerate(dictionary)}
+        wanted = [positions[v] for v in values if v in positions]
+        bitmaps = self._load(dimension, '.bitmaps', 'dimensions')
+        if not wanted:
+            return np.zeros(bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(bitmaps[wanted], axis=0)
+
+    def decode(self, dimension, rows=None):
+        """Valores de la dimensión (objeto, NaN sin valor) para `rows` o todas las filas."""
+        codes = self.codes(dimension)
+        codes = codes[rows] if rows is not None else np.asarray(codes)
+        table = np.array(self.dictionary(dimension) + [np.nan], dtype=object)
+        return table[codes]
+
+    def group_means(self, by, columns):
+        """
+        Promedio de cada columna por valor de `by` (solo filas válidas), con un
+        bincount por columna sobre los arreglos mapeados.
+        """
+        key_valid = self.valid(by)
+        keys, codes = np.unique(self.values(by)[key_valid], return_inverse=True)
+        result = {}
+        for column in columns:
+            ok = self.valid(column)[key_valid]
+            values = self.values(column)[key_valid]
+            sums = np.bincount(codes[ok], weights=values[ok], minlength=len(keys))
+            counts = np.bincount(codes[ok], minlength=len(keys))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[column] = sums / counts
+        return pd.DataFrame(result, index=pd.Index(keys, name=by))
+
+
+def open_store(csv_path, store_dir=STORE_DIR, columns=HOT_COLUMNS, dimensions=DIMENSION_COLUMNS):
+    """Abre el almacén de `csv_path`, reconstruyéndolo si está desactualizado."""
+    if not _is_fresh(_read_manifest(store_dir), csv_path, columns, dimensions):
+        build_store(csv_path, store_dir, columns, dimensions)
+    return ColumnStore(store_dir)
@@ -0,0 +1,236 @@
+"""
+density_cache.py
+================
+Motor de densidades precalculadas para los paneles de distribución:
+KDE binned por FFT, histogramas y estadísticas de boxplot por
+(columna, grupo). Cada resultado se guarda en caché (memoria y disco) con
+una clave derivada del contenido de los datos, así que solo se recalcula
+cuando los datos cambian.
+
+Uso:
+    from density_cache import kde_by, plot_kde
+    curves = kde_by(df, 'SR Change', by='Result')   # grupo -> curva
+    plot_kde(ax, curves['Win'], color='#4CAF50', label='Win')
+
+Las funciones de dibujo reciben curvas ya calculadas: el costo de dibujar
+depende del tamaño de la rejilla, no del número de partidas.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from memo_cache import atomic_write, evict, touch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '..', '.density_cache')
+# Se incrementa cuando cambia el algoritmo (invalida la caché en disco)
+CACHE_VERSION = 1
+DISK_BUDGET = 64 * 1024 ** 2      # bytes en .density_cache/ (LRU)
+GRID_SIZE = 256
+
+_memory = {}
+
+
+# =============================================================================
+# CACHÉ
+# =============================================================================
+
+def _key(kind, values, params):
+    sha = hashlib.sha1(f'{CACHE_VERSION}|{kind}|{sorted(params.items())!r}'.encode())
+    sha.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    return sha.hexdigest()
+
+
+def _cached(kind, values, params, compute, cache_dir=CACHE_DIR):
+    key = _key(kind, values, params)
+    if key in _memory:
+        return _memory[key]
+    path = os.path.join(cache_dir, f'{kind}-{key}.npz')
+    result = None
+    if os.path.exists(path):
+        try:
+            with np.load(path) as stored:
+                result = {name: stored[name] for name in stored.files}
+            touch(path)
+        except (OSError, ValueError):
+            result = None
+    if result is None:
+        result = compute(values, **params)
+        if result is not None:
+            atomic_write(path, lambda fh: np.savez(fh, **result))
+            evict(cache_dir, DISK_BUDGET, suffixes=('.npz',))
+    _memory[key] = result
+    return result
+
+
+def _clean(values):
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    return values[np.isfinite(values)]
+
+
+# =============================================================================
+# CÁLCULO
+# =============================================================================
+
+def _compute_kde(values, cut=3.0, gridsize=GRID_SIZE, bw_adjust=1.0):
+    n = len(values)
+    if n < 2 or values.std() == 0:
+        return None
+    # Ancho de banda de Scott, igual que gaussian_kde / seaborn
+    bw = values.std(ddof=1) * n ** (-1 / 5) * bw_adjust
+    lo, hi = values.min() - cut * bw, values.max() + cut * bw
+    grid = np.linspace(lo, hi, gridsize)
+    delta = grid[1] - grid[0]
+
+    # Binning lineal: cada valor reparte su peso entre los dos nodos vecinos
+    pos = (values - lo) / delta
+    left = np.clip(np.floor(pos).astype(np.int64), 0, gridsize - 2)
+    frac = pos - left
+    counts = (np.bincount(left, weights=1 - frac, minlength=gridsize)
+              + np.bincount(left + 1, weights=frac, minlength=gridsize))
+
+    # Convolución con el kernel gaussiano vía FFT (lineal, sin efecto circular)
+    half = int(min(np.ceil(4 * bw / delta), gridsize - 1))
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) * delta / bw) ** 2)
+    size = 1 << int(np.ceil(np.log2(gridsize + 2 * half + 1)))
+    smooth = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    density = np.maximum(smooth[half:half + gridsize], 0) / (n * bw * np.sqrt(2 * np.pi))
+    return {'x': grid, 'y': density, 'n': np.int64(n)}
+
+
+def _compute_histogram(values, bins=20, value_range=None):
+    counts, edges = np.histogram(values, bins=np.asarray(bins) if np.ndim(bins) else bins,
+                                 range=value_range)
+    return {'edges': edges, 'counts': counts, 'n': np.int64(len(values))}
+
+
+def _compute_box(values, whis=1.5):
+    if not len(values):
+        return None
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    return {
+        'med': med, 'q1': q1, 'q3': q3, 'mean': values.mean(),
+        'whislo': inside.min(), 'whishi': inside.max(),
+        'fliers': np.unique(values[(values < inside.min()) | (values > inside.max())]),
+        'n': np.int64(len(values)),
+    }
+
+
+def kde(values, cut=3.0, gridsize=GRID_SIZE, bw_adjust=1.0):
+    """Curva KDE {'x', 'y', 'n'} (None si hay menos de 2 valores distintos)."""
+    params = {'cut': float(cut), 'gridsize': int(gridsize), 'bw_adjust': float(bw_adjust)}
+    return _cached('kde', _clean(values), params, _compute_kde)
+
+
+def histogram(values, bins=20, value_range=None):
+    """
+    Histograma {'edges', 'counts', 'n'}; `bins` puede ser un número o
+    bordes y `value_range` es el (mín, máx) de np.histogram.
+    """
+    bins = tuple(np.asarray(bins, dtype=float)) if np.ndim(bins) else int(bins)
+    value_range = None if value_range is None else tuple(float(v) for v in value_range)
+    params = {'bins': bins, 'value_range': value_range}
+    return _cached('hist', _clean(values), params, _compute_histogram)
+
+
+def box_stats(values, whis=1.5):
+    """Estadísticas de boxplot compatibles con `Axes.bxp`."""
+    return _cached('box', _clean(values), {'whis': float(whis)}, _compute_box)
+
+
+def _groups(df, column, by, order):
+    if by is None:
+        return {None: df[column]}
+    grouped = dict(tuple(df.groupby(by, sort=True)[column]))
+    keys = order if order is not None else list(grouped)
+    return {key: grouped[key] for key in keys if key in grouped}
+
+
+def kde_by(df, column, by=None, order=None, **params):
+    """Diccionario grupo -> curva KDE de `column`."""
+    return {key: kde(values, **params) for key, values in _groups(df, column, by, order).items()}
+
+
+def histogram_by(df, column, by=None, order=None, bins=20):
+    """Histogramas por grupo con bordes comunes (calculados sobre toda la columna)."""
+    edges = histogram(df[column], bins=bins)['edges']
+    return {key: histogram(values, bins=edges)
+            for key, values in _groups(df, column, by, order).items()}
+
+
+def box_stats_by(df, column, by=None, order=None, whis=1.5):
+    """Diccionario grupo -> estadísticas de boxplot de `column`."""
+    return {key: box_stats(values, whis=whis)
+            for key, values in _groups(df, column, by, order).items()}
+
+
+# =============================================================================
+# DIBUJO A PARTIR DE CURVAS PRECALCULADAS
+# =============================================================================
+
+def plot_kde(ax, curve, color, label=None, fill=True, alpha=0.4, scale=1.0, linewidth=1.5):
+    """Dibuja una curva KDE; `scale` permite expresarla en conteos."""
+    if curve is None:
+        return
+    y = curve['y'] * scale
+    ax.plot(curve['x'], y, color=color, label=label, linewidth=linewidth)
+    if fill:
+        ax.fill_between(curve['x'], y, color=color, alpha=alpha, linewidth=0)
+
+
+def plot_histogram(ax, hist, color, label=None, alpha=0.6, curve=None):
+    """Histograma con bordes y conteos precalculados; opcionalmente su KDE en conteos."""
+    ax.stairs(hist['counts'], hist['edges'], fill=True, color=color, alpha=alpha, label=label)
+    ax.stairs(hist['counts'], hist['edges'], color=color, linewidth=0.8)
+    if curve is not None:
+        width = np.diff(hist['edges']).mean()
+        plot_kde(ax, curve, color, fill=False, scale=hist['n'] * width)
+
+
+def plot_violins(ax, curves, colors, boxes=None, width=0.8):
+    """
+    Violines verticales (uno por curva, en el orden de `curves`) con el mismo
+    área, como `density_norm='area'` de seaborn; `boxes` añade la caja interna.
+    """
+    keys = list(curves)
+    peak = max((c['y'].max() for c in curves.values() if c is not None), default=1.0)
+    for pos, key in enumerate(keys):
+        curve = curves[key]
+        if curve is None:
+            continue
+        half = curve['y'] / peak * width / 2
+        ax.fill_betweenx(curve['x'], pos - half, pos + half, facecolor=colors.get(key, '#999'),
+                         edgecolor='#424242', linewidth=1)
+        if boxes is not None and boxes.get(key) is not None:
+            box = boxes[key]
+            ax.vlines(pos, box['whislo'], box['whishi'], color='#424242', linewidth=1.5)
+            ax.vlines(pos, box['q1'], box['q3'], color='#424242', linewidth=5)
+            ax.scatter([pos], [box['med']], color='white', s=12, zorder=3)
+    ax.set_xticks(range(len(keys)))
+    ax.set_xticklabels(keys)
+
+
+def plot_boxes(ax, stats, colors=None, positions=None, width=0.6, labels=None):
+    """
+    Boxplot con estadísticas precalculadas: una caja por elemento de
+    `stats` con datos. `positions` y `labels`, si se pasan, van alineados
+    con `stats` y se descartan junto con los grupos sin datos (None).
+    """
+    kept = [i for i, key in enumerate(stats) if stats[key] is not None]
+    keys = [list(stats)[i] for i in kept]
+    positions = list(range(len(keys))) if positions is None else [positions[i] for i in kept]
+    boxes = ax.bxp([dict(stats[key], label=str(key)) for key in keys], positions=positions,
+                   widths=width, patch_artist=True, showfliers=True,
+                   medianprops={'color': '#424242'})
+    colors = colors or {}
+    for patch, key in zip(boxes['boxes'], keys):
+        patch.set_facecolor(colors.get(key, '#90CAF9'))
+    if labels is not None:
+        ax.set_xticks(positions)
+        ax.set_xticklabels([labels[i] for i in kept])
+    return boxes
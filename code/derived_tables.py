@@ -0,0 +1,99 @@
+"""
+derived_tables.py
+=================
+Tablas derivadas que varios scripts recalculaban por separado
+(estadísticas por temporada, mapa, rol y modo). Es la única
+implementación en pandas de estas agregaciones: los scripts la usan
+directamente y sql_backend.py se verifica contra ella. Cada una está
+memoizada con memo_cache.py: la primera llamada sobre un dataset la
+calcula y las siguientes, en el mismo script o en otro, la leen de la caché.
+
+Uso:
+    from derived_tables import map_stats, role_stats
+    map_stats(df)       # mismo DataFrame que 01_pandas_analysis.py
+
+Al cambiar el cálculo de una tabla se sube su `version` para invalidar
+las entradas guardadas.
+"""
+
+from memo_cache import memoize
+
+MEDAL_COLUMNS = ['Gold medals', 'Silver medals', 'Bronze medals']
+PERFORMANCE = ['Elim', 'Death', 'Heal', 'Dmg']
+
+
+def _wins(results):
+    return (results == 'Win').sum()
+
+
+def _by_result(df, key, extra):
+    # Partidas, victorias y winrate por `key` más las medias de `extra`
+    return df[df[key].notna()].groupby(key).agg({
+        'Result': [len, _wins, lambda x: _wins(x) / len(x) * 100],
+        **extra,
+    }).round(2)
+
+
+@memoize(version=1, columns=['season', 'Game #', 'Result', 'SR Change'] + PERFORMANCE)
+def season_stats(df):
+    """Partidas, victorias, SR y promedios de rendimiento por temporada."""
+    stats = df.groupby('season').agg({
+        'Game #': 'max',
+        'Result': _wins,
+        'SR Change': ['mean', 'sum'],
+        'Elim': 'mean',
+        'Death': 'mean',
+        'Heal': 'mean',
+        'Dmg': 'mean',
+    }).round(2)
+    stats.columns = ['Partidas', 'Victorias', 'SR_Promedio', 'SR_Total',
+                     'Elim_Promedio', 'Muertes_Promedio', 'Heal_Promedio', 'Dmg_Promedio']
+    stats['Winrate %'] = (stats['Victorias'] / stats['Partidas'] * 100).round(1)
+    return stats
+
+
+@memoize(version=2, columns=['Map', 'Result', 'SR Change'])
+def map_stats(df):
+    """
+    Partidas, victorias, winrate y SR promedio por mapa, por winrate
+    descendente y a igual winrate por nombre (el ORDER BY de sql_backend).
+    """
+    stats = _by_result(df, 'Map', {'SR Change': 'mean'})
+    stats.columns = ['Partidas', 'Victorias', 'Winrate %', 'SR_Promedio']
+    return stats.sort_values(['Winrate %', 'Map'], ascending=[False, True], kind='stable')
+
+
+@memoize(version=1, columns=['Role 1', 'Result'] + PERFORMANCE)
+def role_stats(df):
+    """Partidas, victorias, winrate y promedios de rendimiento por rol."""
+    stats = _by_result(df, 'Role 1', {'Elim': 'mean', 'Death': 'mean', 'Heal': 'mean', 'Dmg': 'mean'})
+    stats.columns = ['Partidas', 'Victorias', 'Winrate %', 'Elim', 'Muertes', 'Heal', 'Dmg']
+    return stats
+
+
+@memoize(version=1, columns=['Mode', 'Result', 'SR Change'])
+def mode_stats(df):
+    """Partidas, victorias, winrate y SR promedio por modo de juego."""
+    stats = _by_result(df, 'Mode', {'SR Change': 'mean'})
+    stats.columns = ['Partidas', 'Victorias', 'Winrate %', 'SR_Promedio']
+    return stats
+
+
+@memoize(version=1, columns=['Map', 'Result', 'SR Change', 'Elim'])
+def map_summary(df):
+    """Tabla por mapa de 05_map_visualization.py (con Elim promedio, columna 'Map')."""
+    stats = _by_result(df, 'Map', {'SR Change': 'mean', 'Elim': 'mean'})
+    stats = stats.drop(columns=stats.columns[1])
+    stats.columns = ['Partidas', 'Winrate', 'SR_Change', 'Elim_Avg']
+    return stats.reset_index()
+
+
+@memoize(version=1, columns=['season', 'Result', 'Elim', 'Death'] + MEDAL_COLUMNS)
+def season_summary(df):
+    """Partidas, winrate, medallas y Elim/Death promedio por temporada (06)."""
+    return df.groupby('season').agg(
+        Partidas=('Result', 'size'),
+        Winrate=('Result', lambda x: (x == 'Win').mean() * 100),
+        **{medal: (medal, 'mean') for medal in MEDAL_COLUMNS},
+        Elim=('Elim', 'mean'), Death=('Death', 'mean'),
+    )
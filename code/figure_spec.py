@@ -0,0 +1,384 @@
+"""
+figure_spec.py
+==============
+Especificación declarativa de gráficas: una consulta de agregación, una
+marca y sus codificaciones. La misma especificación se compila a
+Matplotlib (para exportar PNG) y a Vega-Lite (JSON que index.html dibuja
+en el navegador, enviando solo los datos agregados).
+
+Uso:
+    from figure_spec import query, render, export_specs
+    spec = {
+        'id': 'winrate_modo',
+        'title': 'Winrate por Modo de Juego',
+        'data': query(df, groupby='Mode', measures={'Winrate': ('Result', 'winrate')}),
+        'mark': 'bar',
+        'encoding': {'x': {'field': 'Mode'},
+                     'y': {'field': 'Winrate', 'title': 'Winrate (%)'}},
+        'rules': [{'y': 50, 'dash': True}],
+    }
+    render(spec, ax)                       # Matplotlib
+    export_specs([spec])                   # data/figures.json para index.html
+
+Marcas soportadas: 'bar' (simple, apilada con `color.field` o agrupada con
+`xOffset`), 'line', 'point', 'arc' (pie) y 'rect' (heatmap). Las
+codificaciones siguen la sintaxis de Vega-Lite; `color.range` da la paleta
+y un campo de color sin escala (`'scale': None`) se usa tal cual. Además,
+`rules` añade líneas de referencia y `text` etiqueta el valor de cada barra.
+
+`query` está memoizada (memo_cache.py): la misma agregación sobre el mismo
+dataset se calcula una sola vez entre scripts y ejecuciones.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from memo_cache import memoize
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# index.html lee este archivo para dibujar las versiones interactivas
+SPECS_PATH = os.path.join(BASE_DIR, '..', 'data', 'figures.json')
+VEGA_SCHEMA = 'https://vega.github.io/schema/vega-lite/v5.json'
+TITLE_STYLE = {'fontsize': 11, 'fontweight': 'bold', 'pad': 10}
+LABEL_STYLE = {'fontsize': 10, 'fontweight': 'bold'}
+
+# Esquemas de color de Vega-Lite y su colormap equivalente en Matplotlib
+COLOR_SCHEMES = {
+    'redblue': 'RdBu',
+    'yelloworangered': 'YlOrRd',
+    'viridis': 'viridis',
+    'blues': 'Blues',
+}
+
+# Medidas disponibles en `query`: nombre -> función sobre la Serie agrupada
+MEASURES = {
+    'count': 'size',
+    'mean': 'mean',
+    'sum': 'sum',
+    'median': 'median',
+    'winrate': lambda s: (s == 'Win').mean() * 100,
+}
+
+
+# =============================================================================
+# CONSULTA
+# =============================================================================
+
+@memoize(version=1)
+def query(df, groupby=None, measures=None, where=None, dropna=None, sort=None,
+          ascending=True, round_to=2):
+    """
+    Agregación declarativa: filtra (`where`: columna -> valor o lista),
+    descarta nulos (`dropna`), agrupa y calcula `measures`
+    (nombre -> (columna, medida)). Devuelve un DataFrame plano.
+    """
+    data = df
+    for column, value in (where or {}).items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        data = data[data[column].isin(values)]
+    if dropna:
+        data = data.dropna(subset=dropna)
+    if groupby is None:
+        result = data.copy()
+    else:
+        grouped = data.groupby(groupby, sort=True)
+        result = pd.DataFrame({
+            name: (grouped.size() if MEASURES[measure] == 'size'
+                   else grouped[column].agg(MEASURES[measure]))
+            for name, (column, measure) in (measures or {}).items()
+        }).reset_index()
+    if sort is not None:
+        result = result.sort_values(sort, ascending=ascending, kind='stable')
+    if round_to is not None:
+        result = result.round(round_to)
+    return result.reset_index(drop=True)
+
+
+# =============================================================================
+# MATPLOTLIB
+# =============================================================================
+
+def _field(spec, channel):
+    return spec['encoding'].get(channel, {}).get('field')
+
+
+def _categories(data, field, encoding):
+    sort = encoding.get('sort', 'ascending')
+    if isinstance(sort, list):
+        return sort
+    values = list(pd.unique(data[field]))
+    return values if sort is None else sorted(values)
+
+
+def _colors(spec, data, n):
+    """Colores por fila: constante, campo sin escala o paleta `range` por dominio."""
+    color = spec['encoding'].get('color', {})
+    if 'value' in color:
+        return [color['value']] * n
+    field = color.get('field')
+    if field and color.get('scale', {}) is None:
+        return list(data[field])
+    palette = color.get('range') or plt.rcParams['axes.prop_cycle'].by_key()['color']
+    if field:
+        domain = color.get('domain') or list(pd.unique(spec['data'][field]))
+        return [palette[domain.index(v) % len(palette)] for v in data[field]]
+    return [palette[0]] * n
+
+
+def _series_palette(color, keys):
+    palette = color.get('range') or plt.rcParams['axes.prop_cycle'].by_key()['color']
+    return {key: palette[i % len(palette)] for i, key in enumerate(keys)}
+
+
+def _horizontal(enc):
+    # Barras horizontales cuando la cantidad va en x
+    return enc['x'].get('type') == 'quantitative'
+
+
+def _render_bar(spec, ax):
+    enc = spec['encoding']
+    data = spec['data']
+    horizontal = _horizontal(enc)
+    cat_channel, val_channel = ('y', 'x') if horizontal else ('x', 'y')
+    cat_field, val_field = enc[cat_channel]['field'], enc[val_channel]['field']
+    bar = ax.barh if horizontal else ax.bar
+    categories = _categories(data, cat_field, enc[cat_channel])
+    pos = np.arange(len(categories))
+    color = enc.get('color', {})
+    series_field = color.get('field') if color.get('scale', {}) is not None else None
+    if series_field == cat_field:
+        series_field = None
+    offset_field = _field(spec, 'xOffset')
+
+    if series_field or offset_field:
+        # Varias series: apiladas (solo color) o agrupadas (xOffset)
+        key_field = offset_field or series_field
+        table = data.pivot_table(index=cat_field, columns=key_field, values=val_field,
+                                 aggfunc='sum', sort=False).reindex(categories)
+        keys = color.get('domain') or list(table.columns)
+        palette = _series_palette(color, keys)
+        width = 0.8 / len(keys) if offset_field else 0.6
+        base = np.zeros(len(categories))
+        bars = []
+        for i, key in enumerate(keys):
+            values = table[key].fillna(0).to_numpy()
+            shift = (i - (len(keys) - 1) / 2) * width if offset_field else 0
+            extra = {} if offset_field else ({'left': base} if horizontal else {'bottom': base})
+            bars.extend(bar(pos + shift, values, width, label=key, color=palette[key],
+                            edgecolor='white', **extra))
+            if not offset_field:
+                base = base + values
+        ax.legend(loc='upper right', fontsize=8, framealpha=0.9)
+        if not offset_field:
+            bars = []   # en barras apiladas las etiquetas de valor no aplican
+    else:
+        ordered = data.set_index(cat_field).reindex(categories).reset_index()
+        bars = bar(pos, ordered[val_field].to_numpy(), 0.7,
+                   color=_colors(spec, ordered, len(ordered)), edgecolor='white', linewidth=0.5)
+
+    (ax.set_yticks if horizontal else ax.set_xticks)(pos)
+    (ax.set_yticklabels if horizontal else ax.set_xticklabels)(categories, fontsize=9)
+
+    text = spec.get('text')
+    if text:
+        fmt = text.get('format', '{:.1f}')
+        for rect in bars:
+            if horizontal:
+                value = rect.get_width()
+                ax.text(value + text.get('dx', 1), rect.get_y() + rect.get_height() / 2,
+                        fmt.format(value), va='center', fontsize=8, fontweight='bold')
+            else:
+                value = rect.get_height()
+                ax.text(rect.get_x() + rect.get_width() / 2, value + text.get('dy', 0),
+                        fmt.format(value), ha='center', va='bottom', fontsize=8, fontweight='bold')
+
+
+def _render_line(spec, ax):
+    enc, data = spec['encoding'], spec['data']
+    series = _field(spec, 'color')
+    groups = list(data.groupby(series, sort=False)) if series else [(None, data)]
+    palette = _series_palette(enc.get('color', {}), [key for key, _ in groups])
+    for key, group in groups:
+        ax.plot(group[enc['x']['field']], group[enc['y']['field']],
+                color=palette[key], linewidth=2, alpha=0.8, label=key)
+    if series:
+        ax.legend(loc='best', fontsize=8, framealpha=0.9)
+
+
+def _render_point(spec, ax):
+    enc, data = spec['encoding'], spec['data']
+    size = enc.get('size', {})
+    sizes = data[size['field']] * size.get('scale', 1) + size.get('offset', 0) if 'field' in size else 50
+    ax.scatter(data[enc['x']['field']], data[enc['y']['field']], s=sizes,
+               c=_colors(spec, data, len(data)), alpha=enc.get('opacity', {}).get('value', 0.6),
+               edgecolors='white', linewidth=0.5)
+
+
+def _render_arc(spec, ax):
+    enc, data = spec['encoding'], spec['data']
+    labels = data[enc['color']['field']]
+    ax.pie(data[enc['theta']['field']], labels=labels, colors=_colors(spec, data, len(data)),
+           autopct='%1.1f%%', startangle=90, explode=[0.02] * len(data))
+
+
+def _render_rect(spec, ax):
+    enc, data = spec['encoding'], spec['data']
+    table = data.pivot(index=enc['y']['field'], columns=enc['x']['field'],
+                       values=enc['color']['field'])
+    table = table.reindex(index=_categories(data, enc['y']['field'], enc['y']),
+                          columns=_categories(data, enc['x']['field'], enc['x']))
+    domain = enc['color'].get('domain', [None, None])
+    cmap = COLOR_SCHEMES[enc['color'].get('scheme', 'redblue')]
+    im = ax.imshow(table.to_numpy(dtype=float), cmap=cmap + ('_r' if enc['color'].get('reverse') else ''),
+                   aspect='auto', vmin=domain[0], vmax=domain[1])
+    ax.set_xticks(np.arange(table.shape[1]))
+    ax.set_yticks(np.arange(table.shape[0]))
+    ax.set_xticklabels(table.columns, rotation=45, ha='right', fontsize=10)
+    ax.set_yticklabels(table.index, fontsize=10)
+    for (i, j), value in np.ndenumerate(table.to_numpy(dtype=float)):
+        ax.text(j, i, f'{value:.2f}', ha='center', va='center', fontsize=9, fontweight='bold',
+                color='black' if abs(value) < 0.5 else 'white')
+    cbar = ax.figure.colorbar(im, ax=ax, shrink=0.8)
+    cbar.set_label(enc['color'].get('title', ''), fontsize=11, fontweight='bold')
+
+
+RENDERERS = {
+    'bar': _render_bar,
+    'line': _render_line,
+    'point': _render_point,
+    'arc': _render_arc,
+    'rect': _render_rect,
+}
+
+
+def render(spec, ax):
+    """Dibuja `spec` en el eje `ax` de Matplotlib."""
+    mark = spec['mark']
+    if mark not in RENDERERS:
+        raise ValueError(f'Marca no soportada: {mark!r} (opciones: {sorted(RENDERERS)})')
+    RENDERERS[mark](spec, ax)
+    enc = spec.get('encoding', {})
+    if mark not in ('arc', 'rect'):
+        for channel, setter in (('x', ax.set_xlabel), ('y', ax.set_ylabel)):
+            title = enc.get(channel, {}).get('title')
+            if title:
+                setter(title, **LABEL_STYLE)
+        for channel, setter in (('x', ax.set_xlim), ('y', ax.set_ylim)):
+            domain = (enc.get(channel, {}).get('scale') or {}).get('domain')
+            if domain:
+                setter(*domain)
+    for rule in spec.get('rules', []):
+        style = dict(color=rule.get('color', 'gray'), linestyle='--' if rule.get('dash') else '-',
+                     linewidth=rule.get('width', 1), alpha=0.7)
+        (ax.axhline(y=rule['y'], **style) if 'y' in rule else ax.axvline(x=rule['x'], **style))
+    rotation = spec.get('label_angle')
+    if rotation:
+        ax.tick_params(axis='x', rotation=rotation)
+    if spec.get('title'):
+        ax.set_title(spec['title'], **TITLE_STYLE)
+    return ax
+
+
+# =============================================================================
+# VEGA-LITE
+# =============================================================================
+
+def _vega_encoding(spec):
+    encoding = {}
+    for channel, enc in spec['encoding'].items():
+        out = {key: value for key, value in enc.items()
+               if key in ('field', 'type', 'title', 'sort', 'value', 'aggregate')}
+        if 'field' in enc:
+            out.setdefault('type', 'quantitative' if pd.api.types.is_numeric_dtype(
+                spec['data'][enc['field']]) and channel not in ('color', 'xOffset') else 'nominal')
+        if 'scale' in enc:
+            out['scale'] = enc['scale']
+        if channel == 'color' and 'range' in enc:
+            domain = enc.get('domain') or list(pd.unique(spec['data'][enc['field']]))
+            out['scale'] = {'domain': [_native(v) for v in domain], 'range': enc['range']}
+        if channel == 'color' and 'scheme' in enc:
+            out['scale'] = {'scheme': enc['scheme'], 'reverse': enc.get('reverse', False),
+                            **({'domain': enc['domain']} if 'domain' in enc else {})}
+        if channel == 'size' and 'field' in enc:
+            out.pop('scale', None)
+        encoding[channel] = out
+    if spec.get('label_angle') and 'x' in encoding:
+        encoding['x']['axis'] = {'labelAngle': -spec['label_angle']}
+    if spec['mark'] == 'bar' and 'xOffset' not in encoding:
+        # Mismo orden de categorías que en Matplotlib (barh dibuja la primera abajo)
+        enc = spec['encoding']
+        horizontal = _horizontal(enc)
+        cat = 'y' if horizontal else 'x'
+        order = [_native(v) for v in _categories(spec['data'], enc[cat]['field'], enc[cat])]
+        encoding[cat]['sort'] = order[::-1] if horizontal else order
+    return encoding
+
+
+def _native(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _records(data):
+    # NaN -> null; tipos numpy -> tipos nativos de JSON
+    return json.loads(data.to_json(orient='records'))
+
+
+def to_vega_lite(spec):
+    """Especificación Vega-Lite con los datos agregados embebidos."""
+    mark = {'type': spec['mark'], 'tooltip': True}
+    if spec['mark'] == 'point':
+        mark.update(filled=True, opacity=spec['encoding'].get('opacity', {}).get('value', 0.6))
+    base = {'mark': mark, 'encoding': _vega_encoding(spec)}
+    layers = [base]
+    for rule in spec.get('rules', []):
+        axis = 'y' if 'y' in rule else 'x'
+        layers.append({
+            'mark': {'type': 'rule', 'color': rule.get('color', 'gray'),
+                     'strokeDash': [4, 4] if rule.get('dash') else []},
+            'encoding': {axis: {'datum': rule[axis]}},
+        })
+    text = spec.get('text')
+    if text and spec['mark'] == 'bar':
+        value = 'x' if base['encoding']['x'].get('type') == 'quantitative' else 'y'
+        layers.append({
+            'mark': {'type': 'text', 'align': 'left' if value == 'x' else 'center',
+                     'baseline': 'middle' if value == 'x' else 'bottom', 'dx': 3 if value == 'x' else 0},
+            'encoding': {**{k: v for k, v in base['encoding'].items() if k in ('x', 'y')},
+                         'text': {'field': base['encoding'][value]['field'], 'format': '.1f'}},
+        })
+    out = {'$schema': VEGA_SCHEMA, 'title': spec.get('title', ''), 'width': 'container',
+           'data': {'values': _records(spec['data'])}}
+    if len(layers) == 1:
+        out.update(base)
+    else:
+        out['layer'] = layers
+    return out
+
+
+def export_specs(specs, path=SPECS_PATH):
+    """
+    Añade (o reemplaza) las especificaciones en `path` como {id: Vega-Lite}.
+
+    Cada script exporta solo sus figuras; las de otros scripts se conservan.
+    La escritura es atómica para que el navegador nunca lea un JSON a medias.
+    """
+    payload = {}
+    if os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as fh:
+                payload = json.load(fh)
+        except (OSError, ValueError):
+            payload = {}
+    payload.update({spec['id']: to_vega_lite(spec) for spec in specs})
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return payload
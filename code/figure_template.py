@@ -0,0 +1,123 @@
+"""
+figure_template.py
+==================
+Modo de renderizado por lotes para variantes de un mismo diseño (por
+temporada, por jugador...): la figura, la rejilla, los ejes, los estilos y
+los artistas se construyen una sola vez, y cada variante solo actualiza
+los datos de esos artistas (`set_data`, `set_offsets`, `set_height`...)
+antes de volver a dibujar el mismo lienzo.
+
+Uso:
+    from figure_template import FigureTemplate, update_bars, update_line
+
+    def build(fig):                      # una vez: ejes, estilos, artistas
+        ax = fig.add_subplot()
+        line, = ax.plot([], [])
+        return {'ax': ax, 'line': line}
+
+    def update(artists, data):           # por variante: solo datos
+        update_line(artists['line'], data.game, data.sr)
+
+    with FigureTemplate(build, update, figsize=(8, 5)) as template:
+        for season, trajectory in trajectories.items():
+            template.render(trajectory, f'images/sr_S{season}.png', dpi=150)
+
+Cada `render` pasa por savefig_async (figure_writer.py): la figura se
+rasteriza en el hilo principal y la compresión PNG va en segundo plano,
+así que el lienzo puede actualizarse para la siguiente variante enseguida.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from figure_writer import savefig_async
+
+
+class FigureTemplate:
+    """
+    Figura plantilla: `build(fig)` crea ejes y artistas y devuelve un
+    diccionario con ellos; `update(artists, data)` aplica los datos de una
+    variante. La figura se reutiliza hasta `close()`.
+    """
+
+    def __init__(self, build, update, **figure_kwargs):
+        self.fig = plt.figure(**figure_kwargs)
+        self.artists = build(self.fig)
+        self._update = update
+        self.rendered = 0
+
+    def render(self, data, path, **savefig_kwargs):
+        """Actualiza los artistas con `data` y guarda la variante en `path`."""
+        self._update(self.artists, data)
+        savefig_async(self.fig, path, **savefig_kwargs)
+        self.rendered += 1
+        return path
+
+    def render_all(self, variants, **savefig_kwargs):
+        """Renderiza pares (datos, ruta) en orden; devuelve las rutas."""
+        return [self.render(data, path, **savefig_kwargs) for data, path in variants]
+
+    def close(self):
+        plt.close(self.fig)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# ACTUALIZACIÓN DE ARTISTAS
+# =============================================================================
+
+def rescale(ax, x=True, y=True, margin=None):
+    """Recalcula los límites de datos del eje tras cambiar sus artistas."""
+    ax.relim()
+    if margin is not None:
+        ax.margins(margin)
+    ax.autoscale_view(scalex=x, scaley=y)
+
+
+def update_line(line, x, y):
+    line.set_data(np.asarray(x), np.asarray(y))
+
+
+def update_scatter(collection, x, y, colors=None, sizes=None):
+    """Nuevas posiciones (y opcionalmente colores y tamaños) de un scatter."""
+    collection.set_offsets(np.column_stack([np.asarray(x, dtype=float),
+                                            np.asarray(y, dtype=float)]))
+    if colors is not None:
+        collection.set_facecolors(colors)
+    if sizes is not None:
+        collection.set_sizes(np.asarray(sizes, dtype=float))
+
+
+def update_bars(bars, values, labels=None, fmt='{:.1f}', horizontal=False):
+    """
+    Nuevos valores de un BarContainer (NaN dibuja la barra vacía). Con
+    `labels` (textos creados en `build`, uno por barra) también se mueven y
+    actualizan las etiquetas de valor; un cero se rotula y un NaN no.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    values = np.nan_to_num(values)
+    for index, (bar, value) in enumerate(zip(bars, values)):
+        if horizontal:
+            bar.set_width(value)
+        else:
+            bar.set_height(value)
+        if labels is not None:
+            label = labels[index]
+            label.set_text('' if missing[index] else fmt.format(value))
+            if horizontal:
+                label.set_position((value, bar.get_y() + bar.get_height() / 2))
+            else:
+                label.set_position((bar.get_x() + bar.get_width() / 2, value))
+
+
+def bar_labels(ax, bars, horizontal=False, **text_kwargs):
+    """Un texto vacío por barra, para actualizarlo luego con `update_bars`."""
+    text_kwargs.setdefault('ha', 'left' if horizontal else 'center')
+    text_kwargs.setdefault('va', 'center' if horizontal else 'bottom')
+    return [ax.text(0, 0, '', **text_kwargs) for _ in bars]
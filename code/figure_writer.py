@@ -0,0 +1,139 @@
+"""
+figure_writer.py
+================
+Escritura asíncrona de figuras: rasteriza en el hilo principal y delega
+la compresión PNG y la escritura a disco a hilos en segundo plano.
+
+Uso:
+    from figure_writer import savefig_async
+    savefig_async(fig, 'images/01_dashboard_principal.png', dpi=150,
+                  bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+
+La cola es acotada: si los hilos escritores van atrasados, `savefig_async`
+se bloquea hasta que haya espacio (backpressure), lo que limita la memoria
+ocupada por buffers pendientes. Al salir del intérprete se vacía la cola.
+"""
+
+import atexit
+import io
+import os
+import queue
+import threading
+
+import numpy as np
+from PIL import Image
+
+# Número de figuras rasterizadas que pueden esperar en memoria a la vez
+DEFAULT_QUEUE_SIZE = 4
+DEFAULT_WORKERS = 2
+
+
+class _RasterSink(io.RawIOBase):
+    """Destino de `savefig(format='raw')` que conserva el buffer RGBA."""
+
+    def __init__(self):
+        super().__init__()
+        self.pixels = None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        # Agg entrega un memoryview con forma (alto, ancho, 4)
+        self.pixels = np.array(data, dtype=np.uint8, copy=True)
+        return self.pixels.nbytes
+
+
+class FigureWriter:
+    """Cola acotada de figuras rasterizadas servida por hilos escritores."""
+
+    def __init__(self, max_pending=DEFAULT_QUEUE_SIZE, workers=DEFAULT_WORKERS):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors = []
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f'figure-writer-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def savefig(self, fig, path, dpi=150, **kwargs):
+        """Rasteriza `fig` y encola la escritura de `path` (PNG)."""
+        if self._closed:
+            raise RuntimeError('FigureWriter ya fue cerrado')
+        # El dibujo de Matplotlib no es thread-safe: se hace aquí
+        sink = _RasterSink()
+        fig.savefig(sink, format='raw', dpi=dpi, **kwargs)
+        # put() bloquea si la cola está llena
+        self._queue.put((sink.pixels, os.fspath(path), dpi))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                pixels, path, dpi = item
+                self._write_png(pixels, path, dpi)
+            except Exception as exc:
+                self._errors.append((item[1], exc))
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write_png(pixels, path, dpi):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Escritura atómica: nunca queda un PNG a medio escribir
+        tmp_path = f'{path}.tmp-{threading.get_ident()}'
+        Image.fromarray(pixels, 'RGBA').save(tmp_path, format='PNG', dpi=(dpi, dpi))
+        os.replace(tmp_path, path)
+
+    def flush(self):
+        """Espera a que todas las figuras encoladas estén en disco."""
+        self._queue.join()
+        if self._errors:
+            errors, self._errors = self._errors, []
+            failed = ', '.join(path for path, _ in errors)
+            raise RuntimeError(f'No se pudieron guardar: {failed}') from errors[0][1]
+
+    def close(self):
+        """Vacía la cola y detiene los hilos escritores."""
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_default_writer = None
+_default_lock = threading.Lock()
+
+
+def get_writer():
+    """Escritor compartido por el proceso; se vacía automáticamente al salir."""
+    global _default_writer
+    with _default_lock:
+        if _default_writer is None:
+            _default_writer = FigureWriter()
+            atexit.register(_default_writer.close)
+        return _default_writer
+
+
+def savefig_async(fig, path, dpi=150, **kwargs):
+    """Atajo de `get_writer().savefig(...)`."""
+    get_writer().savefig(fig, path, dpi=dpi, **kwargs)
@@ -0,0 +1,402 @@
+"""
+geo_analytics.py
+================
+Componente geoespacial compartido: carga (y guarda en caché) los polígonos
+de países de Natural Earth, construye un índice STRtree una sola vez y
+asigna puntos (mapas de Overwatch, héroes) a país/continente con un join
+espacial vectorizado. Incluye la agregación y el dibujo de coropletas por
+región (winrate y partidas jugadas).
+
+Uso:
+    from geo_analytics import assign_regions, region_stats
+    regiones = assign_regions(lng, lat)          # DataFrame country/continent/region
+
+El mapa base estático (países sin datos) se rasteriza una sola vez por
+(extensión, tamaño, DPI, estilo) con `basemap_raster` y se reutiliza como
+capa de imagen con `draw_basemap`.
+"""
+
+import hashlib
+import os
+import time
+import urllib.request
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import MultiPolygon, box
+from shapely.geometry.polygon import orient
+import matplotlib.pyplot as plt
+from matplotlib.collections import PatchCollection
+from matplotlib.patches import PathPatch
+from matplotlib.path import Path
+
+from memo_cache import atomic_write, evict, touch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '..', '.geo_cache')
+NATURAL_EARTH_URL = 'https://naciscdn.org/naturalearth/110m/cultural/ne_110m_admin_0_countries.zip'
+# Segundos de espera de la descarga; tras un fallo no se reintenta hasta
+# pasado DOWNLOAD_RETRY (se usa directamente el mapa simplificado)
+DOWNLOAD_TIMEOUT = 10
+DOWNLOAD_RETRY = 24 * 3600
+
+# Región de los puntos fuera de la Tierra (p. ej. Horizon Lunar Colony):
+# no pasan por el join espacial, así que nunca cuentan en un continente
+OFF_WORLD_REGION = 'Espacio'
+
+# Distancia máxima (grados) para asignar puntos costeros que caen en el mar
+NEAREST_MAX_DISTANCE = 2.0
+
+# Extensión (lng_min, lng_max, lat_min, lat_max) de los mapas mundiales
+WORLD_EXTENT = (-180, 180, -60, 85)
+# Se incrementa cuando cambia cómo se rasteriza el mapa base
+BASEMAP_VERSION = 1
+# Bytes de rasters de mapa base en .geo_cache/ (LRU; el zip de países no cuenta)
+BASEMAP_BUDGET = 256 * 1024 ** 2
+
+# Niveles de simplificación (grados) precalculados; se elige según el DPI
+SIMPLIFY_LEVELS = (0.0, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Continentes de Natural Earth -> regiones usadas en los reportes
+CONTINENT_REGIONS = {
+    'North America': 'América',
+    'South America': 'América',
+    'Europe': 'Europa',
+    'Asia': 'Asia',
+    'Africa': 'África',
+    'Oceania': 'Oceanía',
+}
+
+
+# =============================================================================
+# CARGA DE POLÍGONOS
+# =============================================================================
+
+def _fallback_world():
+    # Continentes simplificados para trabajar sin conexión. Los polígonos
+    # son disjuntos (a lo sumo comparten un borde, y ahí decide el orden de
+    # la lista, ver assign_points): Egipto queda en África y Oriente Medio
+    # en Asia
+    europe = box(-25, 35.5, 40, 72)
+    continents = {
+        'geometry': [
+            box(-170, 15, -30, 75),                                   # América del Norte
+            box(-80, -60, -30, 15),                                   # América del Sur
+            europe,                                                   # Europa
+            box(-20, -40, 32, 35.5).union(box(32, -40, 52, 12)),      # África
+            box(32, 12, 180, 75).difference(europe).union(box(95, -10, 180, 12)),  # Asia
+            box(110, -50, 180, -10),                                  # Oceanía
+        ],
+        'country': ['North America', 'South America', 'Europe', 'Africa', 'Asia', 'Oceania'],
+        'continent': ['North America', 'South America', 'Europe', 'Africa', 'Asia', 'Oceania'],
+    }
+    return gpd.GeoDataFrame(continents, crs='EPSG:4326')
+
+
+@lru_cache(maxsize=None)
+def _load_countries(cache_dir=CACHE_DIR):
+    local_zip = os.path.join(cache_dir, os.path.basename(NATURAL_EARTH_URL))
+    failed = local_zip + '.failed'
+    try:
+        if not os.path.exists(local_zip):
+            if os.path.exists(failed) and time.time() - os.path.getmtime(failed) < DOWNLOAD_RETRY:
+                raise OSError(f'descarga fallida hace menos de {DOWNLOAD_RETRY} s')
+
+            def download(fh):
+                with urllib.request.urlopen(NATURAL_EARTH_URL, timeout=DOWNLOAD_TIMEOUT) as response:
+                    fh.write(response.read())
+            try:
+                atomic_write(local_zip, download)
+            except OSError as error:
+                # Marca del fallo: las siguientes ejecuciones no esperan a la red
+                atomic_write(failed, lambda fh: fh.write(f'{error}\n'), binary=False)
+                raise
+        world = gpd.read_file(local_zip)
+        world = world.rename(columns={'NAME': 'country', 'CONTINENT': 'continent'})
+        world = world[['country', 'continent', 'geometry']]
+        print("Mapa cargado desde Natural Earth")
+    except Exception:
+        print("No se pudo cargar desde Natural Earth")
+        print("Usando mapa simplificado")
+        world = _fallback_world()
+    world['region'] = world['continent'].map(CONTINENT_REGIONS)
+    return world
+
+
+def load_countries():
+    """Polígonos de países (copia) con columnas country, continent y region."""
+    return _load_countries().copy()
+
+
+@lru_cache(maxsize=None)
+def _country_index():
+    world = _load_countries()
+    geoms = world.geometry.values
+    # Geometrías preparadas: los predicados del join se evalúan más rápido
+    shapely.prepare(geoms)
+    return shapely.STRtree(geoms), geoms
+
+
+# =============================================================================
+# JOIN ESPACIAL
+# =============================================================================
+
+def assign_points(lng, lat, snap_distance=NEAREST_MAX_DISTANCE):
+    """
+    Posición del polígono de país que contiene cada punto (-1 si ninguno).
+
+    Un solo `STRtree.query` vectorizado resuelve todos los puntos; los que
+    caen en el mar a menos de `snap_distance` grados de la costa se asignan
+    al país más cercano (0 desactiva ese paso, que es el más costoso).
+    """
+    tree, _ = _country_index()
+    points = shapely.points(np.asarray(lng, dtype=float), np.asarray(lat, dtype=float))
+    result = np.full(len(points), -1, dtype=np.int64)
+
+    point_idx, geom_idx = tree.query(points, predicate='intersects')
+    # Si un punto toca varios polígonos se queda con el primero
+    first, pos = np.unique(point_idx, return_index=True)
+    result[first] = geom_idx[pos]
+
+    missing = np.flatnonzero(result < 0)
+    if len(missing) and snap_distance > 0:
+        near_point, near_geom = tree.query_nearest(
+            points[missing], max_distance=snap_distance, all_matches=False)
+        result[missing[near_point]] = near_geom
+    return result
+
+
+def assign_regions(lng, lat, unmatched='Otro', snap_distance=NEAREST_MAX_DISTANCE, off_world=None):
+    """
+    DataFrame con country, continent y region para cada punto. Los puntos
+    marcados en `off_world` (máscara booleana) no se buscan en el mapa y
+    reciben OFF_WORLD_REGION en las tres columnas.
+    """
+    world = _load_countries()
+    positions = assign_points(lng, lat, snap_distance)
+    matched = positions >= 0
+    safe = np.where(matched, positions, 0)
+    if off_world is None:
+        off_world = np.zeros(len(positions), dtype=bool)
+    off_world = np.asarray(off_world, dtype=bool)
+    out = {}
+    for column in ['country', 'continent', 'region']:
+        values = world[column].to_numpy(dtype=object)[safe]
+        # Polígonos sin región (Antártida, océanos) cuentan como no asignados
+        values = np.where(matched & pd.notna(values), values, unmatched)
+        out[column] = np.where(off_world, OFF_WORLD_REGION, values)
+    return pd.DataFrame(out)
+
+
+def region_stats(points_df, region_col='region', games_col='Partidas', winrate_col='Winrate'):
+    """
+    Winrate ponderado por partidas y partidas jugadas por región.
+
+    `points_df` tiene una fila por punto (p. ej. un mapa) con su región
+    asignada, el número de partidas y el winrate en ese punto.
+    """
+    games = points_df[games_col].to_numpy(dtype=float)
+    wins = games * points_df[winrate_col].to_numpy(dtype=float) / 100
+    grouped = pd.DataFrame({region_col: points_df[region_col].to_numpy(),
+                            'Partidas': games, 'Victorias': wins}).groupby(region_col).sum()
+    grouped['Winrate'] = (grouped['Victorias'] / grouped['Partidas'] * 100).round(2)
+    columns = ['Partidas', 'Winrate']
+    if 'SR_Change' in points_df:
+        # SR Change promedio ponderado por partidas
+        sr_sum = pd.Series(games * points_df['SR_Change'].to_numpy(dtype=float),
+                           index=points_df[region_col].to_numpy()).groupby(level=0).sum()
+        grouped['SR_Change'] = (sr_sum / grouped['Partidas']).round(2)
+        columns.append('SR_Change')
+    return grouped[columns]
+
+
+# =============================================================================
+# COROPLETAS
+# =============================================================================
+
+def simplify_tolerance(width_inches, dpi, extent_degrees=360.0):
+    """Nivel de simplificación más grueso cuyo error no supera un píxel."""
+    pixel = extent_degrees / (width_inches * dpi)
+    return max(level for level in SIMPLIFY_LEVELS if level <= pixel)
+
+
+def _simplify(geoms, tolerance):
+    if tolerance <= 0:
+        return geoms
+    try:
+        # Simplificación de cobertura: las fronteras compartidas se simplifican
+        # una sola vez y los países vecinos siguen encajando sin huecos
+        return shapely.coverage_simplify(geoms, tolerance, simplify_boundary=True)
+    except Exception:
+        return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+def _orient(geoms):
+    # Anillo exterior antihorario y huecos horarios
+    try:
+        return shapely.orient_polygons(geoms, exterior_cw=False)
+    except AttributeError:
+        # shapely < 2.1: orientación polígono a polígono
+        def orient_one(geom):
+            if geom is None or geom.is_empty:
+                return geom
+            if geom.geom_type == 'MultiPolygon':
+                return MultiPolygon([orient(part, sign=1.0) for part in geom.geoms])
+            return orient(geom, sign=1.0) if geom.geom_type == 'Polygon' else geom
+        return np.array([orient_one(geom) for geom in geoms], dtype=object)
+
+
+def _geoms_to_paths(geoms):
+    """Un Path compuesto por geometría, construido con operaciones vectorizadas."""
+    # Matplotlib rellena con la regla nonzero: los huecos deben ir en sentido
+    # contrario al anillo exterior
+    geoms = _orient(geoms)
+    parts, part_owner = shapely.get_parts(geoms, return_index=True)
+    rings, ring_part = shapely.get_rings(parts, return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    starts = np.r_[0, np.flatnonzero(np.diff(coord_ring)) + 1]
+    codes[starts] = Path.MOVETO
+    codes[np.r_[starts[1:] - 1, len(coords) - 1]] = Path.CLOSEPOLY
+
+    owner = part_owner[ring_part[coord_ring]]
+    bounds = np.searchsorted(owner, np.arange(len(geoms) + 1))
+    return [Path(coords[a:b], codes[a:b]) if b > a else None
+            for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+@lru_cache(maxsize=None)
+def _country_paths(tolerance):
+    geoms = _simplify(_load_countries().geometry.values, tolerance)
+    return _geoms_to_paths(geoms)
+
+
+@lru_cache(maxsize=None)
+def _region_shapes():
+    # Disolver países por región una sola vez por proceso
+    world = _load_countries()
+    return world.dropna(subset=['region']).dissolve(by='region')[['geometry']]
+
+
+@lru_cache(maxsize=None)
+def _region_paths(tolerance):
+    geoms = _simplify(_region_shapes().geometry.values, tolerance)
+    return _geoms_to_paths(geoms)
+
+
+def draw_choropleth(ax, paths, values, cmap='RdYlGn', norm=None, missing_color='#E0E0E0',
+                    edgecolor='white', linewidth=0.5):
+    """
+    Dibuja todas las geometrías como una sola PatchCollection.
+
+    `values` se alinea con `paths`; los NaN se pintan con `missing_color`.
+    Un único artista implica un único paso de dibujo, sin importar cuántos
+    países haya.
+    """
+    keep = [i for i, path in enumerate(paths) if path is not None]
+    cmap = plt.get_cmap(cmap).with_extremes(bad=missing_color)
+    collection = PatchCollection([PathPatch(paths[i]) for i in keep], cmap=cmap, norm=norm,
+                                 edgecolor=edgecolor, linewidth=linewidth)
+    collection.set_array(np.ma.masked_invalid(np.asarray(values, dtype=float)[keep]))
+    ax.add_collection(collection)
+    ax.set_xlim(-180, 180)
+    ax.set_ylim(-60, 85)
+    return collection
+
+
+def plot_country_choropleth(ax, country_values, dpi, cmap='RdYlGn', norm=None, **kwargs):
+    """Coropleta por país; `country_values` es una Serie indexada por nombre de país."""
+    width_inches = ax.get_position().width * ax.figure.get_figwidth()
+    paths = _country_paths(simplify_tolerance(width_inches, dpi))
+    values = country_values.reindex(_load_countries()['country']).to_numpy()
+    return draw_choropleth(ax, paths, values, cmap=cmap, norm=norm, **kwargs)
+
+
+def plot_region_choropleth(ax, stats, column, dpi=150, cmap='RdYlGn', vmin=None, vmax=None, label=None):
+    """Colorea cada región según `stats[column]`; regiones sin datos en gris."""
+    shapes = _region_shapes().join(stats[[column]], how='left')
+    width_inches = ax.get_position().width * ax.figure.get_figwidth()
+    paths = _region_paths(simplify_tolerance(width_inches, dpi))
+    norm = plt.Normalize(vmin=vmin if vmin is not None else shapes[column].min(),
+                         vmax=vmax if vmax is not None else shapes[column].max())
+    collection = draw_choropleth(ax, paths, shapes[column].to_numpy(), cmap=cmap, norm=norm)
+    cbar = ax.figure.colorbar(collection, ax=ax, shrink=0.6)
+    cbar.set_label(label or column)
+    for region, row in shapes[shapes[column].notna()].iterrows():
+        center = row.geometry.representative_point()
+        ax.annotate(f'{region}\n{row[column]:.0f}', (center.x, center.y), ha='center', va='center',
+                    fontsize=9, fontweight='bold',
+                    bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.8))
+    return ax
+
+
+# =============================================================================
+# MAPA BASE RASTERIZADO
+# =============================================================================
+
+def geographic_aspect(extent=WORLD_EXTENT):
+    """Relación de aspecto que usa GeoPandas para EPSG:4326 (1 / cos(latitud media))."""
+    return 1 / np.cos(np.radians((extent[2] + extent[3]) / 2))
+
+
+def basemap_shape(width_px, extent=WORLD_EXTENT):
+    """(alto, ancho) en píxeles del raster para `width_px` de ancho."""
+    ratio = (extent[3] - extent[2]) / (extent[1] - extent[0]) * geographic_aspect(extent)
+    return int(round(width_px * ratio)), int(width_px)
+
+
+def _render_basemap(width_px, extent, dpi, color, edgecolor, linewidth, alpha):
+    height_px, width_px = basemap_shape(width_px, extent)
+    fig = plt.figure(figsize=(width_px / dpi, height_px / dpi), dpi=dpi)
+    fig.patch.set_alpha(0)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    ax.patch.set_alpha(0)
+    paths = _country_paths(simplify_tolerance(width_px / dpi, dpi, extent[1] - extent[0]))
+    keep = [path for path in paths if path is not None]
+    ax.add_collection(PatchCollection([PathPatch(path) for path in keep], facecolor=color,
+                                      edgecolor=edgecolor, linewidth=linewidth, alpha=alpha))
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    fig.canvas.draw()
+    pixels = np.asarray(fig.canvas.buffer_rgba()).copy()
+    plt.close(fig)
+    return pixels
+
+
+def basemap_raster(width_px, extent=WORLD_EXTENT, dpi=150, color='#2d3748', edgecolor='#4a5568',
+                   linewidth=0.5, alpha=0.8, cache_dir=CACHE_DIR):
+    """
+    Ruta del raster RGBA (.npy) del mapa base, rasterizándolo solo si no está
+    en caché. El fondo es transparente: el color de fondo lo pone cada figura.
+
+    Se devuelve la ruta para que los procesos que componen variantes lo abran
+    con `np.load(..., mmap_mode='r')` sin copiar el arreglo.
+    """
+    world = _load_countries()
+    params = (BASEMAP_VERSION, tuple(extent), int(width_px), dpi, color, edgecolor,
+              linewidth, alpha, len(world), tuple(np.round(world.total_bounds, 4)))
+    key = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f'basemap-{key}.npy')
+    if os.path.exists(path):
+        touch(path)
+    else:
+        pixels = _render_basemap(width_px, extent, dpi, color, edgecolor, linewidth, alpha)
+        atomic_write(path, lambda fh: np.save(fh, pixels))
+        evict(cache_dir, BASEMAP_BUDGET, suffixes=('.npy',))
+    return path
+
+
+def draw_basemap(ax, raster, extent=WORLD_EXTENT):
+    """Dibuja el raster (arreglo o ruta .npy) como capa inferior de `ax`."""
+    if isinstance(raster, (str, os.PathLike)):
+        raster = np.load(raster, mmap_mode='r')
+    image = ax.imshow(raster, extent=extent, origin='upper', interpolation='antialiased', zorder=0)
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect(geographic_aspect(extent))
+    return image
@@ -0,0 +1,72 @@
+"""
+hero_catalog.py
+===============
+Catálogo de héroes de Overwatch compartido por los scripts de mapas y por
+index.html. Los datos viven una sola vez en data/heroes.json (formato
+columnar compacto: lista de campos + filas), con coordenadas geográficas
+(lat/lng) que cada consumidor proyecta si lo necesita.
+
+Uso:
+    from hero_catalog import load_heroes, heroes_by, region_counts
+    heroes_df = load_heroes()
+    tanks = heroes_df.iloc[heroes_by('role')['Tank']]
+"""
+
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.path.join(BASE_DIR, '..', 'data', 'heroes.json')
+
+INDEXED_COLUMNS = ('role', 'country', 'region')
+
+
+@lru_cache(maxsize=None)
+def _read_catalog(path=CATALOG_PATH):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+@lru_cache(maxsize=None)
+def _load(path=CATALOG_PATH):
+    catalog = _read_catalog(path)
+    heroes_df = pd.DataFrame(catalog['heroes'], columns=catalog['campos'])
+    # Categóricas: el orden de regiones del archivo se respeta en los conteos
+    heroes_df['region'] = pd.Categorical(heroes_df['region'], categories=catalog['regiones'])
+    heroes_df['role'] = heroes_df['role'].astype('category')
+    heroes_df['country'] = heroes_df['country'].astype('category')
+    return heroes_df
+
+
+def load_heroes(path=CATALOG_PATH):
+    """DataFrame del catálogo (copia, para que el llamador pueda modificarlo)."""
+    return _load(path).copy()
+
+
+@lru_cache(maxsize=None)
+def _build_index(column, path=CATALOG_PATH):
+    codes = _load(path)[column].cat.codes.to_numpy()
+    categories = _load(path)[column].cat.categories
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+    return {cat: order[bounds[i]:bounds[i + 1]] for i, cat in enumerate(categories)}
+
+
+def heroes_by(column, path=CATALOG_PATH):
+    """Índice en memoria valor -> posiciones de fila para 'role', 'country' o 'region'."""
+    if column not in INDEXED_COLUMNS:
+        raise ValueError(f'Columna sin índice: {column!r} (opciones: {INDEXED_COLUMNS})')
+    return _build_index(column, path)
+
+
+def region_counts(path=CATALOG_PATH):
+    """Héroes por región en un solo conteo agrupado, en el orden del catálogo."""
+    return _load(path)['region'].value_counts(sort=False)
+
+
+def role_counts(path=CATALOG_PATH):
+    return _load(path)['role'].value_counts()
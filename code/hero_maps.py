@@ -0,0 +1,197 @@
+"""
+hero_maps.py
+============
+Variantes del mapa mundial de héroes (simple, detallada, por rol...) sobre
+un mapa base rasterizado una sola vez. Cada variante solo dibuja la capa de
+héroes encima del raster, así que producir N variantes cuesta un
+rasterizado del mapa base más N composiciones baratas, repartidas en un
+pool de procesos.
+
+Uso:
+    from geo_analytics import basemap_raster
+    from hero_maps import hero_map_variant, render_variants
+    raster = basemap_raster(width_px=3600)
+    variants = [hero_map_variant('simple', heroes_df, '../images/mapa.png', 'Héroes')]
+    render_variants(variants, raster)
+
+Con `values` (Serie nombre -> valor, p. ej. el winrate por héroe de
+hero_stats.py) cada héroe se colorea por ese valor y el rol queda como
+borde del marcador.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import Normalize, to_rgba
+from matplotlib.lines import Line2D
+
+from geo_analytics import WORLD_EXTENT, draw_basemap
+
+ROLE_COLORS = {
+    'Tank': '#3498db',      # Azul
+    'Damage': '#e74c3c',    # Rojo
+    'Support': '#2ecc71',   # Verde
+}
+ACCENT = '#F99E1A'          # Naranja Overwatch
+BACKGROUND = '#1a1a2e'
+OCEAN = '#0d1117'
+SPECIAL_LOCATIONS = ('The Moon', 'Mars', 'Unknown')
+# Coloreado por resultados: escala centrada en 50% y gris para héroes sin datos
+VALUE_CMAP = 'RdYlGn'
+VALUE_RANGE = (30, 70)
+NO_DATA = '#555555'
+
+# Estilos de variante: tamaños de marcador, etiquetas y elementos de texto
+VARIANT_STYLES = {
+    'simple': {
+        'figsize': (20, 12), 'marker_size': 400, 'inner_size': 250, 'edge_width': 2.5,
+        'labels': 'special', 'label_fontsize': 9, 'label_offset': (10, 10), 'label_pad': 0.5,
+        'legend_fontsize': 13, 'legend_title_fontsize': 15, 'title_fontsize': 18,
+        'axis_fontsize': 12, 'info_box': True, 'total_box': True,
+    },
+    'detallado': {
+        'figsize': (24, 14), 'marker_size': 300, 'inner_size': None, 'edge_width': 2,
+        'labels': 'all', 'label_fontsize': 7, 'label_offset': (5, 5), 'label_pad': 0.3,
+        'legend_fontsize': 14, 'legend_title_fontsize': 16, 'title_fontsize': 20,
+        'axis_fontsize': 13, 'info_box': False, 'total_box': False,
+    },
+}
+
+INFO_TEXT = (
+    "Ubicaciones Especiales:\n"
+    "Luna: Winston, Wrecking Ball\n"
+    "Marte: Juno\n"
+    "Desconocido: Bastion"
+)
+
+
+def hero_map_variant(style, heroes_df, output_path, title, credits='Overwatch Heroes Map', dpi=150,
+                     values=None, value_label='Winrate %'):
+    """Descripción (serializable) de una variante; solo lleva las columnas necesarias."""
+    columns = ['name', 'role', 'country', 'lng', 'lat']
+    heroes = heroes_df[columns].copy()
+    heroes['role'] = heroes['role'].astype(str)
+    heroes['country'] = heroes['country'].astype(str)
+    if values is not None:
+        heroes['valor'] = heroes['name'].map(values).astype(float)
+    return {'style': style, 'heroes': heroes, 'output': output_path, 'title': title,
+            'credits': credits, 'dpi': dpi, 'value_label': value_label}
+
+
+def _legend(ax, heroes, style):
+    counts = heroes['role'].value_counts()
+    # Con coloreado por valor el rol solo se ve en el borde
+    by_value = 'valor' in heroes
+    handles = [Line2D([0], [0], marker='o', color='w', label=f'{role} ({counts.get(role, 0)})',
+                      markerfacecolor=NO_DATA if by_value else color,
+                      markeredgecolor=color if by_value else 'white', markeredgewidth=2,
+                      markersize=12)
+               for role, color in ROLE_COLORS.items() if counts.get(role, 0)]
+    legend = ax.legend(handles=handles, loc='lower right', fontsize=style['legend_fontsize'],
+                       frameon=True, facecolor=BACKGROUND, edgecolor=ACCENT, framealpha=0.95,
+                       title='Roles', title_fontsize=style['legend_title_fontsize'])
+    legend.get_title().set_color(ACCENT)
+    for text in legend.get_texts():
+        text.set_color('white')
+
+
+def _value_colors(heroes):
+    values = heroes['valor'].to_numpy()
+    colors = plt.get_cmap(VALUE_CMAP)(Normalize(*VALUE_RANGE, clip=True)(np.nan_to_num(values)))
+    colors[np.isnan(values)] = to_rgba(NO_DATA)
+    return colors
+
+
+def _colorbar(fig, ax, style, label):
+    mappable = plt.cm.ScalarMappable(norm=Normalize(*VALUE_RANGE), cmap=VALUE_CMAP)
+    bar = fig.colorbar(mappable, ax=ax, fraction=0.025, pad=0.01, extend='both')
+    bar.set_label(label, color='white', fontsize=style['axis_fontsize'], fontweight='bold')
+    bar.ax.tick_params(colors='white')
+
+
+def _draw_heroes(ax, heroes, style):
+    role_colors = heroes['role'].map(ROLE_COLORS).to_numpy()
+    if 'valor' in heroes:
+        # Relleno por resultados del jugador; el rol queda en el borde
+        colors, edges = _value_colors(heroes), role_colors
+    else:
+        colors, edges = role_colors, 'white'
+    # Un scatter por capa de marcador para todos los héroes
+    ax.scatter(heroes['lng'], heroes['lat'], s=style['marker_size'], c=colors, alpha=0.8,
+               edgecolors=edges, linewidth=style['edge_width'], zorder=5)
+    if style['inner_size']:
+        ax.scatter(heroes['lng'], heroes['lat'], s=style['inner_size'], c=colors, alpha=1.0,
+                   edgecolors='none', zorder=6)
+    if style['labels'] == 'all':
+        labeled = heroes
+    elif style['labels'] == 'special':
+        labeled = heroes[heroes['country'].isin(SPECIAL_LOCATIONS)]
+    else:
+        labeled = heroes.iloc[:0]
+    for name, lng, lat, color in zip(labeled['name'], labeled['lng'], labeled['lat'],
+                                     labeled['role'].map(ROLE_COLORS)):
+        ax.annotate(name, (lng, lat), xytext=style['label_offset'], textcoords='offset points',
+                    fontsize=style['label_fontsize'], color='white', fontweight='bold',
+                    bbox=dict(boxstyle=f"round,pad={style['label_pad']}", facecolor=color,
+                              edgecolor='white', alpha=0.9 if style['labels'] == 'special' else 0.85,
+                              linewidth=1),
+                    zorder=7)
+
+
+def _text_box(ax, x, text, align, fontsize, color):
+    ax.text(x, 0.98, text, transform=ax.transAxes, fontsize=fontsize, verticalalignment='top',
+            horizontalalignment=align, color=color, fontweight='bold', zorder=10,
+            bbox=dict(boxstyle='round,pad=0.7', facecolor=BACKGROUND, edgecolor=ACCENT,
+                      alpha=0.95, linewidth=2))
+
+
+def render_variant(variant, raster, extent=WORLD_EXTENT):
+    """Compone la capa de héroes sobre el raster y guarda el PNG (escritura atómica)."""
+    style = VARIANT_STYLES[variant['style']]
+    heroes = variant['heroes']
+    fig, ax = plt.subplots(figsize=style['figsize'], facecolor=BACKGROUND)
+    ax.set_facecolor(OCEAN)
+    draw_basemap(ax, raster, extent)
+    _draw_heroes(ax, heroes, style)
+    _legend(ax, heroes, style)
+    if 'valor' in heroes:
+        _colorbar(fig, ax, style, variant['value_label'])
+    if style['info_box']:
+        _text_box(ax, 0.02, INFO_TEXT, 'left', 11, 'white')
+    if style['total_box']:
+        _text_box(ax, 0.98, f'Total: {len(heroes)} héroes', 'right', 13, ACCENT)
+
+    ax.set_title(variant['title'], fontsize=style['title_fontsize'], fontweight='bold',
+                 color=ACCENT, pad=20)
+    ax.set_xlabel('Longitud', fontsize=style['axis_fontsize'], color='white', fontweight='bold')
+    ax.set_ylabel('Latitud', fontsize=style['axis_fontsize'], color='white', fontweight='bold')
+    ax.grid(True, alpha=0.2, linestyle='--', color='#4a5568', linewidth=0.5)
+    ax.tick_params(colors='white', labelsize=10)
+    fig.text(0.99, 0.01, f"Generado con GeoPandas + Matplotlib | {variant['credits']}",
+             ha='right', va='bottom', fontsize=9, color='#666', style='italic')
+    plt.tight_layout()
+
+    path = variant['output']
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}.png'
+    fig.savefig(tmp_path, dpi=variant['dpi'], bbox_inches='tight', facecolor=BACKGROUND)
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+
+def render_variants(variants, raster, extent=WORLD_EXTENT, workers=None):
+    """
+    Renderiza las variantes en paralelo. `raster` es la ruta .npy del mapa
+    base: cada proceso la mapea en memoria en lugar de recibir una copia.
+    """
+    workers = workers or min(len(variants), os.cpu_count() or 1)
+    if workers <= 1:
+        return [render_variant(variant, raster, extent) for variant in variants]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_variant, variants, [raster] * len(variants),
+                             [extent] * len(variants)))
@@ -0,0 +1,346 @@
+"""
+hero_stats.py
+=============
+Ingesta de columnas por héroe (héroe jugado y tiempo jugado con cada uno)
+y agregados de rendimiento por héroe: winrate, eliminaciones, daño y
+curación. Cada héroe se codifica con un id compacto (int16, la posición
+en data/heroes.json; -1 si no está en el catálogo) y todos los agregados
+salen de un único `np.bincount` por métrica sobre ese id.
+
+Formatos de entrada reconocidos (el CSV puede no traer ninguno):
+    - Columnas anchas 'Hero 1', 'Hero 2', ... con tiempos opcionales en
+      'Hero 1 Time', 'Hero 2 Time', ... (segundos o 'mm:ss').
+    - Una columna 'Heroes' con entradas separadas por ';' y tiempo
+      opcional tras '=':  'Ana=5:30;Mercy=2:00'.
+
+Las estadísticas de una partida (Elim, Dmg, Heal, victoria) se reparten
+entre sus héroes según la fracción del tiempo jugado con cada uno, o a
+partes iguales si no hay tiempos.
+
+Uso:
+    from hero_stats import hero_aggregates
+    aggregates = hero_aggregates(CSV_PATH)   # incremental: solo lee filas nuevas
+    aggregates.frame()                       # DataFrame por héroe del catálogo
+
+Los agregados se guardan en .hero_cache/ junto con el desplazamiento en
+bytes ya procesado del CSV y una huella de sus últimos TAIL_BYTES: si el
+archivo solo creció por el final, la siguiente llamada salta a ese
+desplazamiento y lee únicamente los registros añadidos, así que el costo
+es proporcional a lo nuevo y no al tamaño del archivo. Los registros se
+cortan en saltos de línea fuera de comillas (un campo entrecomillado
+puede contener saltos de línea).
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from hero_catalog import CATALOG_PATH, load_heroes
+from memo_cache import atomic_write, evict, touch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '..', '.hero_cache')
+# Se incrementa cuando cambia el reparto o el formato de los agregados
+AGGREGATES_VERSION = 2
+BLOCK_BYTES = 16 * 1024 ** 2      # bytes del CSV leídos por bloque
+TAIL_BYTES = 64 * 1024            # final de la región procesada que se verifica
+DISK_BUDGET = 64 * 1024 ** 2      # bytes en .hero_cache/ (LRU por CSV)
+
+HERO_COLUMN = re.compile(r'^Hero (\d+)$')
+PACKED_COLUMN = 'Heroes'
+# Métricas por partida que se reparten entre los héroes jugados
+METRICS = ('Elim', 'Dmg', 'Heal')
+
+
+# =============================================================================
+# CODIFICACIÓN DE HÉROES
+# =============================================================================
+
+def _normalize(name):
+    # 'Lúcio' -> 'lucio', 'Soldier: 76' -> 'soldier76', 'D.Va' -> 'dva'
+    text = unicodedata.normalize('NFKD', str(name))
+    return ''.join(c for c in text if c.isalnum()).lower()
+
+
+@lru_cache(maxsize=None)
+def hero_ids(path=CATALOG_PATH):
+    """Nombre normalizado -> id (posición en el catálogo)."""
+    return {_normalize(name): hero_id for hero_id, name in enumerate(load_heroes(path)['name'])}
+
+
+def encode_heroes(names, path=CATALOG_PATH):
+    """Ids int16 de una secuencia de nombres; -1 para vacíos o desconocidos."""
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+    ids = hero_ids(path)
+    # Se normaliza una vez por nombre distinto, no una vez por fila
+    table = np.array([ids.get(_normalize(name), -1) for name in uniques] + [-1], dtype=np.int16)
+    return table[codes]
+
+
+def _seconds(values):
+    """Segundos desde números o textos 'mm:ss' / 'hh:mm:ss'; NaN si no se entiende."""
+    text = pd.Series(values, dtype=object).astype(str).str.strip()
+    seconds = pd.to_numeric(text, errors='coerce').to_numpy(dtype=float, copy=True)
+    clock = text.str.fullmatch(r'\d+(:\d{1,2}){1,2}').to_numpy(dtype=bool)
+    for position in np.flatnonzero(clock):
+        total = 0
+        for part in text.iat[position].split(':'):
+            total = total * 60 + int(part)
+        seconds[position] = total
+    return seconds
+
+
+# =============================================================================
+# INGESTA: FORMATO LARGO (fila de partida, héroe, fracción de la partida)
+# =============================================================================
+
+def _wide_entries(df):
+    columns = sorted((int(m.group(1)), c) for c in df.columns if (m := HERO_COLUMN.match(c)))
+    rows, names, times = [], [], []
+    for _, column in columns:
+        present = df[column].notna().to_numpy()
+        rows.append(np.flatnonzero(present))
+        names.append(df[column].to_numpy(dtype=object)[present])
+        time_column = f'{column} Time'
+        times.append(_seconds(df[time_column].to_numpy(dtype=object)[present])
+                     if time_column in df else np.full(present.sum(), np.nan))
+    return rows, names, times
+
+
+def _packed_entries(df):
+    entries = df[PACKED_COLUMN].dropna().astype(str).str.split(';').explode().str.strip()
+    entries = entries[entries != '']
+    # object: un bloque sin entradas de héroe no deja columnas float vacías
+    parts = entries.str.split('=', n=1, expand=True).reindex(columns=[0, 1]).astype(object)
+    rows = df.index.get_indexer(entries.index)
+    return [rows], [parts[0].str.strip().to_numpy(dtype=object)], [_seconds(parts[1].to_numpy())]
+
+
+def hero_entries(df, path=CATALOG_PATH):
+    """
+    Formato largo de las columnas de héroe: (fila, id de héroe, peso,
+    segundos), donde el peso es la fracción de la partida jugada con ese
+    héroe. Si el DataFrame no trae columnas de héroe devuelve arreglos vacíos.
+    """
+    if any(HERO_COLUMN.match(c) for c in df.columns):
+        rows, names, times = _wide_entries(df)
+    elif PACKED_COLUMN in df:
+        rows, names, times = _packed_entries(df)
+    else:
+        rows, names, times = [], [], []
+    rows = np.concatenate(rows).astype(np.int64) if rows else np.zeros(0, dtype=np.int64)
+    names = np.concatenate(names) if names else np.zeros(0, dtype=object)
+    times = np.concatenate(times) if times else np.zeros(0)
+
+    ids = encode_heroes(names, path)
+    # Reparto por tiempo: fracción del total de la partida. Una partida sin
+    # ningún tiempo válido se reparte a partes iguales entre sus héroes.
+    timed = np.isfinite(times) & (times > 0)
+    per_row_time = np.bincount(rows, weights=np.where(timed, times, 0), minlength=len(df))
+    per_row_count = np.bincount(rows, minlength=len(df))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weights = np.where(per_row_time[rows] > 0,
+                           np.where(timed, times, 0) / per_row_time[rows],
+                           1 / per_row_count[rows])
+    return rows, ids, weights, np.where(timed, times, 0)
+
+
+# =============================================================================
+# AGREGADOS INCREMENTALES
+# =============================================================================
+
+class HeroAggregates:
+    """
+    Sumas por id de héroe (partidas ponderadas, victorias, métricas y
+    tiempo). `update` suma un bloque nuevo de partidas con un bincount por
+    métrica; las medias y el winrate se derivan al pedir `frame()`.
+    """
+
+    FIELDS = ('partidas', 'victorias', 'tiempo') + METRICS
+
+    def __init__(self, n_heroes, sums=None, unknown=0.0):
+        self.n_heroes = n_heroes
+        self.sums = sums if sums is not None else {
+            field: np.zeros(n_heroes) for field in self.FIELDS}
+        # Partidas (ponderadas) con héroes que no están en el catálogo
+        self.unknown = unknown
+
+    def update(self, df, path=CATALOG_PATH):
+        """Suma las partidas de `df` a los agregados; devuelve self."""
+        rows, ids, weights, seconds = hero_entries(df, path)
+        known = ids >= 0
+        self.unknown += float(weights[~known].sum())
+        rows, ids, weights, seconds = rows[known], ids[known], weights[known], seconds[known]
+
+        def add(field, values):
+            self.sums[field] += np.bincount(ids, weights=values, minlength=self.n_heroes)
+
+        add('partidas', weights)
+        add('tiempo', seconds)
+        if 'Result' in df:
+            add('victorias', weights * (df['Result'].to_numpy(dtype=object)[rows] == 'Win'))
+        for metric in METRICS:
+            if metric in df:
+                values = pd.to_numeric(df[metric], errors='coerce').to_numpy(dtype=float)[rows]
+                add(metric, weights * np.nan_to_num(values))
+        return self
+
+    @property
+    def games(self):
+        return float(self.sums['partidas'].sum())
+
+    def frame(self, path=CATALOG_PATH):
+        """Partidas, winrate y promedios por héroe, indexado por nombre del catálogo."""
+        games = self.sums['partidas']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            frame = pd.DataFrame({
+                'Partidas': games.round(2),
+                'Winrate %': (self.sums['victorias'] / games * 100).round(1),
+                **{metric: (self.sums[metric] / games).round(2) for metric in METRICS},
+                'Minutos': (self.sums['tiempo'] / 60).round(1),
+            }, index=pd.Index(load_heroes(path)['name'], name='Héroe'))
+        return frame
+
+    def winrates(self, path=CATALOG_PATH):
+        """Winrate por nombre de héroe (NaN para héroes sin partidas)."""
+        return self.frame(path)['Winrate %']
+
+
+# =============================================================================
+# PERSISTENCIA E INGESTA INCREMENTAL DEL CSV
+# =============================================================================
+
+def _cache_paths(csv_path, cache_dir):
+    key = hashlib.sha1(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{key}.npz'), os.path.join(cache_dir, f'{key}.json')
+
+
+def _record_ends(data):
+    """
+    Fines (exclusivos) de los registros completos de `data`, que empieza en
+    un límite de registro: posiciones tras cada '\\n' fuera de comillas. Un
+    campo entre comillas con saltos de línea no se corta (las comillas
+    escapadas '""' no cambian la paridad).
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(raw == ord('\n'))
+    quotes = np.cumsum(raw == ord('"'))
+    return newlines[quotes[newlines] % 2 == 0] + 1
+
+
+def _records(fh, offset, block_bytes):
+    """
+    Bloques de registros completos desde `offset`, leyendo de a
+    `block_bytes`. Al final del archivo, lo que queda sin '\\n' es un
+    registro completo si sus comillas están cerradas (CSV sin salto de línea
+    final); con comillas abiertas está a medio escribir y queda para la
+    próxima llamada. Produce (bytes, desplazamiento tras el bloque).
+    """
+    fh.seek(offset)
+    pending = b''
+    while True:
+        block = fh.read(block_bytes)
+        if not block:
+            if pending.strip() and pending.count(b'"') % 2 == 0:
+                yield pending, offset + len(pending)
+            return
+        pending += block
+        ends = _record_ends(pending)
+        if len(ends):
+            end = int(ends[-1])
+            offset += end
+            yield pending[:end], offset
+            pending = pending[end:]
+
+
+def _read_header(fh, block_bytes):
+    """(línea de cabecera, desplazamiento del primer registro) o (None, 0)."""
+    for block, _ in _records(fh, 0, block_bytes):
+        ends = _record_ends(block)
+        # Sin fin de registro: el archivo es solo la cabecera, sin '\\n'
+        end = int(ends[0]) if len(ends) else len(block)
+        return block[:end].decode('utf-8').strip(), end
+    return None, 0
+
+
+def _tail_digest(fh, start, offset):
+    # Huella de los últimos TAIL_BYTES ya procesados (sin la cabecera)
+    begin = max(start, offset - TAIL_BYTES)
+    fh.seek(begin)
+    return hashlib.sha1(fh.read(offset - begin)).hexdigest()
+
+
+def _continues_last_record(fh, offset):
+    # El último registro se tomó sin '\n' (fin del archivo) y lo añadido
+    # después no empieza con un salto de línea: ese registro se alargó
+    fh.seek(max(offset - 1, 0))
+    around = fh.read(2)
+    return len(around) == 2 and around[:1] != b'\n' and around[1:] not in (b'\r', b'\n')
+
+
+def _load_state(csv_path, cache_dir, n_heroes, fh, header, start):
+    arrays_path, meta_path = _cache_paths(csv_path, cache_dir)
+    try:
+        with open(meta_path, encoding='utf-8') as meta_fh:
+            meta = json.load(meta_fh)
+        with np.load(arrays_path) as data:
+            sums = {field: data[field] for field in HeroAggregates.FIELDS}
+    except (OSError, ValueError, KeyError):
+        return None
+    # Marca barata: versión, cabecera, tamaño ya procesado y huella del final
+    # de esa región. Un archivo reescrito o truncado no pasa; una edición en
+    # medio del historial sin tocar su final sí, por diseño
+    if (meta.get('version') != AGGREGATES_VERSION or meta.get('heroes') != n_heroes
+            or meta.get('header') != header
+            or os.fstat(fh.fileno()).st_size < meta['offset']
+            or _tail_digest(fh, start, meta['offset']) != meta['tail']
+            or _continues_last_record(fh, meta['offset'])):
+        return None
+    touch(arrays_path)
+    touch(meta_path)
+    return meta, HeroAggregates(n_heroes, sums, meta['unknown'])
+
+
+def _save_state(csv_path, cache_dir, aggregates, header, offset, tail):
+    arrays_path, meta_path = _cache_paths(csv_path, cache_dir)
+    atomic_write(arrays_path, lambda fh: np.savez(fh, **aggregates.sums))
+    meta = {'version': AGGREGATES_VERSION, 'heroes': aggregates.n_heroes, 'header': header,
+            'offset': offset, 'tail': tail, 'unknown': aggregates.unknown}
+    # El JSON se escribe al final: fija el desplazamiento de los arreglos ya guardados
+    atomic_write(meta_path, lambda fh: json.dump(meta, fh, ensure_ascii=False), binary=False)
+    evict(cache_dir, DISK_BUDGET, suffixes=('.npz', '.json'))
+
+
+def hero_aggregates(csv_path, cache_dir=CACHE_DIR, path=CATALOG_PATH, block_bytes=BLOCK_BYTES):
+    """
+    Agregados por héroe de `csv_path`. Reutiliza los guardados en
+    `cache_dir` y solo lee, desde el desplazamiento ya procesado, los
+    registros añadidos al final del archivo desde la última llamada; si el
+    final de la región procesada cambió, se recalcula todo.
+    """
+    n_heroes = len(load_heroes(path))
+    with open(csv_path, 'rb') as fh:
+        header, start = _read_header(fh, block_bytes)
+        if header is None:
+            return HeroAggregates(n_heroes)
+        state = _load_state(csv_path, cache_dir, n_heroes, fh, header, start)
+        if state is None:
+            aggregates, offset = HeroAggregates(n_heroes), start
+        else:
+            aggregates, offset = state[1], state[0]['offset']
+
+        names = pd.read_csv(io.StringIO(header), nrows=0).columns
+        processed = offset
+        for block, processed in _records(fh, offset, block_bytes):
+            aggregates.update(pd.read_csv(io.BytesIO(block), header=None, names=names), path)
+        if processed > offset or state is None:
+            _save_state(csv_path, cache_dir, aggregates, header, processed,
+                        _tail_digest(fh, start, processed))
+    return aggregates
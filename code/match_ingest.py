@@ -0,0 +1,495 @@
+r"""
+match_ingest.py
+===============
+Ingesta en streaming de exportaciones de partidas en varios formatos:
+CSV y JSON-lines, sin comprimir o comprimidos con gzip (.gz) o zstd
+(.zst, requiere el paquete `zstandard`). Los archivos se leen por bloques
+y pasan por una cadena de generadores:
+
+    read_chunks -> validate -> deduplicación -> upsert en el almacén de columnas
+                            \-> cuarentena / CSV canónico
+
+La validación es vectorizada por bloque: convierte cada columna a su tipo,
+comprueba rangos y valores permitidos, y las filas con algún valor
+inválido (SR con texto que no es 'P', temporada no entera, resultado
+desconocido...) van a la cuarentena con el motivo en lugar de convertirse
+en NaN en silencio.
+
+Cada partida se identifica por (cuenta, temporada, Game #). Las
+reexportaciones de una temporada a mitad de camino repiten partidas: se
+deduplican con una tabla hash sobre la clave (tiempo lineal) y se hacen
+upsert en el almacén. El coste depende de lo que llega:
+
+- archivos ya ingeridos: solo se lee el manifiesto (ni el almacén ni el
+  archivo);
+- partidas ya almacenadas sin cambios: se leen las columnas de la clave y
+  las filas almacenadas que coinciden, no el resto;
+- partidas nuevas o modificadas: el almacén se lee completo y se reescribe
+  (columnas, diccionarios e índices son de un solo segmento), O(filas
+  almacenadas).
+
+Uso:
+    from match_ingest import ingest
+    report = ingest(['exports/s11.csv.gz', 'exports/s12.jsonl'])
+    report['cuarentena'], report['filas_por_segundo']
+    store = ColumnStore(INGEST_STORE)        # mismo formato que column_store.py
+
+    python match_ingest.py entrada1.csv.gz entrada2.jsonl [...]
+
+La salida es el almacén de columnas canónico en .ingest/store/ (y, si se
+pide, el CSV canónico con las columnas y el formato de all_seasons.csv);
+la cuarentena queda en .ingest/quarantine.csv con archivo, línea y motivo.
+La cuarentena es acumulativa: cada ingesta añade las filas inválidas de
+sus archivos y solo reemplaza las de un archivo que se vuelve a ingerir;
+nunca se borra implícitamente.
+"""
+
+import gzip
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from column_store import (DIMENSION_COLUMNS, HOT_COLUMNS, MANIFEST, ColumnStore,
+                          _source_stamp, update_manifest, write_store)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INGEST_DIR = os.path.join(BASE_DIR, '..', '.ingest')
+INGEST_STORE = os.path.join(INGEST_DIR, 'store')
+QUARANTINE_PATH = os.path.join(INGEST_DIR, 'quarantine.csv')
+CHUNK_ROWS = 200_000
+
+# Esquema canónico, en el orden de all_seasons.csv (más la cuenta):
+# columna -> (tipo, obligatoria, restricción)
+# Tipos: 'int' (entero), 'float', 'sr' (entero o 'P' de posicionamiento),
+# 'category' (valores permitidos) y 'text'. La restricción es un rango
+# (mínimo, máximo) o el conjunto de valores permitidos.
+SCHEMA = {
+    'season': ('int', True, (1, 100)),
+    'Game #': ('int', True, (1, None)),
+    'Start SR': ('sr', False, (0, 5000)),
+    'End SR': ('sr', False, (0, 5000)),
+    'SR Change': ('float', False, (-100, 100)),
+    'Team SR avg': ('int', False, (0, 5000)),
+    'Enemy SR avg': ('int', False, (0, 5000)),
+    'Stack': ('int', False, (1, 6)),
+    'Role 1': ('text', False, None),
+    'Role 2': ('text', False, None),
+    'Result': ('category', True, {'Win', 'Loss', 'Draw'}),
+    'Map': ('text', False, None),
+    'Mode': ('text', False, None),
+    'Elim': ('float', False, (0, None)),
+    'Death': ('float', False, (0, None)),
+    'Heal': ('float', False, (0, None)),
+    'Dmg': ('float', False, (0, None)),
+    'Gold medals': ('int', False, (0, 10)),
+    'Silver medals': ('int', False, (0, 10)),
+    'Bronze medals': ('int', False, (0, 10)),
+    'Streak': ('int', False, (None, None)),
+    'Leaver': ('category', False, {'Ally', 'Enemy'}),
+    # Cuenta del jugador (exportaciones de varias cuentas); vacía si no viene
+    'Account': ('text', False, None),
+}
+PLACEMENT = 'P'
+# Metadatos de la cuarentena (archivo de origen, línea y motivo)
+QUARANTINE_COLUMNS = ['_fuente', '_linea', '_motivo']
+
+
+def _canonical_name(column):
+    # 'game #', ' GAME # ' y 'Game #' son la misma columna
+    return ' '.join(str(column).split()).lower()
+
+
+CANONICAL_NAMES = {_canonical_name(column): column for column in SCHEMA}
+
+
+# =============================================================================
+# LECTURA POR BLOQUES
+# =============================================================================
+
+def _open(path):
+    """Flujo binario descomprimido según la extensión (.gz, .zst o sin comprimir)."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise ImportError(f'Leer {path} requiere el paquete zstandard '
+                              '(pip install zstandard)') from exc
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def _format(path):
+    name = path[:-len('.gz')] if path.endswith('.gz') else path
+    name = name[:-len('.zst')] if name.endswith('.zst') else name
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if name.endswith(('.csv', '.txt')):
+        return 'csv'
+    raise ValueError(f'Formato no reconocido: {path!r} (se espera .csv o .jsonl, '
+                     'opcionalmente con .gz o .zst)')
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Genera (bloque, primera línea) con las columnas renombradas al esquema
+    canónico. Los valores llegan tal cual: la conversión es de `validate`.
+    """
+    kind = _format(path)
+    with _open(path) as raw:
+        stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        if kind == 'csv':
+            # Columnas SR como texto: 'P' es válido y no debe forzar NaN
+            reader = pd.read_csv(stream, chunksize=chunk_rows, low_memory=False,
+                                 dtype={'Start SR': str, 'End SR': str})
+            first_line = 2      # la línea 1 es la cabecera
+        else:
+            reader = pd.read_json(stream, lines=True, chunksize=chunk_rows, dtype=False)
+            first_line = 1
+        for chunk in reader:
+            chunk = chunk.rename(columns=lambda c: CANONICAL_NAMES.get(_canonical_name(c), c))
+            yield chunk, first_line
+            first_line += len(chunk)
+
+
+# =============================================================================
+# VALIDACIÓN Y CONVERSIÓN DE TIPOS
+# =============================================================================
+
+def _check_range(numeric, bounds):
+    low, high = bounds
+    bad = np.zeros(len(numeric), dtype=bool)
+    if low is not None:
+        bad |= numeric < low
+    if high is not None:
+        bad |= numeric > high
+    return bad
+
+
+def _convert(values, kind, constraint):
+    missing = values.isna().to_numpy()
+    if kind in ('int', 'float', 'sr'):
+        numeric_input = pd.api.types.is_numeric_dtype(values)
+        text = values if numeric_input else values.astype(str).str.strip()
+        placement = (text == PLACEMENT).to_numpy() if kind == 'sr' and not numeric_input \
+            else np.zeros(len(values), dtype=bool)
+        numeric = pd.to_numeric(text.where(~placement) if placement.any() else text,
+                                errors='coerce').to_numpy(dtype=float)
+        bad = ~missing & ~placement & ~np.isfinite(numeric)
+        if kind != 'float':
+            bad |= np.isfinite(numeric) & (numeric != np.round(numeric))
+        if constraint is not None:
+            bad |= np.isfinite(numeric) & _check_range(numeric, constraint)
+        if kind == 'float':
+            return pd.Series(numeric, index=values.index), bad
+        converted = pd.Series(numeric, index=values.index).round().astype('Int64')
+        if kind == 'sr':
+            converted = converted.astype(object).where(~np.isnan(numeric), None)
+            converted[placement] = PLACEMENT
+        return converted, bad
+    text = values.where(missing, values.astype(str).str.strip())
+    bad = np.zeros(len(values), dtype=bool)
+    if kind == 'category':
+        bad = ~missing & ~text.isin(constraint).to_numpy()
+    return text, bad
+
+
+def _coerce(values, kind, constraint):
+    """
+    Columna convertida y máscara de valores inválidos (presentes pero no
+    convertibles o fuera de la restricción). Los vacíos no son inválidos.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return _convert(values, kind, constraint)
+    # Texto: cada valor distinto se convierte una sola vez y se expande por código
+    codes, uniques = pd.factorize(values)
+    converted, bad = _convert(pd.Series(uniques, dtype=object), kind, constraint)
+    expanded = pd.api.extensions.take(converted.array, codes, allow_fill=True)
+    return pd.Series(expanded, index=values.index), np.append(bad, False)[codes]
+
+
+def validate(chunks, source=''):
+    """
+    Etapa de validación: por cada (bloque, primera línea) genera el bloque
+    canónico válido y las filas en cuarentena con su motivo.
+    """
+    for chunk, first_line in chunks:
+        lines = np.arange(first_line, first_line + len(chunk))
+        reasons = pd.Series(None, index=chunk.index, dtype=object)
+        canonical = {}
+        for column, (kind, required, constraint) in SCHEMA.items():
+            if column not in chunk:
+                if required:
+                    reasons[reasons.isna()] = f'falta la columna obligatoria {column!r}'
+                canonical[column] = pd.Series(None, index=chunk.index, dtype=object)
+                continue
+            converted, bad = _coerce(chunk[column], kind, constraint)
+            if required:
+                bad = bad | converted.isna().to_numpy()
+            # Solo se anota el primer motivo de cada fila
+            first = bad & reasons.isna().to_numpy()
+            if first.any():
+                shown = chunk[column].to_numpy()[first]
+                reasons[first] = [f'{column}: valor inválido {str(value)!r}' for value in shown]
+            canonical[column] = converted
+        bad_rows = reasons.notna().to_numpy()
+        good = pd.DataFrame(canonical, index=chunk.index)[~bad_rows]
+        metadata = pd.DataFrame(dict(zip(QUARANTINE_COLUMNS, (
+            source, lines[bad_rows], reasons[bad_rows].to_numpy()))), index=chunk.index[bad_rows])
+        yield good, pd.concat([metadata, chunk[bad_rows]], axis=1)
+
+
+# =============================================================================
+# FORMA COMPACTA PARA EL ALMACÉN
+# =============================================================================
+
+def _append_csv(frame, path, header):
+    frame.to_csv(path, mode='w' if header else 'a', header=header, index=False)
+
+
+def _compact(good):
+    # Columnas del almacén en forma compacta mientras se acumulan los bloques:
+    # float32 (exacto para enteros < 2**24) y categóricas para las dimensiones
+    compact = {}
+    for column, kind in DIMENSION_COLUMNS.items():
+        if kind is str:
+            # Categorías siempre como objeto (una columna vacía no cambia el tipo)
+            categories = pd.Index(sorted(good[column].dropna().unique()), dtype=object)
+            compact[column] = pd.Categorical(good[column], categories=categories)
+    for column in HOT_COLUMNS:
+        compact[column] = pd.to_numeric(good[column], errors='coerce').astype(np.float32)
+    return pd.DataFrame(compact)
+
+
+def _concat(parts):
+    # Las categóricas de cada bloque se unen sin pasar por texto; categorías
+    # ordenadas para que el diccionario coincida con el de build_store
+    return pd.DataFrame({
+        column: (pd.Series(union_categoricals([part[column] for part in parts],
+                                              sort_categories=True))
+                 if isinstance(parts[0][column].dtype, pd.CategoricalDtype)
+                 else np.concatenate([part[column].to_numpy() for part in parts]))
+        for column in parts[0].columns})
+
+
+# =============================================================================
+# DEDUPLICACIÓN Y UPSERT
+# =============================================================================
+
+def game_keys(table):
+    """
+    Hash uint64 de la clave de partida (cuenta, temporada, Game #). Es un
+    único pase vectorizado; filas sin cuenta comparten la clave vacía.
+    """
+    keys = pd.DataFrame({
+        'Account': np.asarray(table['Account'], dtype=object),
+        'season': np.asarray(table['season'], dtype=float),
+        'Game #': np.asarray(table['Game #'], dtype=float),
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def _row_hashes(table):
+    columns = {column: (np.asarray(values, dtype=object)
+                        if isinstance(values.dtype, pd.CategoricalDtype)
+                        else np.asarray(values, dtype=float))
+               for column, values in table.items()}
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+def _stored_table(store, rows=None):
+    """
+    Filas ya almacenadas (todas o las posiciones `rows`) en la misma forma
+    compacta que `_compact`. Con `rows` solo se leen esas filas de los
+    arreglos mapeados.
+    """
+    take = slice(None) if rows is None else np.asarray(rows, dtype=np.int64)
+    compact = {}
+    for column, kind in DIMENSION_COLUMNS.items():
+        if kind is str:
+            compact[column] = pd.Categorical.from_codes(
+                np.asarray(store.codes(column)[take]),
+                categories=pd.Index(store.dictionary(column), dtype=object))
+    for column in HOT_COLUMNS:
+        compact[column] = _stored_column(store, column, rows).astype(np.float32)
+    return pd.DataFrame(compact)
+
+
+def _stored_column(store, column, rows=None):
+    # Como ColumnStore.column, pero desempaquetando solo los bits de `rows`
+    if rows is None:
+        return store.column(column)
+    rows = np.asarray(rows, dtype=np.int64)
+    packed = store.valid_bitmap(column)
+    valid = (packed[rows >> 3] >> (7 - (rows & 7)) & 1).astype(bool)
+    return np.where(valid, store.values(column)[rows], np.nan)
+
+
+def _stored_keys(store):
+    # Solo las columnas de la clave de partida
+    return game_keys({'Account': store.decode('Account'), 'season': store.column('season'),
+                      'Game #': store.column('Game #')})
+
+
+def drop_duplicate_games(table):
+    """
+    Una fila por clave de partida; ante repetidos gana la última (la
+    exportación más reciente). Tiempo lineal: una tabla hash sobre las claves.
+    """
+    duplicated = pd.Series(game_keys(table)).duplicated(keep='last').to_numpy()
+    return table[~duplicated].reset_index(drop=True), int(duplicated.sum())
+
+
+def _upsert(store, new):
+    """
+    Une lo almacenado en `store` con `new` (gana lo nuevo) y cuenta
+    inserciones y cambios. Si nada es nuevo ni cambió devuelve (None,
+    cuentas) sin haber leído más que la clave y las filas coincidentes.
+    """
+    existing = pd.Index(_stored_keys(store)).get_indexer(game_keys(new))
+    matched = existing >= 0
+    changed = matched.copy()
+    changed[matched] = (_row_hashes(_stored_table(store, existing[matched]))
+                        != _row_hashes(new[matched]))
+    counts = {'nuevas': int((~matched).sum()), 'actualizadas': int(changed.sum()),
+              'sin_cambios': int((matched & ~changed).sum())}
+    if not counts['nuevas'] and not counts['actualizadas']:
+        return None, counts
+    stored = _stored_table(store)
+    # La tabla resultante conserva el orden: cada fila actualizada ocupa la
+    # posición de la almacenada y las nuevas van al final (el almacén se
+    # reescribe completo con esta tabla)
+    incoming = changed | ~matched
+    slot = len(stored) + np.cumsum(incoming) - 1    # posición de cada fila entrante
+    take = np.arange(len(stored))
+    take[existing[changed]] = slot[changed]
+    take = np.concatenate([take, slot[~matched]])
+    table = _concat([stored, new[incoming]])
+    return table.iloc[take].reset_index(drop=True), counts
+
+
+# =============================================================================
+# CUARENTENA
+# =============================================================================
+
+def _merge_quarantine(quarantine, new_path, sources):
+    """
+    Añade las filas de `new_path` a la cuarentena acumulada. Las filas que
+    ya había de `sources` (archivos que se acaban de volver a ingerir) se
+    reemplazan; las de otros archivos se conservan siempre.
+    """
+    if not os.path.exists(quarantine):
+        if new_path:
+            os.replace(new_path, quarantine)
+        return
+    previous = pd.read_csv(quarantine, dtype=str, keep_default_na=False)
+    stale = previous['_fuente'].isin(sources)
+    if not stale.any():
+        if new_path:
+            # Solo añadir: las columnas de la cuarentena son siempre las del esquema
+            with open(new_path, encoding='utf-8') as src, open(quarantine, 'a', encoding='utf-8') as dst:
+                next(src)
+                dst.writelines(src)
+            os.remove(new_path)
+        return
+    parts = [previous[~stale]]
+    if new_path:
+        parts.append(pd.read_csv(new_path, dtype=str, keep_default_na=False))
+        os.remove(new_path)
+    tmp_path = f'{quarantine}.tmp-{os.getpid()}-merge'
+    pd.concat(parts, ignore_index=True).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, quarantine)
+
+
+# =============================================================================
+# INGESTA
+# =============================================================================
+
+def ingest(paths, store_dir=INGEST_STORE, quarantine=QUARANTINE_PATH, csv_output=None,
+           chunk_rows=CHUNK_ROWS, account=None, replace=False):
+    """
+    Lee `paths` por bloques, valida y hace upsert en el almacén de columnas
+    canónico de `store_dir` (ver column_store.py): cada partida se identifica
+    por (cuenta, temporada, Game #), los repetidos entre archivos se
+    descartan (gana el último) y las partidas ya almacenadas solo se
+    reescriben si cambiaron. Los archivos ya ingeridos (misma ruta, tamaño y
+    fecha) se omiten sin leerlos: repetir una ingesta solo lee el manifiesto.
+    Si hay partidas nuevas o modificadas, el almacén completo se reescribe.
+
+    Las filas inválidas se añaden a `quarantine` (ver `_merge_quarantine`)
+    y, opcionalmente, las válidas
+    leídas en esta llamada al CSV canónico `csv_output`. `account` rellena
+    la cuenta de las filas que no la traen; `replace=True` descarta el
+    almacén anterior. Devuelve un resumen de la ingesta.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in (quarantine, csv_output):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+    start = time.perf_counter()
+    has_store = not replace and os.path.exists(os.path.join(store_dir, MANIFEST))
+    # Solo el manifiesto: las columnas se mapean si algún archivo está pendiente
+    store = ColumnStore(store_dir) if has_store else None
+    sources = store.manifest.get('fuentes', []) if store is not None else []
+    pending = [path for path in paths if _source_stamp(path) not in sources]
+
+    tmp_quarantine = f'{quarantine}.tmp-{os.getpid()}'
+    tmp_output = f'{csv_output}.tmp-{os.getpid()}' if csv_output else None
+    counts = {'filas': 0, 'validas': 0, 'cuarentena': 0}
+    parts = []
+    wrote_quarantine = False
+    for path in pending:
+        for good, bad in validate(read_chunks(path, chunk_rows), source=os.path.basename(path)):
+            if account is not None:
+                good['Account'] = good['Account'].fillna(account)
+            counts['filas'] += len(good) + len(bad)
+            counts['validas'] += len(good)
+            counts['cuarentena'] += len(bad)
+            parts.append(_compact(good))
+            if tmp_output:
+                _append_csv(good, tmp_output, header=len(parts) == 1)
+            if len(bad):
+                _append_csv(bad, tmp_quarantine, header=not wrote_quarantine)
+                wrote_quarantine = True
+
+    new = _concat(parts) if parts else _compact(pd.DataFrame(columns=list(SCHEMA)))
+    new, counts['duplicadas'] = drop_duplicate_games(new)
+    sources = sources + [_source_stamp(path) for path in pending]
+    if store is None:
+        table, merged = new, {'nuevas': len(new), 'actualizadas': 0, 'sin_cambios': 0}
+    elif not pending:
+        table, merged = None, {'nuevas': 0, 'actualizadas': 0, 'sin_cambios': 0}
+    else:
+        table, merged = _upsert(store, new)
+    counts.update(merged)
+    if table is not None:
+        write_store(table, store_dir, {'fuentes': sources})
+    elif pending:
+        update_manifest(store_dir, fuentes=sources)   # Nada que reescribir
+
+    if tmp_output and parts:
+        os.replace(tmp_output, csv_output)
+    if pending:
+        _merge_quarantine(quarantine, tmp_quarantine if wrote_quarantine else None,
+                          {os.path.basename(path) for path in pending})
+    elapsed = time.perf_counter() - start
+    return dict(counts, omitidos=len(paths) - len(pending), almacen=store_dir,
+                archivo_cuarentena=quarantine if os.path.exists(quarantine) else None,
+                segundos=round(elapsed, 3),
+                filas_por_segundo=round(counts['filas'] / elapsed) if elapsed else None)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Uso: python match_ingest.py entrada [entrada ...]')
+        sys.exit(2)
+    report = ingest(sys.argv[1:])
+    for key, value in report.items():
+        print(f'{key}: {value}')
@@ -0,0 +1,283 @@
+"""
+match_model.py
+==============
+Modelos predictivos por partida a partir del rendimiento (Elim, Death,
+Heal, Dmg, medallas) y del contexto (rol y mapa):
+  - 'logistic': probabilidad de victoria (Result, con Draw = 0.5).
+  - 'ridge': SR Change esperado.
+
+Uso:
+    from match_model import fit_models, predict
+    models = fit_models(df)                      # entrena o carga de .models/
+    p_win = predict(models['resultado'], df)     # NaN sin estadísticas
+    expected = predict(models['sr_change'], df)
+
+Ambos son lineales con regularización L2 sobre variables estandarizadas
+(numéricas) y one-hot (categóricas, un nivel desconocido queda a cero).
+Los solvers son solo NumPy: Newton/IRLS para la logística y ecuaciones
+normales para ridge, acumulando X'WX por bloques de `CHUNK_ROWS` filas, así
+que entrenar y puntuar millones de partidas no materializa matrices
+intermedias de ese tamaño. Los modelos se guardan como .npz sin comprimir
+ni pickle: cargarlos es leer unos pocos arrays.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from matchmaking import RESULT_SCORES
+from memo_cache import atomic_write, dataset_version, evict, touch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, '..', '.models')
+# Se incrementa al cambiar variables, solver o formato (invalida .models/)
+MODEL_VERSION = 1
+DISK_BUDGET = 64 * 1024 ** 2      # bytes en .models/ (LRU)
+
+NUMERIC_FEATURES = ['Elim', 'Death', 'Heal', 'Dmg', 'Gold medals', 'Silver medals', 'Bronze medals']
+CATEGORICAL_FEATURES = ['Role 1', 'Map']
+TARGETS = {'resultado': ('logistic', 'Result'), 'sr_change': ('ridge', 'SR Change')}
+DEFAULT_ALPHA = 10.0
+# Candidatos de regularización cuando `alpha=None` (se elige por validación cruzada)
+ALPHA_GRID = (1.0, 10.0, 100.0, 1000.0)
+CV_FOLDS = 5
+CHUNK_ROWS = 1_000_000
+
+# kind: 'logistic' o 'ridge'; coef: un peso por columna de diseño
+# mean/scale: estandarización de `numeric`; categories: niveles por
+# columna de `categorical`; metrics: validación cruzada (dict)
+Model = namedtuple('Model', ['kind', 'coef', 'intercept', 'numeric', 'mean', 'scale',
+                             'categorical', 'categories', 'metrics'])
+
+
+# =============================================================================
+# MATRIZ DE DISEÑO
+# =============================================================================
+
+def _numeric(df, columns):
+    return np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float)
+                            for c in columns])
+
+
+def _design(df, model):
+    """Matriz de diseño (float32) y máscara de filas con todas las numéricas."""
+    values = _numeric(df, model.numeric)
+    width = len(model.numeric) + sum(len(c) for c in model.categories)
+    X = np.zeros((len(df), width), dtype=np.float32)
+    X[:, :len(model.numeric)] = (values - model.mean) / model.scale
+    offset = len(model.numeric)
+    for column, categories in zip(model.categorical, model.categories):
+        codes = pd.Index(categories).get_indexer(df[column].astype(str))
+        rows = np.flatnonzero(codes >= 0)
+        X[rows, offset + codes[rows]] = 1
+        offset += len(categories)
+    complete = ~np.isnan(values).any(axis=1)
+    X[~complete] = 0
+    return X, complete
+
+
+def _target(df, column):
+    if column == 'Result':
+        return df['Result'].map(RESULT_SCORES).to_numpy(dtype=float)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+def _template(kind, df):
+    # Modelo vacío con la estandarización y los niveles del dataset
+    values = _numeric(df, NUMERIC_FEATURES)
+    scale = np.nanstd(values, axis=0)
+    categories = tuple(np.sort(df[c].dropna().astype(str).unique()).astype(str)
+                       for c in CATEGORICAL_FEATURES)
+    return Model(kind=kind, coef=None, intercept=0.0,
+                 numeric=tuple(NUMERIC_FEATURES), mean=np.nanmean(values, axis=0),
+                 scale=np.where(scale > 0, scale, 1.0),
+                 categorical=tuple(CATEGORICAL_FEATURES), categories=categories, metrics={})
+
+
+# =============================================================================
+# SOLVERS
+# =============================================================================
+
+def _chunks(n, chunk_rows=CHUNK_ROWS):
+    for start in range(0, n, chunk_rows):
+        yield slice(start, min(start + chunk_rows, n))
+
+
+def _augment(X):
+    # Columna de unos al final para el intercepto (no penalizado)
+    return np.hstack([X.astype(float), np.ones((len(X), 1))])
+
+
+def _solve(gram, rhs, alpha):
+    penalty = np.full(len(rhs), float(alpha))
+    penalty[-1] = 0.0
+    return np.linalg.solve(gram + np.diag(penalty), rhs)
+
+
+def _fit_ridge(X, y, alpha=DEFAULT_ALPHA):
+    p = X.shape[1] + 1
+    gram, rhs = np.zeros((p, p)), np.zeros(p)
+    for rows in _chunks(len(X)):
+        Xc = _augment(X[rows])
+        gram += Xc.T @ Xc
+        rhs += Xc.T @ y[rows]
+    beta = _solve(gram, rhs, alpha)
+    return beta[:-1], beta[-1]
+
+
+def _fit_logistic(X, y, alpha=DEFAULT_ALPHA, max_iter=25, tol=1e-8):
+    """Newton-Raphson (IRLS) con penalización L2; `y` en [0, 1]."""
+    p = X.shape[1] + 1
+    beta = np.zeros(p)
+    for _ in range(max_iter):
+        hessian, gradient = np.zeros((p, p)), np.zeros(p)
+        for rows in _chunks(len(X)):
+            Xc = _augment(X[rows])
+            prob = 1 / (1 + np.exp(-np.clip(Xc @ beta, -30, 30)))
+            hessian += (Xc * (prob * (1 - prob))[:, None]).T @ Xc
+            gradient += Xc.T @ (y[rows] - prob)
+        # Paso de Newton sobre la log-verosimilitud penalizada
+        penalty = np.full(p, float(alpha))
+        penalty[-1] = 0.0
+        step = _solve(hessian, gradient - penalty * beta, alpha)
+        beta += step
+        if np.abs(step).max() < tol:
+            break
+    return beta[:-1], beta[-1]
+
+
+_SOLVERS = {'logistic': _fit_logistic, 'ridge': _fit_ridge}
+
+
+def _linear(X, coef, intercept, kind):
+    eta = X @ coef.astype(np.float32) + np.float32(intercept)
+    if kind == 'logistic':
+        return 1 / (1 + np.exp(-np.clip(eta, -30, 30)))
+    return eta
+
+
+def _metrics(kind, y, predicted):
+    if kind == 'logistic':
+        decided = y != 0.5
+        p = np.clip(predicted, 1e-12, 1 - 1e-12)
+        return {'accuracy': float(np.mean((p[decided] >= 0.5) == (y[decided] == 1))),
+                'log_loss': float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))),
+                'partidas': int(len(y))}
+    residual = y - predicted
+    return {'rmse': float(np.sqrt(np.mean(residual ** 2))),
+            'r2': float(1 - np.mean(residual ** 2) / y.var()) if y.var() > 0 else np.nan,
+            'partidas': int(len(y))}
+
+
+def _cross_validate(kind, X, y, alpha, folds=CV_FOLDS, seed=0):
+    """Métricas fuera de muestra con `folds` particiones aleatorias."""
+    fold = np.random.default_rng(seed).permutation(len(y)) % folds
+    predicted = np.empty(len(y))
+    for k in range(folds):
+        test = fold == k
+        coef, intercept = _SOLVERS[kind](X[~test], y[~test], alpha)
+        predicted[test] = _linear(X[test], coef, intercept, kind)
+    return _metrics(kind, y, predicted)
+
+
+def _loss(metrics):
+    return metrics['log_loss'] if 'log_loss' in metrics else metrics['rmse']
+
+
+def train(df, kind, target, alpha=DEFAULT_ALPHA, folds=CV_FOLDS):
+    """
+    Entrena un modelo sobre las partidas con estadísticas y objetivo. Con
+    `alpha=None` prueba ALPHA_GRID y se queda con la menor pérdida
+    fuera de muestra.
+    """
+    model = _template(kind, df)
+    X, complete = _design(df, model)
+    y = _target(df, target)
+    usable = complete & ~np.isnan(y)
+    X, y = X[usable], y[usable]
+    if alpha is None:
+        scores = {a: _cross_validate(kind, X, y, a, folds) for a in ALPHA_GRID}
+        alpha = min(scores, key=lambda a: _loss(scores[a]))
+        metrics = scores[alpha]
+    else:
+        metrics = _cross_validate(kind, X, y, alpha, folds) if folds > 1 else {}
+    coef, intercept = _SOLVERS[kind](X, y, alpha)
+    return model._replace(coef=coef, intercept=float(intercept),
+                          metrics={**metrics, 'alpha': alpha, 'objetivo': target})
+
+
+# =============================================================================
+# PUNTUACIÓN
+# =============================================================================
+
+def predict(model, df, chunk_rows=CHUNK_ROWS):
+    """
+    Predicción por fila (probabilidad de victoria o SR Change esperado),
+    por bloques de `chunk_rows`. NaN en filas sin todas las numéricas.
+    """
+    result = np.full(len(df), np.nan, dtype=np.float32)
+    for rows in _chunks(len(df), chunk_rows):
+        X, complete = _design(df.iloc[rows], model)
+        block = _linear(X, model.coef, model.intercept, model.kind)
+        block[~complete] = np.nan
+        result[rows] = block
+    return result
+
+
+def coefficients(model):
+    """Serie de pesos por variable (estandarizada u one-hot), por |peso|."""
+    names = list(model.numeric) + [f'{column}={level}'
+                                   for column, levels in zip(model.categorical, model.categories)
+                                   for level in levels]
+    weights = pd.Series(model.coef, index=names, name=model.kind)
+    return weights.reindex(weights.abs().sort_values(ascending=False).index)
+
+
+# =============================================================================
+# PERSISTENCIA
+# =============================================================================
+
+def save_model(model, path):
+    """Guarda el modelo como .npz sin comprimir (escritura atómica)."""
+    arrays = {
+        'kind': np.array(model.kind), 'coef': model.coef, 'intercept': np.array(model.intercept),
+        'numeric': np.array(model.numeric), 'mean': model.mean, 'scale': model.scale,
+        'categorical': np.array(model.categorical), 'metrics': np.array(json.dumps(model.metrics)),
+        **{f'categories_{i}': levels for i, levels in enumerate(model.categories)},
+    }
+    return atomic_write(path, lambda fh: np.savez(fh, **arrays))
+
+
+def load_model(path):
+    with np.load(path, allow_pickle=False) as data:
+        categorical = tuple(data['categorical'].tolist())
+        return Model(kind=str(data['kind']), coef=data['coef'], intercept=float(data['intercept']),
+                     numeric=tuple(data['numeric'].tolist()), mean=data['mean'], scale=data['scale'],
+                     categorical=categorical,
+                     categories=tuple(data[f'categories_{i}'] for i in range(len(categorical))),
+                     metrics=json.loads(str(data['metrics'])))
+
+
+def fit_models(df, alpha=None, model_dir=MODEL_DIR):
+    """
+    Modelos de TARGETS para `df`: se cargan de `model_dir` si ya se
+    entrenaron con el mismo contenido de columnas, si no se entrenan y guardan.
+    Sin `alpha` la regularización se elige por validación cruzada.
+    """
+    columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES + [target for _, target in TARGETS.values()]
+    version = dataset_version(df[columns])[:16]
+    models = {}
+    for name, (kind, target) in TARGETS.items():
+        tag = 'cv' if alpha is None else f'{alpha:g}'
+        path = os.path.join(model_dir, f'{name}-v{MODEL_VERSION}-a{tag}-{version}.npz')
+        if os.path.exists(path):
+            models[name] = load_model(path)
+            touch(path)
+        else:
+            models[name] = train(df, kind, target, alpha)
+            save_model(models[name], path)
+            evict(model_dir, DISK_BUDGET, suffixes=('.npz',))
+    return models
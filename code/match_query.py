@@ -0,0 +1,136 @@
+"""
+match_query.py
+==============
+API de consultas sobre la tabla de partidas del almacén de columnas
+(column_store.py). Los filtros sobre dimensiones (temporada, mapa, modo,
+rol, resultado...) se resuelven con AND de bitmaps empaquetados; los
+filtros de rango sobre columnas numéricas solo leen las filas que ya
+pasaron los bitmaps, y la proyección final lee únicamente las columnas
+pedidas en esas filas.
+
+Uso:
+    from match_query import load_matches, MatchQuery, NOT_NULL
+    s9_10 = load_matches(CSV_PATH, ['season', 'Result', 'SR Change'],
+                         ('SR Change', 'notnull'), season=[9, 10])
+    q = MatchQuery(store).where(Result='Win', Map=NOT_NULL).where(('Gold medals', '>=', 3))
+    q.count(), q.frame(['Map', 'Elim'])
+
+Los filtros por palabra clave aceptan un valor, una lista de valores o
+NOT_NULL; los predicados posicionales son tuplas (columna, operador[, valor])
+con operadores ==, !=, <, <=, >, >=, between, notnull.
+"""
+
+import operator
+
+import numpy as np
+import pandas as pd
+
+from column_store import open_store
+
+NOT_NULL = object()
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class MatchQuery:
+    """Consulta inmutable: cada `where` devuelve una consulta nueva."""
+
+    def __init__(self, store, dimensions=None, predicates=()):
+        self.store = store
+        self._dimensions = dict(dimensions or {})
+        self._predicates = tuple(predicates)
+
+    def where(self, *predicates, **dimensions):
+        """Añade filtros conjuntivos (AND) sobre dimensiones y columnas numéricas."""
+        merged = dict(self._dimensions)
+        for dimension, values in dimensions.items():
+            if values is not NOT_NULL and not isinstance(values, (list, tuple, set)):
+                values = [values]
+            if dimension in merged and merged[dimension] is not NOT_NULL:
+                # Dos filtros sobre la misma dimensión: intersección de valores
+                values = merged[dimension] if values is NOT_NULL else \
+                    [v for v in merged[dimension] if v in set(values)]
+            merged[dimension] = values if values is NOT_NULL else list(values)
+        for predicate in predicates:
+            if predicate[1] not in OPERATORS and predicate[1] not in ('between', 'notnull'):
+                raise ValueError(f'Operador no soportado: {predicate[1]!r}')
+        return MatchQuery(self.store, merged, self._predicates + tuple(predicates))
+
+    def _bitmap(self):
+        # AND de bitmaps empaquetados: 1 bit por fila, sin tocar las columnas
+        bitmap = None
+        for dimension, values in self._dimensions.items():
+            part = (self.store.valid_bitmap(dimension) if values is NOT_NULL
+                    else self.store.bitmap(dimension, values))
+            bitmap = part if bitmap is None else bitmap & part
+        for column, op, *_ in self._predicates:
+            if op == 'notnull':
+                part = self.store.valid_bitmap(column)
+                bitmap = part if bitmap is None else bitmap & part
+        return bitmap
+
+    def rows(self):
+        """Posiciones (ordenadas) de las filas que cumplen todos los filtros."""
+        bitmap = self._bitmap()
+        if bitmap is None:
+            rows = np.arange(len(self.store))
+        else:
+            rows = np.flatnonzero(np.unpackbits(bitmap, count=len(self.store)))
+        # Predicados de rango: solo se leen las filas candidatas
+        for column, op, *args in self._predicates:
+            if op == 'notnull' or not len(rows):
+                continue
+            values = self.store.values(column)[rows]
+            keep = self.store.valid(column)[rows]
+            if op == 'between':
+                low, high = args
+                keep &= (values >= low) & (values <= high)
+            else:
+                keep &= OPERATORS[op](values, args[0])
+            rows = rows[keep]
+        return rows
+
+    def count(self):
+        return len(self.rows())
+
+    def mask(self):
+        """Máscara booleana sobre todas las filas (para combinar con un DataFrame)."""
+        mask = np.zeros(len(self.store), dtype=bool)
+        mask[self.rows()] = True
+        return mask
+
+    def frame(self, columns):
+        """
+        DataFrame con las columnas pedidas de las filas que cumplen los filtros.
+        El índice son las posiciones de fila originales, como al filtrar un
+        DataFrame completo con una máscara.
+        """
+        rows = self.rows()
+        data = {}
+        for column in columns:
+            if column in self.store.dimensions:
+                decoded = self.store.decode(column, rows)
+                if all(isinstance(v, int) for v in self.store.dictionary(column)) \
+                        and not pd.isna(decoded).any():
+                    decoded = decoded.astype(np.int64)
+                data[column] = decoded
+            else:
+                values = self.store.values(column)[rows].astype(float)
+                values[~self.store.valid(column)[rows]] = np.nan
+                data[column] = values
+        return pd.DataFrame(data, index=pd.Index(rows), columns=list(columns))
+
+
+def load_matches(csv_path, columns, *predicates, **dimensions):
+    """
+    Carga solo las filas y columnas que cumplen los filtros, empujando los
+    predicados al almacén de columnas en lugar de leer el CSV completo.
+    """
+    return MatchQuery(open_store(csv_path)).where(*predicates, **dimensions).frame(columns)
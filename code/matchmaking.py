@@ -0,0 +1,187 @@
+"""
+matchmaking.py
+==============
+Análisis de justicia del emparejamiento: diferencia de SR entre el equipo
+propio ('Team SR avg') y el rival ('Enemy SR avg'), winrate por rango de
+diferencia y ajuste logístico P(victoria | diferencia de SR).
+
+Uso:
+    from matchmaking import analyze_matchmaking, win_probability
+    results = analyze_matchmaking(df)             # temporada -> resultado
+    fit = results['Todas']['fit']
+    win_probability(fit, [-100, 0, 100])
+
+El ajuste agrupa primero las partidas por diferencia de SR entera (un
+bincount), de modo que las iteraciones de Newton (IRLS) trabajan sobre unos
+cientos de valores distintos aunque haya millones de partidas. En el
+ajuste los empates cuentan como media victoria; la columna 'Winrate' de
+la tabla por rango es victorias / partidas, como en el resto del proyecto.
+
+El resultado de cada temporada se memoiza (memo_cache.py) por el contenido
+de sus propias filas: añadir partidas a la temporada en curso solo
+recalcula esa temporada y 'Todas'.
+"""
+
+import numpy as np
+import pandas as pd
+
+from memo_cache import memoize
+
+# Bordes (en SR) de los rangos de diferencia para el winrate agrupado
+GAP_EDGES = (-np.inf, -150, -100, -50, -25, 25, 50, 100, 150, np.inf)
+ALL_SEASONS = 'Todas'
+RESULT_SCORES = {'Win': 1.0, 'Loss': 0.0, 'Draw': 0.5}
+
+
+def sr_gap(df):
+    """Diferencia Team SR avg - Enemy SR avg (NaN si falta alguno)."""
+    team = pd.to_numeric(df['Team SR avg'], errors='coerce').to_numpy(dtype=float)
+    enemy = pd.to_numeric(df['Enemy SR avg'], errors='coerce').to_numpy(dtype=float)
+    return team - enemy
+
+
+def win_score(results):
+    """1 victoria, 0 derrota, 0.5 empate, NaN sin resultado."""
+    # Solo se traducen los pocos valores distintos; una columna categórica
+    # ya trae sus códigos y evita recorrer los textos
+    if isinstance(results, pd.Series) and isinstance(results.dtype, pd.CategoricalDtype):
+        codes, uniques = results.cat.codes.to_numpy(), results.cat.categories
+    else:
+        codes, uniques = pd.factorize(np.asarray(results, dtype=object))
+    table = np.array([RESULT_SCORES.get(value, np.nan) for value in uniques] + [np.nan])
+    return table[codes]
+
+
+def _group_by_gap(gap, score):
+    # Agrupar por diferencia entera: (valores, partidas, puntos, victorias);
+    # los puntos cuentan el empate como 0.5, las victorias solo las ganadas
+    valid = np.isfinite(gap) & np.isfinite(score)
+    rounded = np.rint(gap[valid]).astype(np.int64)
+    if not len(rounded):
+        return np.empty(0), np.empty(0), np.empty(0), np.empty(0)
+    offset = rounded.min()
+    games = np.bincount(rounded - offset)
+    points = np.bincount(rounded - offset, weights=score[valid])
+    wins = np.bincount(rounded - offset, weights=score[valid] == 1)
+    present = np.flatnonzero(games)
+    return ((present + offset).astype(float), games[present].astype(float),
+            points[present], wins[present])
+
+
+def _distribution(x, n):
+    if not n.sum():
+        return {'partidas': 0}
+    mean = np.average(x, weights=n)
+    # Percentiles sobre la distribución agrupada (acumulado de partidas)
+    cumulative = np.cumsum(n) / n.sum()
+    p5, p25, p50, p75, p95 = x[np.searchsorted(cumulative, [0.05, 0.25, 0.5, 0.75, 0.95])]
+    return {
+        'partidas': int(n.sum()),
+        'media': float(mean),
+        'desviacion': float(np.sqrt(np.average((x - mean) ** 2, weights=n))),
+        'p5': float(p5), 'p25': float(p25), 'mediana': float(p50),
+        'p75': float(p75), 'p95': float(p95),
+        'abs_media': float(np.average(np.abs(x), weights=n)),
+    }
+
+
+def _binned(x, n, w, edges):
+    bins = np.searchsorted(np.asarray(edges[1:-1], dtype=float), x, side='right')
+    n_bins = len(edges) - 1
+    games = np.bincount(bins, weights=n, minlength=n_bins).astype(np.int64)
+    wins = np.bincount(bins, weights=w, minlength=n_bins)
+    labels = [f'{lo:+.0f} a {hi:+.0f}' if np.isfinite(lo) and np.isfinite(hi)
+              else (f'< {hi:+.0f}' if np.isfinite(hi) else f'>= {lo:+.0f}')
+              for lo, hi in zip(edges[:-1], edges[1:])]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        winrate = np.round(wins / games * 100, 2)
+    return pd.DataFrame({'Partidas': games, 'Winrate': winrate},
+                        index=pd.Index(labels, name='Diferencia SR'))
+
+
+def gap_distribution(gap):
+    """Resumen de la distribución de la diferencia de SR (redondeada a 1 SR)."""
+    x, n, _, _ = _group_by_gap(gap, np.zeros(len(gap)))
+    return _distribution(x, n)
+
+
+def binned_winrate(gap, score, edges=GAP_EDGES):
+    """DataFrame con partidas y winrate (victorias / partidas) por rango de diferencia de SR."""
+    x, n, _, w = _group_by_gap(gap, score)
+    return _binned(x, n, w, edges)
+
+
+def fit_logistic(gap, score, max_iter=50, tol=1e-10):
+    """
+    Ajuste logístico P(victoria) = 1 / (1 + exp(-(a + b * gap))) por IRLS.
+
+    Cada iteración de Newton es un producto vectorizado sobre los valores de
+    diferencia distintos; el sistema 2x2 se resuelve en forma cerrada.
+    """
+    x, n, y, _ = _group_by_gap(gap, score)
+    return _fit(x, n, y, max_iter=max_iter, tol=tol)
+
+
+def _fit(x, n, y, max_iter=50, tol=1e-10):
+    result = {'intercepto': np.nan, 'pendiente': np.nan, 'partidas': int(n.sum()),
+              'iteraciones': 0, 'convergio': False}
+    if len(x) < 2:
+        return result
+    # Estandarizar la diferencia mejora la estabilidad numérica
+    center = np.average(x, weights=n)
+    scale = np.sqrt(np.average((x - center) ** 2, weights=n)) or 1.0
+    z = (x - center) / scale
+    beta = np.zeros(2)
+    for iteration in range(1, max_iter + 1):
+        eta = np.clip(beta[0] + beta[1] * z, -30, 30)
+        p = 1 / (1 + np.exp(-eta))
+        w = n * p * (1 - p)
+        residual = y - n * p
+        g0, g1 = residual.sum(), (residual * z).sum()
+        h00, h01, h11 = w.sum(), (w * z).sum(), (w * z * z).sum()
+        det = h00 * h11 - h01 * h01
+        if det <= 0:
+            break
+        step = np.array([h11 * g0 - h01 * g1, h00 * g1 - h01 * g0]) / det
+        beta += step
+        if np.abs(step).max() < tol:
+            result['convergio'] = True
+            break
+    slope = beta[1] / scale
+    result.update(intercepto=float(beta[0] - slope * center), pendiente=float(slope),
+                  iteraciones=iteration)
+    return result
+
+
+def win_probability(fit, gap):
+    """Probabilidad de victoria estimada para cada diferencia de SR."""
+    eta = fit['intercepto'] + fit['pendiente'] * np.asarray(gap, dtype=float)
+    return 1 / (1 + np.exp(-eta))
+
+
+def _analyze(gap, score):
+    # Un solo agrupamiento por diferencia alimenta distribución, rangos y ajuste
+    x, n, y, w = _group_by_gap(gap, score)
+    fit = _fit(x, n, y)
+    # Diferencia de SR que equivale a +1 punto porcentual de probabilidad cerca del 50%
+    fit['sr_por_punto'] = float(0.04 / fit['pendiente']) if fit['pendiente'] else np.nan
+    return {
+        'distribucion': _distribution(x, n),
+        'por_rango': _binned(x, n, w, GAP_EDGES),
+        'fit': fit,
+    }
+
+
+@memoize(version=1, columns=['season', 'Team SR avg', 'Enemy SR avg', 'Result'])
+def analyze_season(games):
+    """Distribución, winrate por rango y ajuste de un grupo de partidas."""
+    return _analyze(sr_gap(games), win_score(games['Result']))
+
+
+def analyze_matchmaking(df, season_col='season'):
+    """Resultados por temporada (y para todas juntas bajo 'Todas')."""
+    data = df[[season_col, 'Team SR avg', 'Enemy SR avg', 'Result']]
+    seasons = data[season_col].to_numpy()
+    results = {season: analyze_season(data[seasons == season]) for season in pd.unique(seasons)}
+    results[ALL_SEASONS] = analyze_season(data)
+    return results
@@ -0,0 +1,234 @@
+"""
+memo_cache.py
+=============
+Memoización de tablas derivadas (DataFrames agregados) compartida por
+todos los scripts: en memoria dentro del proceso y en disco en
+.memo_cache/ entre procesos y ejecuciones. La clave combina la función,
+sus parámetros, la versión declarada de la función y la versión del
+dataset (hash del contenido del DataFrame de entrada), así que la primera
+llamada calcula y las siguientes (en este u otro script) reutilizan.
+
+Uso:
+    from memo_cache import memoize
+
+    @memoize(version=1, columns=['Map', 'Result', 'SR Change'])
+    def map_stats(df, min_games=1):
+        ...
+
+    map_stats(df)        # calcula y guarda
+    map_stats(df)        # memoria del proceso
+    # otro script con el mismo CSV -> disco
+
+Ambas capas se desalojan por LRU bajo un presupuesto de bytes. Las
+escrituras son atómicas (archivo temporal + os.replace): varios procesos
+pueden compartir el directorio y un lector nunca ve un archivo a medias;
+si otro proceso desaloja un archivo justo antes de leerlo, cuenta como
+fallo de caché y se recalcula. Las demás cachés en disco reutilizan
+`atomic_write`, `touch` y `evict` con su propio directorio y presupuesto.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '..', '.memo_cache')
+# Se incrementa cuando cambia el formato en disco (invalida toda la caché)
+CACHE_VERSION = 1
+MEMORY_BUDGET = 64 * 1024 ** 2     # bytes en memoria por proceso
+DISK_BUDGET = 256 * 1024 ** 2      # bytes en .memo_cache/
+
+_memory = OrderedDict()            # clave -> (resultado, bytes), en orden de uso
+_memory_bytes = 0
+_lock = threading.Lock()
+
+
+# =============================================================================
+# CLAVES
+# =============================================================================
+
+def dataset_version(df):
+    """Hash del contenido (valores, índice y columnas) de un DataFrame."""
+    sha = hashlib.sha1(repr(list(df.columns)).encode())
+    sha.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def _key(function, version, df, args, kwargs, columns=None):
+    params = repr((args, sorted(kwargs.items())))
+    data = df[[c for c in columns if c in df]] if columns is not None else df
+    sha = hashlib.sha1(f'{CACHE_VERSION}|{function.__module__}.{function.__qualname__}|'
+                       f'{version}|{dataset_version(data)}|{params}'.encode())
+    return sha.hexdigest()
+
+
+def _nbytes(result):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return int(np.sum(result.memory_usage(deep=True)))
+    return len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _copy(result):
+    # El llamador puede modificar lo que recibe sin alterar la caché
+    return result.copy() if isinstance(result, (pd.DataFrame, pd.Series)) else result
+
+
+# =============================================================================
+# CAPA EN MEMORIA
+# =============================================================================
+
+def _memory_get(key):
+    with _lock:
+        if key not in _memory:
+            return None
+        _memory.move_to_end(key)
+        return _memory[key][0]
+
+
+def _memory_put(key, result, budget=MEMORY_BUDGET):
+    global _memory_bytes
+    size = _nbytes(result)
+    if size > budget:
+        return
+    with _lock:
+        if key in _memory:
+            _memory_bytes -= _memory.pop(key)[1]
+        _memory[key] = (result, size)
+        _memory_bytes += size
+        while _memory_bytes > budget:
+            _, (_, evicted) = _memory.popitem(last=False)
+            _memory_bytes -= evicted
+
+
+# =============================================================================
+# CAPA EN DISCO
+# =============================================================================
+
+def _disk_get(path):
+    try:
+        with open(path, 'rb') as fh:
+            result = pickle.load(fh)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    touch(path)
+    return result
+
+
+def _disk_put(path, result, cache_dir, budget=DISK_BUDGET):
+    atomic_write(path, lambda fh: pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL))
+    evict(cache_dir, budget)
+
+
+# =============================================================================
+# ESCRITURA ATÓMICA Y DESALOJO
+# =============================================================================
+# Compartidos por todas las cachés en disco del proyecto (.memo_cache,
+# .density_cache, .report_cache, .geo_cache, .hero_cache, .models)
+
+def atomic_write(path, write, binary=True):
+    """
+    Escribe `path` con `write(fh)` sobre un temporal del mismo directorio
+    que luego lo reemplaza (os.replace): un lector nunca ve un archivo a
+    medias. Si `write` falla, el temporal se borra y `path` queda intacto.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+    try:
+        if binary:
+            with open(tmp_path, 'wb') as fh:
+                write(fh)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                write(fh)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return path
+
+
+def touch(path):
+    """Marca una entrada como usada: la fecha de modificación hace de marca para el LRU."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict(cache_dir=CACHE_DIR, budget=DISK_BUDGET, suffixes=('.pkl',)):
+    """
+    Borra los archivos de `cache_dir` terminados en `suffixes` usados hace
+    más tiempo hasta quedar bajo `budget` bytes (los temporales de
+    `atomic_write` nunca cuentan).
+    """
+    entries = []
+    try:
+        it = os.scandir(cache_dir)
+    except FileNotFoundError:
+        return
+    with it:
+        for entry in it:
+            if not entry.name.endswith(tuple(suffixes)):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass        # Otro proceso ya la desalojó
+        total -= size
+
+
+def clear(cache_dir=CACHE_DIR):
+    """Vacía la memoria del proceso y el directorio de caché."""
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
+    if os.path.isdir(cache_dir):
+        evict(cache_dir, budget=0)
+
+
+# =============================================================================
+# DECORADOR
+# =============================================================================
+
+def memoize(version=1, columns=None, cache_dir=CACHE_DIR):
+    """
+    Memoiza `function(df, *args, **kwargs)` por (función, parámetros,
+    `version`, contenido de `df`). Se sube `version` al cambiar el cálculo.
+    Con `columns` solo esas columnas entran en la versión del dataset: dos
+    scripts que añaden columnas distintas al mismo CSV comparten la entrada.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(df, *args, **kwargs):
+            key = _key(function, version, df, args, kwargs, columns)
+            result = _memory_get(key)
+            if result is None:
+                path = os.path.join(cache_dir, f'{function.__name__}-{key}.pkl')
+                result = _disk_get(path)
+                if result is None:
+                    result = function(df, *args, **kwargs)
+                    _disk_put(path, result, cache_dir)
+                _memory_put(key, result)
+            return _copy(result)
+        wrapper.uncached = function
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+"""
+radar_charts.py
+===============
+Diagramas radiales (radar) en lote: varios paneles polares en una sola
+figura, cada uno con una o más series (modos, roles, jugadores...).
+
+Uso:
+    from radar_charts import group_positions, plot_radar_panels
+    index = group_positions(pairs['Mode'], member_pos)   # modo -> filas
+    fig, axes = plot_radar_panels(panels, ncols=2)
+
+Cada panel es un dict con 'title', 'labels' y 'values' (1D para una serie,
+2D (series, ejes) para varias) y opcionalmente 'colors' y 'series'.
+Las rejillas de ángulos se calculan una vez por número de ejes y todas las
+series de un panel se dibujan como una sola PolyCollection.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+from matplotlib.collections import PolyCollection
+
+DEFAULT_COLORS = ['#E91E63', '#9C27B0', '#3F51B5', '#00BCD4', '#FF9800', '#4CAF50']
+
+
+def group_positions(keys, positions):
+    """
+    Índice grupo -> posiciones (ordenadas y sin duplicados) en una sola pasada.
+
+    `keys` y `positions` van alineados, p. ej. un par (modo, fila del mapa)
+    por cada combinación observada; las posiciones negativas se ignoran.
+    """
+    codes, groups = pd.factorize(pd.Series(keys).to_numpy(), sort=False)
+    positions = np.asarray(positions, dtype=np.int64)
+    valid = (codes >= 0) & (positions >= 0)
+    codes, positions = codes[valid], positions[valid]
+    order = np.lexsort((positions, codes))
+    codes, positions = codes[order], positions[order]
+    # Quitar pares repetidos (mismo grupo y misma posición)
+    keep = np.r_[True, (np.diff(codes) != 0) | (np.diff(positions) != 0)]
+    codes, positions = codes[keep], positions[keep]
+    bounds = np.searchsorted(codes, np.arange(len(groups) + 1))
+    return {group: positions[bounds[i]:bounds[i + 1]] for i, group in enumerate(groups)}
+
+
+@lru_cache(maxsize=None)
+def angle_grid(n):
+    """Ángulos de los `n` ejes del radar (solo lectura, compartidos entre paneles)."""
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    angles.flags.writeable = False
+    return angles
+
+
+def draw_radar(ax, labels, values, colors=None, ylim=(0, 100), reference=None,
+               alpha=0.25, linewidth=2, markersize=8, label_size=8, series=None):
+    """Dibuja todas las series de `values` (series, ejes) sobre un eje polar."""
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    n_series, n_axes = values.shape
+    angles = angle_grid(n_axes)
+    colors = list(colors or DEFAULT_COLORS)
+    colors = [colors[i % len(colors)] for i in range(n_series)]
+
+    # Vértices (series, ejes, 2): un polígono por serie en una sola colección
+    verts = np.stack(np.broadcast_arrays(angles, values), axis=-1)
+    polygons = PolyCollection(verts, closed=True, linewidths=linewidth,
+                              facecolors=[mcolors.to_rgba(c, alpha) for c in colors],
+                              edgecolors=colors)
+    ax.add_collection(polygons)
+    # Marcadores de todas las series en un único scatter
+    ax.scatter(np.broadcast_to(angles, values.shape).ravel(), values.ravel(),
+               s=markersize ** 2, c=np.repeat(colors, n_axes), zorder=3)
+
+    ax.set_xticks(angles)
+    ax.set_xticklabels(labels, size=label_size)
+    ax.set_ylim(*ylim)
+    if reference is not None:
+        # Línea de referencia (p. ej. 50% de winrate)
+        ax.axhline(y=reference, color='gray', linestyle='--', alpha=0.5)
+    if series is not None:
+        handles = [plt.Line2D([], [], color=c, marker='o', linewidth=linewidth) for c in colors]
+        ax.legend(handles, series, loc='upper right', bbox_to_anchor=(1.25, 1.1), fontsize=8)
+    return polygons
+
+
+def plot_radar_panels(panels, ncols=2, panel_size=7, ylim=(0, 100), reference=None,
+                      colors=None, title_size=12, **kwargs):
+    """
+    Una figura con un panel polar por elemento de `panels`.
+
+    Los paneles vacíos (sin ejes) se omiten; las celdas sobrantes de la
+    rejilla se ocultan.
+    """
+    panels = [panel for panel in panels if len(panel['labels'])]
+    ncols = max(1, min(ncols, len(panels)))
+    nrows = max(1, -(-len(panels) // ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(panel_size * ncols, panel_size * nrows),
+                             subplot_kw=dict(projection='polar'), squeeze=False)
+    axes = axes.ravel()
+    default_colors = colors or DEFAULT_COLORS
+    for idx, (panel, ax) in enumerate(zip(panels, axes)):
+        panel_colors = panel.get('colors')
+        if panel_colors is None and np.ndim(panel['values']) == 1:
+            # Una sola serie: cada panel toma el siguiente color de la paleta
+            panel_colors = [default_colors[idx % len(default_colors)]]
+        draw_radar(ax, panel['labels'], panel['values'], colors=panel_colors or default_colors,
+                   ylim=ylim, reference=reference, series=panel.get('series'), **kwargs)
+        ax.set_title(panel['title'], fontsize=title_size, fontweight='bold', pad=20)
+    for ax in axes[len(panels):]:
+        ax.set_visible(False)
+    return fig, axes[:len(panels)]
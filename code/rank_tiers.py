@@ -0,0 +1,114 @@
+"""
+rank_tiers.py
+=============
+Índice de tiers competitivos (Bronce a Gran Maestro) sobre las trayectorias
+de SR. Cada partida se asigna a su tier con un único `np.searchsorted` y en
+la misma pasada se calculan partidas por tier, winrate por tier y las
+transiciones de tier (ascensos y descensos).
+
+Uso:
+    from sr_trajectory import build_trajectories
+    from rank_tiers import build_tier_index, TIER_FLOORS
+    tiers = build_tier_index(df, build_trajectories(df))
+    tiers.games            # partidas por temporada y tier
+    ax.axhline(y=TIER_FLOORS['Platino'])
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+TIER_NAMES = ('Bronce', 'Plata', 'Oro', 'Platino', 'Diamante', 'Maestro', 'Gran Maestro')
+# SR mínimo de cada tier a partir de Plata (Bronce empieza en 0)
+TIER_THRESHOLDS = (1500, 2000, 2500, 3000, 3500, 4000)
+TIER_FLOORS = dict(zip(TIER_NAMES, (0,) + TIER_THRESHOLDS))
+TIER_COLORS = {
+    'Bronce': '#CD7F32',
+    'Plata': '#C0C0C0',
+    'Oro': '#FFD700',
+    'Platino': '#B0BEC5',
+    'Diamante': '#4FC3F7',
+    'Maestro': '#FFB74D',
+    'Gran Maestro': '#FFF176',
+}
+
+# tier: temporada -> int8 por partida según el SR final (-1 sin SR)
+# games / wins / winrate: DataFrames temporada x tier en el que se jugó la partida
+# transitions: una fila por cambio de tier (season, game, desde, hacia)
+TierIndex = namedtuple('TierIndex', ['tier', 'games', 'wins', 'winrate', 'transitions', 'names'])
+
+
+def tier_of(sr, thresholds=TIER_THRESHOLDS):
+    """Código de tier (0 = Bronce) para cada SR; -1 donde no hay SR."""
+    sr = np.asarray(sr, dtype=float)
+    codes = np.searchsorted(np.asarray(thresholds, dtype=float), sr, side='right')
+    return np.where(np.isnan(sr), -1, codes).astype(np.int8)
+
+
+def build_tier_index(df, trajectories, thresholds=TIER_THRESHOLDS, names=TIER_NAMES):
+    """
+    Índice de tiers de todas las temporadas en una sola pasada vectorizada.
+
+    `thresholds` debe tener un elemento menos que `names`.
+    """
+    if len(names) != len(thresholds) + 1:
+        raise ValueError('Se necesita un nombre de tier más que umbrales')
+    seasons = list(trajectories)
+    lengths = [len(trajectories[s].sr) for s in seasons]
+    season_code = np.repeat(np.arange(len(seasons)), lengths)
+    sr = np.concatenate([trajectories[s].sr for s in seasons])
+    delta = np.concatenate([trajectories[s].delta for s in seasons])
+    game = np.concatenate([trajectories[s].game for s in seasons])
+    rows = np.concatenate([trajectories[s].rows for s in seasons])
+    win = df['Result'].to_numpy()[rows] == 'Win'
+
+    # Tier al terminar cada partida y tier en el que se jugó (SR previo),
+    # ambos con un solo searchsorted
+    tier, played = tier_of(np.stack([sr, sr - delta]), thresholds)
+    n_tiers = len(names)
+
+    # Partidas y victorias por (temporada, tier jugado) con un bincount cada una
+    in_tier = played >= 0
+    cell = season_code[in_tier] * n_tiers + played[in_tier]
+    size = len(seasons) * n_tiers
+    games = np.bincount(cell, minlength=size).reshape(len(seasons), n_tiers)
+    wins = np.bincount(cell, weights=win[in_tier], minlength=size).reshape(len(seasons), n_tiers)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        winrate = np.round(wins / games * 100, 2)
+
+    # Transiciones: el tier cambia respecto a la partida con SR anterior
+    # de la misma temporada
+    positions = np.flatnonzero(tier >= 0)
+    same_season = season_code[positions[1:]] == season_code[positions[:-1]]
+    changed = same_season & (tier[positions[1:]] != tier[positions[:-1]])
+    before, after = positions[:-1][changed], positions[1:][changed]
+    name_array = np.asarray(names, dtype=object)
+    transitions = pd.DataFrame({
+        'season': np.asarray(seasons)[season_code[after]],
+        'game': game[after],
+        'desde': name_array[tier[before]],
+        'hacia': name_array[tier[after]],
+        'ascenso': tier[after] > tier[before],
+    })
+
+    bounds = np.r_[0, np.cumsum(lengths)]
+    columns = pd.Index(names, name='tier')
+    index = pd.Index(seasons, name='season')
+    return TierIndex(
+        tier={s: tier[bounds[i]:bounds[i + 1]] for i, s in enumerate(seasons)},
+        games=pd.DataFrame(games, index=index, columns=columns),
+        wins=pd.DataFrame(wins.astype(np.int64), index=index, columns=columns),
+        winrate=pd.DataFrame(winrate, index=index, columns=columns),
+        transitions=transitions,
+        names=tuple(names),
+    )
+
+
+def tier_summary(tier_index):
+    """Partidas, victorias y winrate por tier sumando todas las temporadas."""
+    games = tier_index.games.sum()
+    wins = tier_index.wins.sum()
+    summary = pd.DataFrame({'Partidas': games, 'Victorias': wins})
+    summary['Winrate'] = (wins / games.where(games > 0) * 100).round(2)
+    return summary[summary['Partidas'] > 0]
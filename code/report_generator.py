@@ -0,0 +1,425 @@
+"""
+report_generator.py
+===================
+Genera el reporte index.html a partir de los agregados calculados en memoria
+y del manifiesto de imágenes, para que las tablas no se desincronicen de los
+resultados reales de 01_pandas_analysis.py.
+
+index.html funciona como plantilla: cada región dinámica está delimitada por
+comentarios `<!-- report:nombre -->` ... `<!-- /report:nombre -->` y se
+reemplaza por el fragmento renderizado. El resto del documento (texto, CSS
+crítico en línea, scripts) se conserva tal cual.
+
+La generación es incremental: cada fragmento se guarda en `.report_cache/`
+con una clave derivada de sus datos de entrada y del código de este módulo,
+de modo que las secciones cuyos datos y plantilla no cambiaron se
+reutilizan sin volver a renderizarse, y el archivo solo se reescribe si el
+resultado final es distinto. Los fragmentos viejos se desalojan por LRU
+bajo DISK_BUDGET bytes.
+"""
+
+import ast
+import glob
+import hashlib
+import html
+import json
+import os
+import re
+from functools import lru_cache
+
+from PIL import Image
+
+from memo_cache import atomic_write, evict, touch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HTML_PATH = os.path.join(BASE_DIR, '..', 'index.html')
+IMAGES_DIR = os.path.join(BASE_DIR, '..', 'images')
+CACHE_DIR = os.path.join(BASE_DIR, '..', '.report_cache')
+DISK_BUDGET = 16 * 1024 ** 2      # bytes de fragmentos en .report_cache/ (LRU)
+# Imágenes iniciales que se cargan sin diferir (el dashboard principal queda
+# sobre el pliegue); el resto lleva loading="lazy"
+EAGER_IMAGES = 2
+
+REGION_RE = re.compile(
+    r'<!-- report:(?P<name>[\w-]+) -->\n(?P<body>.*?)(?P<indent>[ \t]*)<!-- /report:(?P=name) -->',
+    re.S,
+)
+IMG_RE = re.compile(r'<img src="images/(?P<src>[^"]+)"(?P<attrs>[^>]*)>')
+ALT_RE = re.compile(r'alt="(?P<alt>[^"]*)"')
+FETCH_RE = re.compile(r"fetch\('(?P<path>data/[^']+)'\)")
+STYLESHEET_RE = re.compile(r'(?<!<noscript>)<link rel="stylesheet" href="(?P<href>https?://[^"]+)"\s*/?>')
+
+
+# =============================================================================
+# UTILIDADES
+# =============================================================================
+
+def _fingerprint(value):
+    """Huella estable de un agregado (DataFrame, Series o valor JSON)."""
+    if hasattr(value, 'to_csv'):
+        payload = value.to_csv()
+    else:
+        payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _pct(value, decimals=1):
+    return f'{value:.{decimals}f}%'
+
+
+def _num(value, fmt='.2f'):
+    # NaN != NaN: las temporadas sin datos de SR se muestran como N/A
+    return 'N/A' if value != value else format(value, fmt)
+
+
+def _table(headers, rows):
+    """Tabla HTML; una celda puede ser un valor o una tupla (valor, clase CSS)."""
+    lines = ['<table>', '    <tr>']
+    lines += [f'        <th>{html.escape(str(h))}</th>' for h in headers]
+    lines.append('    </tr>')
+    for row in rows:
+        cells = []
+        for cell in row:
+            if isinstance(cell, tuple):
+                cells.append(f'<td class="{cell[1]}">{cell[0]}</td>')
+            else:
+                cells.append(f'<td>{cell}</td>')
+        lines.append('    <tr>' + ''.join(cells) + '</tr>')
+    lines.append('</table>')
+    return '\n'.join(lines)
+
+
+def _stat_card(number, label, css_class=''):
+    label_class = f'label {css_class}'.strip()
+    return ('<div class="stat-card">\n'
+            f'    <div class="number">{html.escape(str(number))}</div>\n'
+            f'    <div class="{label_class}">{label}</div>\n'
+            '</div>')
+
+
+def _corr_parts(r):
+    """Signo y fuerza de una correlación, en palabras."""
+    strength = 'débil' if abs(r) < 0.3 else 'moderada' if abs(r) < 0.6 else 'fuerte'
+    sign = 'positiva' if r >= 0 else 'negativa'
+    return sign, strength
+
+
+def _describe_corr(r):
+    sign, strength = _corr_parts(r)
+    return f'correlación {sign} {strength}'
+
+
+# =============================================================================
+# FRAGMENTOS POR REGIÓN
+# =============================================================================
+
+def _render_fuente_datos(general):
+    return ('<p>Este análisis utiliza el dataset <strong>"Overwatch Competitive Seasons"</strong>, '
+            'que contiene estadísticas detalladas de partidas competitivas del videojuego Overwatch. '
+            f'El archivo <code>all_seasons.csv</code> incluye información de {general["total"]} partidas '
+            f'distribuidas en {len(general["temporadas"])} temporadas competitivas.</p>')
+
+
+def _render_estadisticas_generales(general):
+    cards = [
+        _stat_card(general['total'], 'Partidas Totales'),
+        _stat_card(general['victorias'], 'Victorias', 'win'),
+        _stat_card(general['derrotas'], 'Derrotas', 'loss'),
+        _stat_card(general['empates'], 'Empates', 'draw'),
+        _stat_card(_pct(general['winrate']), 'Winrate General'),
+        _stat_card(general['mapas'], 'Mapas Únicos'),
+    ]
+    return '<div class="stat-cards">\n' + _indent('\n'.join(cards), '    ') + '\n</div>'
+
+
+def _render_serie_resultados(results):
+    total = results.sum()
+    rows = []
+    for result, css in [('Win', 'win'), ('Loss', 'loss'), ('Draw', 'draw')]:
+        count = int(results.get(result, 0))
+        rows.append([(result, css), count, _pct(count / total * 100)])
+    return _table(['Resultado', 'Cantidad', 'Porcentaje'], rows)
+
+
+def _render_serie_sr_change(sr):
+    rows = [
+        ['Media', f'{sr["media"]:+.2f}'],
+        ['Mediana', f'{sr["mediana"]:+.2f}'],
+        ['Desviación Estándar', f'{sr["std"]:.2f}'],
+        ['Máximo', f'{sr["max"]:+.0f}'],
+        ['Mínimo', f'{sr["min"]:+.0f}'],
+    ]
+    return _table(['Estadístico', 'Valor'], rows)
+
+
+def _render_tabla_temporadas(season_stats):
+    rows = [[season, int(row['Partidas']), int(row['Victorias']),
+             _pct(row['Winrate %']), _num(row['SR_Promedio'])]
+            for season, row in season_stats.iterrows()]
+    return _table(['Temporada', 'Partidas', 'Victorias', 'Winrate', 'SR Promedio'], rows)
+
+
+def _render_tabla_roles(role_stats):
+    ordered = role_stats.sort_values('Partidas', ascending=False)
+    rows = [[role, int(row['Partidas']), _pct(row['Winrate %'], 2),
+             _num(row['Elim']), _num(row['Muertes'])]
+            for role, row in ordered.iterrows()]
+    return _table(['Rol', 'Partidas', 'Winrate', 'Elim Prom.', 'Muertes Prom.'], rows)
+
+
+def _render_correlaciones(correlations):
+    pairs = [('SR Change vs Eliminaciones', 'SR Change', 'Elim'),
+             ('SR Change vs Muertes', 'SR Change', 'Death'),
+             ('Daño vs Eliminaciones', 'Dmg', 'Elim')]
+    items = []
+    for label, a, b in pairs:
+        r = correlations.loc[a, b]
+        items.append(f'    <li><strong>{label}:</strong> r = {r:.3f} ({_describe_corr(r)})</li>')
+    return '<ul>\n' + '\n'.join(items) + '\n</ul>'
+
+
+def _render_hallazgos_modos(mode_stats):
+    ordered = mode_stats.sort_values(_rank_column(mode_stats), ascending=False)
+    labels = ['Mayor winrate', 'Segundo mejor']
+    items = []
+    for i, (mode, row) in enumerate(ordered.iterrows()):
+        if i < len(labels):
+            label = labels[i]
+        elif i == len(ordered) - 1:
+            label = 'Menor winrate'
+        else:
+            continue
+        items.append(f'    <li><strong>{html.escape(mode)}:</strong> {label} ({_pct(row["Winrate %"], 2)})</li>')
+    return '<ul>\n' + '\n'.join(items) + '\n</ul>'
+
+
+def _rank_column(stats):
+    # Con winrate encogido (winrate_shrinkage.py) el ranking usa ese valor
+    return 'Winrate_Bayes' if 'Winrate_Bayes' in stats else 'Winrate %'
+
+
+def _best(stats):
+    column = _rank_column(stats)
+    return stats[column].idxmax(), stats[column].max()
+
+
+def _render_hallazgos(general, role_stats, mode_stats, map_stats):
+    best_role, _ = _best(role_stats)
+    best_mode, mode_wr = _best(mode_stats)
+    best_map, map_wr = _best(map_stats)
+    nivel = 'por encima' if general['winrate'] >= 50 else 'por debajo'
+    role_label = 'Rol con mejor rendimiento'
+    if role_stats['Partidas'].idxmax() == best_role:
+        role_label += ' y mayor volumen'
+    cards = [
+        _stat_card(_pct(general['winrate']), f'Winrate promedio indica jugador {nivel} del promedio'),
+        _stat_card(best_role, role_label),
+        _stat_card(best_mode, f'Modo de juego con mayor winrate ({_pct(mode_wr, 2)})'),
+        _stat_card(best_map, f'Mapa con mejor rendimiento ({_pct(map_wr, 2)})'),
+    ]
+    return '<div class="stat-cards">\n' + _indent('\n'.join(cards), '    ') + '\n</div>'
+
+
+def _render_correlaciones_clave(correlations):
+    sr = correlations['SR Change']
+    dmg_elim = correlations.loc['Dmg', 'Elim']
+    items = [
+        ('Más eliminaciones → Mayor SR Change', f'Correlación {_corr_parts(sr["Elim"])[0]} de {sr["Elim"]:.3f}'),
+        ('Más muertes → Menor SR Change', f'Correlación {_corr_parts(sr["Death"])[0]} de {sr["Death"]:.3f}'),
+        ('Daño y eliminaciones', f'Correlación {_corr_parts(dmg_elim)[1]} ({dmg_elim:.3f})'),
+        ('Medallas de oro', f'Correlación {_corr_parts(sr["Gold medals"])[1]} con SR Change '
+                            f'({sr["Gold medals"]:.3f})'),
+    ]
+    lines = [f'    <li><strong>{title}:</strong> {text}</li>' for title, text in items]
+    return '<ul>\n' + '\n'.join(lines) + '\n</ul>'
+
+
+def _render_recomendaciones(role_stats, mode_stats, map_stats, correlations):
+    best_role, _ = _best(role_stats)
+    best_mode, _ = _best(mode_stats)
+    worst_maps = map_stats.sort_values(_rank_column(map_stats)).index[:2].tolist()
+    sr = correlations['SR Change']
+    if abs(sr['Death']) >= abs(sr['Elim']):
+        last = ('Minimizar muertes', 'Tiene mayor impacto negativo que maximizar eliminaciones')
+    else:
+        last = ('Maximizar eliminaciones', 'Tiene mayor impacto que minimizar muertes')
+    items = [
+        (f'Continuar jugando {best_role}', 'Es el rol donde tiene mejor rendimiento'),
+        (f'Preferir mapas de {best_mode}', 'Mayor tasa de victoria'),
+        (f'Evitar {" y ".join(worst_maps)}', 'Mapas con peor rendimiento'),
+        last,
+    ]
+    lines = [f'    <li><strong>{html.escape(t)}:</strong> {d}</li>' for t, d in items]
+    return '<ol>\n' + '\n'.join(lines) + '\n</ol>'
+
+
+def _render_archivos_codigo(code_files):
+    rows = [[f'<code>{name}</code>', html.escape(info['descripcion']), f'~{info["lineas"]}']
+            for name, info in code_files.items()]
+    return _table(['Archivo', 'Descripción', 'Líneas'], rows)
+
+
+# Región -> (función de render, agregados de los que depende)
+SECTIONS = {
+    'fuente_datos': (_render_fuente_datos, ['general']),
+    'estadisticas_generales': (_render_estadisticas_generales, ['general']),
+    'serie_resultados': (_render_serie_resultados, ['results']),
+    'serie_sr_change': (_render_serie_sr_change, ['sr_changes']),
+    'tabla_temporadas': (_render_tabla_temporadas, ['season_stats']),
+    'tabla_roles': (_render_tabla_roles, ['role_stats']),
+    'correlaciones': (_render_correlaciones, ['correlations']),
+    'hallazgos_modos': (_render_hallazgos_modos, ['mode_stats']),
+    'hallazgos': (_render_hallazgos, ['general', 'role_stats', 'mode_stats', 'map_stats']),
+    'correlaciones_clave': (_render_correlaciones_clave, ['correlations']),
+    'recomendaciones': (_render_recomendaciones, ['role_stats', 'mode_stats', 'map_stats', 'correlations']),
+    'archivos_codigo': (_render_archivos_codigo, ['code_files']),
+}
+
+
+# =============================================================================
+# MANIFIESTOS
+# =============================================================================
+
+def build_image_manifest(images_dir=IMAGES_DIR):
+    """Dimensiones y tamaño de cada imagen generada, por nombre de archivo."""
+    manifest = {}
+    for path in sorted(glob.glob(os.path.join(images_dir, '*'))):
+        if not path.lower().endswith(('.png', '.gif', '.jpg', '.jpeg')):
+            continue
+        with Image.open(path) as img:
+            width, height = img.size
+        manifest[os.path.basename(path)] = {
+            'width': width, 'height': height, 'bytes': os.path.getsize(path),
+        }
+    return manifest
+
+
+def build_code_manifest(code_dir=BASE_DIR):
+    """Descripción (tomada del docstring) y líneas de cada script numerado."""
+    files = {}
+    for path in sorted(glob.glob(os.path.join(code_dir, '[0-9][0-9]_*.py'))):
+        with open(path, encoding='utf-8') as fh:
+            source = fh.read()
+        doc = (ast.get_docstring(ast.parse(source)) or '').splitlines()
+        # Formato del encabezado: nombre, subrayado '====', descripción
+        description = doc[2].strip() if len(doc) > 2 else ''
+        lines = source.count('\n') + 1
+        files[os.path.basename(path)] = {
+            'descripcion': description, 'lineas': int(round(lines, -1)),
+        }
+    return files
+
+
+# =============================================================================
+# RENDER
+# =============================================================================
+
+def _indent(text, prefix):
+    return '\n'.join(prefix + line if line else line for line in text.split('\n'))
+
+
+@lru_cache(maxsize=None)
+def _renderer_version():
+    # Huella del código de este módulo: cambiar una plantilla o un
+    # formateador invalida los fragmentos guardados aunque los datos no cambien
+    with open(os.path.abspath(__file__), 'rb') as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
+
+
+def _render_fragment(name, aggregates, cache_dir, stats):
+    render, deps = SECTIONS[name]
+    inputs = [aggregates[dep] for dep in deps]
+    parts = [_renderer_version(), name] + [_fingerprint(v) for v in inputs]
+    key = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f'{name}-{key}.html')
+    if os.path.exists(cache_path):
+        stats['reutilizadas'].append(name)
+        touch(cache_path)
+        with open(cache_path, encoding='utf-8') as fh:
+            return fh.read()
+    fragment = render(*inputs)
+    atomic_write(cache_path, lambda fh: fh.write(fragment), binary=False)
+    stats['renderizadas'].append(name)
+    return fragment
+
+
+def _rewrite_images(document, manifest, eager_images):
+    """Añade dimensiones y carga diferida a las imágenes bajo el pliegue."""
+    state = {'index': 0, 'missing': []}
+
+    def replace(match):
+        src = match.group('src')
+        alt_match = ALT_RE.search(match.group('attrs'))
+        alt = alt_match.group('alt') if alt_match else ''
+        attrs = [f'src="images/{src}"', f'alt="{alt}"']
+        info = manifest.get(src)
+        if info:
+            # width/height reservan espacio y evitan saltos de layout
+            attrs += [f'width="{info["width"]}"', f'height="{info["height"]}"']
+        else:
+            state['missing'].append(src)
+        if state['index'] >= eager_images:
+            attrs += ['loading="lazy"', 'decoding="async"']
+        state['index'] += 1
+        return f'<img {" ".join(attrs)}>'
+
+    document = IMG_RE.sub(replace, document)
+    return document, state['missing']
+
+
+def _defer_stylesheets(document):
+    """Carga las hojas externas sin bloquear; el CSS crítico ya está en línea."""
+    def replace(match):
+        href = match.group('href')
+        return (f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+    return STYLESHEET_RE.sub(replace, document)
+
+
+def _check_data_files(document, root):
+    # Los JSON que la página pide con fetch() se publican junto a index.html;
+    # si falta alguno la sección correspondiente quedaría vacía en silencio
+    missing = sorted({m.group('path') for m in FETCH_RE.finditer(document)
+                      if not os.path.exists(os.path.join(root, m.group('path')))})
+    if missing:
+        raise FileNotFoundError(
+            f"index.html carga {', '.join(missing)} pero no existe "
+            f"(data/figures.json se genera con 02_matplotlib_dashboard.py)")
+
+
+def render_report(aggregates, html_path=HTML_PATH, images_dir=IMAGES_DIR,
+                  cache_dir=CACHE_DIR, eager_images=EAGER_IMAGES):
+    """
+    Renderiza las regiones dinámicas de `html_path` con `aggregates`.
+
+    `aggregates` debe contener las claves usadas en SECTIONS salvo
+    'code_files', que se calcula aquí. Devuelve un resumen con las secciones
+    renderizadas, reutilizadas desde caché y las imágenes faltantes.
+    """
+    aggregates = dict(aggregates)
+    aggregates.setdefault('code_files', build_code_manifest())
+    stats = {'renderizadas': [], 'reutilizadas': [], 'imagenes_faltantes': [], 'escrito': False}
+
+    with open(html_path, encoding='utf-8') as fh:
+        original = fh.read()
+    _check_data_files(original, os.path.dirname(os.path.abspath(html_path)))
+
+    def replace(match):
+        name = match.group('name')
+        if name not in SECTIONS:
+            return match.group(0)
+        indent = match.group('indent')
+        fragment = _render_fragment(name, aggregates, cache_dir, stats)
+        return (f'<!-- report:{name} -->\n{_indent(fragment, indent)}\n'
+                f'{indent}<!-- /report:{name} -->')
+
+    document = REGION_RE.sub(replace, original)
+    document, stats['imagenes_faltantes'] = _rewrite_images(
+        document, build_image_manifest(images_dir), eager_images)
+    document = _defer_stylesheets(document)
+
+    if document != original:
+        atomic_write(html_path, lambda fh: fh.write(document), binary=False)
+        stats['escrito'] = True
+    evict(cache_dir, DISK_BUDGET, suffixes=('.html',))
+    return stats
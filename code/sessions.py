@@ -0,0 +1,247 @@
+"""
+sessions.py
+===========
+Sesionización de partidas: divide el historial (de uno o varios
+jugadores) en sesiones de juego y calcula, con operaciones vectorizadas
+por grupo, el winrate y la deriva de SR por sesión, la evolución del
+rendimiento a lo largo de partidas consecutivas y escenarios "parar tras
+perder".
+
+Uso:
+    from sessions import has_session_data, sessionize, session_stats, decay_curve, stop_after_loss
+    if has_session_data(df):                   # tiempo o 'Session' en el CSV
+        sessions = sessionize(df)              # Sessions
+        session_stats(df, sessions)            # una fila por sesión
+        decay_curve(df, sessions)              # una fila por partida n-ésima
+        stop_after_loss(df, sessions, losses=(1, 2, 3))
+
+Reglas de corte (la primera que aplique):
+  - Columna de tiempo ('Timestamp', 'Date'...): nueva sesión cuando pasan
+    más de `gap` entre dos partidas seguidas de la misma cuenta.
+  - Columna 'Session': nueva sesión cuando cambia su valor.
+  - Sin ninguna de las dos (el CSV actual): bloques de `block_games`
+    partidas consecutivas por 'Game #' dentro de cada temporada, o la
+    temporada completa si `block_games` es None. Son sesiones nominales:
+    sus tablas reflejan el tamaño del bloque, no cómo se jugó, y
+    `has_session_data` permite omitirlas.
+En todos los casos una sesión nunca cruza cuentas ('Account') ni, sin
+tiempo, temporadas. Todo se resuelve con un único ordenamiento del
+dataset, así que escala a años de registros de muchos jugadores.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+TIME_COLUMNS = ['Timestamp', 'Datetime', 'Date', 'Time']
+SESSION_COLUMN = 'Session'
+ACCOUNT_COLUMN = 'Account'
+DEFAULT_GAP = pd.Timedelta(minutes=45)
+PERFORMANCE = ['Elim', 'Death', 'Heal', 'Dmg']
+
+# rows: posiciones de fila del DataFrame en orden cronológico
+# session: id de sesión (0..n-1) de cada fila de `rows`
+# position: número de partida dentro de su sesión (0 = primera)
+# starts: inicio de cada sesión en `rows` (más el total al final)
+# method: 'tiempo', 'marcas', 'bloques' o 'temporada'
+Sessions = namedtuple('Sessions', ['rows', 'session', 'position', 'starts', 'method'])
+
+
+def _codes(df, column):
+    if column not in df:
+        return np.zeros(len(df), dtype=np.int64)
+    return pd.factorize(df[column], use_na_sentinel=False)[0].astype(np.int64)
+
+
+def _changes(values):
+    # True donde el valor difiere del anterior (la primera fila siempre)
+    return np.r_[True, values[1:] != values[:-1]]
+
+
+def has_session_data(df):
+    """True si `df` trae una columna de tiempo o 'Session' (sesiones observadas)."""
+    return SESSION_COLUMN in df or any(c in df for c in TIME_COLUMNS)
+
+
+def sessionize(df, gap=DEFAULT_GAP, block_games=None):
+    """Asigna cada partida a una sesión según las reglas del módulo."""
+    account = _codes(df, ACCOUNT_COLUMN)
+    season = pd.to_numeric(df['season'], errors='coerce').to_numpy(dtype=float)
+    game = pd.to_numeric(df['Game #'], errors='coerce').to_numpy(dtype=float)
+    time_column = next((c for c in TIME_COLUMNS if c in df), None)
+
+    if time_column is not None:
+        time = pd.to_datetime(df[time_column], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        rows = np.lexsort((game, season, time, account))
+        time = time[rows]
+        elapsed = np.diff(time)
+        # Un hueco sin fecha (NaT) también corta la sesión
+        cut = np.r_[True, np.isnat(elapsed) | (elapsed > np.timedelta64(gap))]
+        cut |= _changes(account[rows])
+        method = 'tiempo'
+    else:
+        rows = np.lexsort((game, season, account))
+        cut = _changes(account[rows]) | _changes(season[rows])
+        if SESSION_COLUMN in df:
+            cut |= _changes(_codes(df, SESSION_COLUMN)[rows])
+            method = 'marcas'
+        elif block_games:
+            group_start = np.flatnonzero(cut)
+            index = np.arange(len(rows)) - np.repeat(group_start, np.diff(np.r_[group_start, len(rows)]))
+            cut |= index % block_games == 0
+            method = 'bloques'
+        else:
+            method = 'temporada'
+
+    starts = np.flatnonzero(cut)
+    lengths = np.diff(np.r_[starts, len(rows)])
+    session = np.repeat(np.arange(len(starts)), lengths)
+    position = np.arange(len(rows)) - np.repeat(starts, lengths)
+    return Sessions(rows=rows, session=session, position=position,
+                    starts=np.r_[starts, len(rows)], method=method)
+
+
+def session_labels(df, sessions):
+    """Id de sesión alineado con las filas de `df` (para df['session'] = ...)."""
+    labels = np.empty(len(df), dtype=np.int64)
+    labels[sessions.rows] = sessions.session
+    return labels
+
+
+# =============================================================================
+# COLUMNAS EN ORDEN CRONOLÓGICO
+# =============================================================================
+
+def _ordered(df, sessions, column):
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)[sessions.rows]
+
+
+def _results(df, sessions):
+    result = df['Result'].to_numpy()[sessions.rows]
+    return result == 'Win', result == 'Loss'
+
+
+def _per_session(values, sessions):
+    """Suma y conteo de valores no nulos por sesión."""
+    n = len(sessions.starts) - 1
+    valid = ~np.isnan(values)
+    total = np.bincount(sessions.session[valid], weights=values[valid], minlength=n)
+    count = np.bincount(sessions.session[valid], minlength=n)
+    return total, count
+
+
+# =============================================================================
+# ESTADÍSTICAS POR SESIÓN
+# =============================================================================
+
+def session_stats(df, sessions):
+    """
+    Una fila por sesión: cuenta, temporada, partidas, victorias, winrate,
+    SR inicial y final, deriva de SR (suma de SR Change) y, si hay columna
+    de tiempo, duración en minutos.
+    """
+    n = len(sessions.starts) - 1
+    first = sessions.rows[sessions.starts[:-1]]
+    last = sessions.rows[sessions.starts[1:] - 1]
+    wins, losses = _results(df, sessions)
+    games = np.diff(sessions.starts)
+    victories = np.bincount(sessions.session, weights=wins, minlength=n)
+    drift, _ = _per_session(_ordered(df, sessions, 'SR Change'), sessions)
+
+    stats = pd.DataFrame({
+        'season': df['season'].to_numpy()[first],
+        'Partidas': games,
+        'Victorias': victories.astype(int),
+        'Derrotas': np.bincount(sessions.session, weights=losses, minlength=n).astype(int),
+        'Winrate %': (victories / games * 100).round(1),
+        'SR_Inicio': pd.to_numeric(df['Start SR'], errors='coerce').to_numpy()[first],
+        'SR_Fin': pd.to_numeric(df['End SR'], errors='coerce').to_numpy()[last],
+        'Deriva_SR': drift,
+    }, index=pd.RangeIndex(n, name='session'))
+    if ACCOUNT_COLUMN in df:
+        stats.insert(0, ACCOUNT_COLUMN, df[ACCOUNT_COLUMN].to_numpy()[first])
+    time_column = next((c for c in TIME_COLUMNS if c in df), None)
+    if sessions.method == 'tiempo':
+        time = pd.to_datetime(df[time_column], errors='coerce')
+        stats['Inicio'] = time.to_numpy()[first]
+        stats['Minutos'] = (time.to_numpy()[last] - time.to_numpy()[first]) / np.timedelta64(1, 'm')
+    return stats
+
+
+def decay_curve(df, sessions, max_position=10):
+    """
+    Rendimiento por número de partida dentro de la sesión (la última fila
+    agrupa `max_position` o más): partidas, winrate, SR Change medio y
+    Elim/Death/Heal/Dmg medios. Las columnas '_rel' restan la media de la
+    propia sesión, así el cansancio no se confunde con diferencias de
+    nivel entre sesiones o temporadas.
+    """
+    position = np.minimum(sessions.position, max_position - 1)
+    wins, _ = _results(df, sessions)
+    games = np.bincount(position, minlength=max_position)
+    # Posiciones que ninguna sesión alcanza: winrate NaN, sin avisos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        winrate = np.bincount(position, weights=wins, minlength=max_position) / games * 100
+    curve = pd.DataFrame({'Partidas': games, 'Winrate %': winrate},
+                         index=pd.RangeIndex(1, max_position + 1, name='partida'))
+
+    for column in ['SR Change'] + PERFORMANCE:
+        if column not in df:
+            continue
+        values = _ordered(df, sessions, column)
+        total, count = _per_session(values, sessions)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            relative = values - (total / count)[sessions.session]
+        valid = ~np.isnan(values)
+        counts = np.bincount(position[valid], minlength=max_position)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            curve[column] = np.bincount(position[valid], weights=values[valid],
+                                        minlength=max_position) / counts
+            if column in PERFORMANCE:
+                curve[f'{column}_rel'] = np.bincount(position[valid], weights=relative[valid],
+                                                     minlength=max_position) / counts
+    return curve.round(2)
+
+
+def loss_streaks(df, sessions):
+    """Derrotas consecutivas acumuladas en cada partida (orden de `sessions.rows`)."""
+    _, losses = _results(df, sessions)
+    total = np.cumsum(losses)
+    # La racha se reinicia en cada partida no perdida y al empezar sesión
+    reset = np.where(~losses, total, 0)
+    start = np.zeros(len(losses), dtype=bool)
+    start[sessions.starts[:-1]] = True
+    reset = np.where(start & losses, total - 1, reset)
+    return total - np.maximum.accumulate(reset)
+
+
+def stop_after_loss(df, sessions, losses=(1, 2, 3)):
+    """
+    Escenarios "parar la sesión tras k derrotas seguidas": para cada k,
+    partidas jugadas, winrate y SR acumulado si cada sesión hubiera
+    terminado en la partida que completa la primera racha de k derrotas,
+    frente a lo que realmente se jugó.
+    """
+    n = len(sessions.starts) - 1
+    streak = loss_streaks(df, sessions)
+    wins, _ = _results(df, sessions)
+    change = np.nan_to_num(_ordered(df, sessions, 'SR Change'))
+    index = np.arange(len(sessions.rows))
+
+    rows = {'real': (np.ones(len(index), dtype=bool), 0)}
+    for k in losses:
+        stop = np.where(streak >= k, index, len(index))
+        first_stop = np.minimum.reduceat(stop, sessions.starts[:-1]) if n else stop[:0]
+        keep = index <= first_stop[sessions.session]
+        rows[f'parar tras {k}'] = (keep, int(np.sum(first_stop < len(index))))
+
+    table = pd.DataFrame([{
+        'Partidas': int(keep.sum()),
+        'Winrate %': wins[keep].mean() * 100 if keep.any() else np.nan,
+        'SR_Total': change[keep].sum(),
+        'SR_por_partida': change[keep].mean() if keep.any() else np.nan,
+        'Sesiones_cortadas': cut,
+    } for keep, cut in rows.values()], index=pd.Index(list(rows), name='escenario'))
+    table['Partidas_evitadas'] = len(index) - table['Partidas']
+    return table.round(2)
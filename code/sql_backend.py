@@ -0,0 +1,236 @@
+"""
+sql_backend.py
+==============
+Backend opcional sobre una base de datos embebida (SQLite, incluida en la
+biblioteca estándar). La tabla de partidas se ingiere una sola vez, por
+bloques, en un archivo local con índices sobre season/Map/Mode/Role 1, y
+las agregaciones de 01_pandas_analysis.py y 06_comparative_analysis.py se
+expresan como SQL que resuelve el motor: un historial grande se consulta
+sin cargarlo completo en memoria.
+
+Uso:
+    from sql_backend import connect, season_stats, map_stats
+    con = connect(CSV_PATH)          # ingiere (o reutiliza) .match_db/matches.sqlite
+    map_stats(con)                   # mismo DataFrame que la ruta de pandas
+
+La equivalencia con derived_tables.py (la ruta de pandas) se comprueba en
+tests/test_sql_backend.py.
+"""
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import derived_tables
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, '..', '.match_db', 'matches.sqlite')
+DEFAULT_CSV = '/mnt/user-data/uploads/all_seasons__1_.csv'
+# Se incrementa cuando cambia el esquema (fuerza una nueva ingesta)
+SCHEMA_VERSION = 1
+CHUNK_ROWS = 100_000
+
+# Columnas numéricas (REAL); el resto se guarda como TEXT. 'Start SR' y
+# 'End SR' quedan como texto porque contienen 'P' en posicionamiento.
+NUMERIC_COLUMNS = (
+    'season', 'Game #', 'SR Change', 'Team SR avg', 'Enemy SR avg', 'Stack',
+    'Elim', 'Death', 'Heal', 'Dmg', 'Gold medals', 'Silver medals', 'Bronze medals', 'Streak',
+)
+INDEXED_COLUMNS = ('season', 'Map', 'Mode', 'Role 1')
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+# =============================================================================
+# INGESTA
+# =============================================================================
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return f'{SCHEMA_VERSION}|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}'
+
+
+def _is_fresh(con, stamp):
+    try:
+        row = con.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+    except sqlite3.DatabaseError:
+        return False
+    return row is not None and row[0] == stamp
+
+
+def ingest(csv_path, db_path=DB_PATH, chunk_rows=CHUNK_ROWS):
+    """
+    Carga el CSV en `db_path` por bloques de `chunk_rows` filas. Se escribe en
+    un archivo temporal que reemplaza al anterior al terminar, así que un
+    lector nunca ve una base a medio ingerir.
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{db_path}.tmp-{os.getpid()}'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    con = sqlite3.connect(tmp_path)
+    try:
+        columns = None
+        for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunk_rows):
+            if columns is None:
+                columns = list(chunk.columns)
+                definition = ', '.join(
+                    f'{_quote(c)} {"REAL" if c in NUMERIC_COLUMNS else "TEXT"}' for c in columns)
+                con.execute(f'CREATE TABLE matches ({definition})')
+            for column in columns:
+                if column in NUMERIC_COLUMNS:
+                    chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+            rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False)
+            placeholders = ', '.join('?' * len(columns))
+            con.executemany(f'INSERT INTO matches VALUES ({placeholders})', rows)
+        for column in INDEXED_COLUMNS:
+            if columns and column in columns:
+                name = 'idx_' + ''.join(c if c.isalnum() else '_' for c in column.lower())
+                con.execute(f'CREATE INDEX {name} ON matches ({_quote(column)})')
+        con.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        con.execute("INSERT INTO meta VALUES ('source', ?)", (_source_stamp(csv_path),))
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, db_path)
+
+
+def connect(csv_path=DEFAULT_CSV, db_path=DB_PATH):
+    """Conexión a la base de `csv_path`; la ingiere solo si falta o está desactualizada."""
+    if os.path.exists(db_path):
+        con = sqlite3.connect(db_path)
+        if _is_fresh(con, _source_stamp(csv_path)):
+            return con
+        con.close()
+    ingest(csv_path, db_path)
+    return sqlite3.connect(db_path)
+
+
+def load_matches(con):
+    """
+    Tabla de partidas completa como DataFrame, con los mismos tipos que
+    `pd.read_csv` daría sobre el CSV original (enteros donde no hay huecos,
+    columnas vacías como float). Evita volver a parsear el CSV cuando la
+    base ya está ingerida.
+    """
+    df = pd.read_sql_query('SELECT * FROM matches', con)
+    for column in df.columns:
+        values = df[column]
+        if values.isna().all():
+            df[column] = values.astype(float)
+        elif column in NUMERIC_COLUMNS and values.notna().all() and (values % 1 == 0).all():
+            df[column] = values.astype(np.int64)
+    return df
+
+
+# =============================================================================
+# AGREGACIONES EN SQL
+# =============================================================================
+
+WINS = "SUM(CASE WHEN Result = 'Win' THEN 1 ELSE 0 END)"
+
+SEASON_STATS_SQL = f'''
+SELECT season, CAST(MAX("Game #") AS INTEGER) AS Partidas, {WINS} AS Victorias,
+       AVG("SR Change") AS SR_Promedio, TOTAL("SR Change") AS SR_Total,
+       AVG(Elim) AS Elim_Promedio, AVG(Death) AS Muertes_Promedio,
+       AVG(Heal) AS Heal_Promedio, AVG(Dmg) AS Dmg_Promedio
+FROM matches GROUP BY season ORDER BY season
+'''
+
+MAP_STATS_SQL = f'''
+SELECT Map, COUNT(*) AS Partidas, {WINS} AS Victorias,
+       100.0 * {WINS} / COUNT(*) AS "Winrate %", AVG("SR Change") AS SR_Promedio
+FROM matches WHERE Map IS NOT NULL GROUP BY Map ORDER BY ROUND("Winrate %", 2) DESC, Map
+'''
+
+ROLE_STATS_SQL = f'''
+SELECT "Role 1", COUNT(*) AS Partidas, {WINS} AS Victorias,
+       100.0 * {WINS} / COUNT(*) AS "Winrate %",
+       AVG(Elim) AS Elim, AVG(Death) AS Muertes, AVG(Heal) AS Heal, AVG(Dmg) AS Dmg
+FROM matches WHERE "Role 1" IS NOT NULL GROUP BY "Role 1" ORDER BY "Role 1"
+'''
+
+MODE_STATS_SQL = f'''
+SELECT Mode, COUNT(*) AS Partidas, {WINS} AS Victorias,
+       100.0 * {WINS} / COUNT(*) AS "Winrate %", AVG("SR Change") AS SR_Promedio
+FROM matches WHERE Mode IS NOT NULL GROUP BY Mode ORDER BY Mode
+'''
+
+# Resumen por temporada de 06_comparative_analysis.py
+SEASON_SUMMARY_SQL = f'''
+SELECT season, COUNT(*) AS Partidas, 100.0 * {WINS} / COUNT(*) AS Winrate,
+       AVG("Gold medals") AS "Gold medals", AVG("Silver medals") AS "Silver medals",
+       AVG("Bronze medals") AS "Bronze medals", AVG(Elim) AS Elim, AVG(Death) AS Death
+FROM matches GROUP BY season ORDER BY season
+'''
+
+
+def _query(con, sql, index):
+    frame = pd.read_sql_query(sql, con)
+    if index == 'season':
+        frame['season'] = frame['season'].astype(np.int64)
+    return frame.set_index(index)
+
+
+def season_stats(con):
+    """Equivalente SQL de `derived_tables.season_stats`."""
+    stats = _query(con, SEASON_STATS_SQL, 'season').round(2)
+    stats['Winrate %'] = (stats['Victorias'] / stats['Partidas'] * 100).round(1)
+    return stats
+
+
+def map_stats(con):
+    """Equivalente SQL de `derived_tables.map_stats` (winrate descendente, luego mapa)."""
+    return _query(con, MAP_STATS_SQL, 'Map').round(2)
+
+
+def role_stats(con):
+    """Equivalente SQL de `derived_tables.role_stats`."""
+    return _query(con, ROLE_STATS_SQL, 'Role 1').round(2)
+
+
+def mode_stats(con):
+    """Equivalente SQL de `derived_tables.mode_stats`."""
+    return _query(con, MODE_STATS_SQL, 'Mode').round(2)
+
+
+def season_summary(con):
+    """Partidas, winrate, medallas y Elim/Death promedio por temporada (06)."""
+    return _query(con, SEASON_SUMMARY_SQL, 'season')
+
+
+# =============================================================================
+# VERIFICACIÓN CONTRA LA RUTA DE PANDAS
+# =============================================================================
+
+SQL_TABLES = {
+    'season_stats': season_stats,
+    'map_stats': map_stats,
+    'role_stats': role_stats,
+    'mode_stats': mode_stats,
+    'season_summary': season_summary,
+}
+
+
+def verify_equivalence(con, df):
+    """
+    Compara cada agregación SQL con la de derived_tables.py sobre `df`.
+    Devuelve un diccionario tabla -> None si coinciden o el mensaje de la
+    diferencia (ver tests/test_sql_backend.py).
+    """
+    report = {}
+    for name, function in SQL_TABLES.items():
+        expected = getattr(derived_tables, name).uncached(df)
+        try:
+            pd.testing.assert_frame_equal(function(con), expected, check_dtype=False,
+                                          check_names=False, rtol=1e-9, atol=1e-9)
+            report[name] = None
+        except AssertionError as exc:
+            report[name] = str(exc)
+    return report
@@ -0,0 +1,135 @@
+"""
+sr_timeline.py
+==============
+Línea de tiempo de SR multirresolución para historiales largos. Sobre la
+serie completa se precalcula una pirámide M4: en cada nivel la serie se
+divide en cubetas de FACTOR^(nivel + 1) puntos y de cada cubeta se guardan
+las posiciones de la primera, la última, la de SR mínimo y la de SR
+máximo. Con el nivel que da al menos una cubeta por píxel, cada mínimo y
+máximo de la serie aparece en su píxel o en el vecino (las cubetas no
+coinciden exactamente con las columnas de píxeles), así que la línea es
+la de la serie completa salvo a lo sumo un píxel en horizontal. Un
+gráfico pide solo los puntos que caben en su ancho: dibujar 100k
+partidas cuesta lo mismo que dibujar 1k.
+
+Uso:
+    from sr_timeline import build_timeline, view, plot_timeline
+    timeline = build_timeline(trajectory.game, trajectory.sr)
+    x, y = view(timeline, width_px=800)                  # toda la serie
+    x, y = view(timeline, 800, x_range=(100, 200))       # zoom
+    line = plot_timeline(ax, timeline, color='b')        # se refina al hacer zoom
+
+Los niveles se guardan como índices sobre la serie original (nunca se
+promedian valores). `save_timeline`/`load_timeline` persisten la
+pirámide como .npz para servirla a otras vistas sin recalcular.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+FACTOR = 4          # puntos por cubeta: FACTOR ** (nivel + 1)
+POINTS_PER_PIXEL = 4
+
+# x, y: serie completa (solo puntos con SR); levels[k]: array (cubetas, 4)
+# con índices de primero, mínimo, máximo y último de cada cubeta de
+# FACTOR ** (k + 1) puntos
+Timeline = namedtuple('Timeline', ['x', 'y', 'levels'])
+
+
+def build_timeline(x, y):
+    """Pirámide M4 de la serie (x, y); los puntos sin y se descartan."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    order = np.argsort(x, kind='stable')
+    x, y = x[order], y[order]
+
+    levels = []
+    size = FACTOR
+    while size < len(y):
+        buckets = -(-len(y) // size)
+        # El relleno repite el último punto para completar la última cubeta
+        index = np.minimum(np.arange(buckets * size), len(y) - 1).reshape(buckets, size)
+        values = y[index]
+        levels.append(np.column_stack([
+            index[:, 0],
+            index[np.arange(buckets), values.argmin(axis=1)],
+            index[np.arange(buckets), values.argmax(axis=1)],
+            index[:, -1],
+        ]))
+        size *= FACTOR
+    return Timeline(x=x, y=y, levels=levels)
+
+
+def indices(timeline, width_px, x_range=None):
+    """
+    Índices de la serie a dibujar en `width_px` píxeles dentro de
+    `x_range` (toda la serie por defecto), en orden de x. Incluye el
+    punto anterior y el posterior al rango para que la línea llegue a
+    los bordes.
+    """
+    n = len(timeline.x)
+    lo, hi = 0, n
+    if x_range is not None:
+        lo = max(np.searchsorted(timeline.x, x_range[0], side='left') - 1, 0)
+        hi = min(np.searchsorted(timeline.x, x_range[1], side='right') + 1, n)
+    budget = max(int(width_px), 1) * POINTS_PER_PIXEL
+    if hi - lo <= budget:
+        return np.arange(lo, hi)
+
+    # Nivel más grueso que todavía da al menos una cubeta por píxel
+    level, size = 0, FACTOR
+    while level + 1 < len(timeline.levels) and (hi - lo) // (size * FACTOR) >= width_px:
+        level, size = level + 1, size * FACTOR
+    buckets = timeline.levels[level][lo // size:-(-hi // size)]
+    chosen = np.unique(buckets.ravel())
+    # Los extremos del rango siempre son puntos reales de la serie
+    chosen = np.unique(np.r_[lo, chosen[(chosen >= lo) & (chosen < hi)], hi - 1])
+    return chosen
+
+
+def view(timeline, width_px, x_range=None):
+    """Puntos (x, y) para dibujar la serie en `width_px` píxeles."""
+    idx = indices(timeline, width_px, x_range)
+    return timeline.x[idx], timeline.y[idx]
+
+
+def axis_pixels(ax, dpi=None):
+    """Ancho en píxeles del eje al DPI de guardado (o al de la figura)."""
+    width_in = ax.get_position().width * ax.figure.get_figwidth()
+    return int(width_in * (dpi or ax.figure.dpi))
+
+
+def plot_timeline(ax, timeline, dpi=None, **plot_kwargs):
+    """
+    Dibuja la serie con los puntos justos para el ancho del eje; al
+    cambiar los límites de x (zoom interactivo) la línea se vuelve a
+    pedir a la pirámide con la nueva resolución.
+    """
+    width = axis_pixels(ax, dpi)
+    line, = ax.plot(*view(timeline, width), **plot_kwargs)
+
+    def refine(axis):
+        line.set_data(*view(timeline, axis_pixels(axis, dpi), axis.get_xlim()))
+
+    ax.callbacks.connect('xlim_changed', refine)
+    return line
+
+
+# =============================================================================
+# PERSISTENCIA
+# =============================================================================
+
+def save_timeline(timeline, path):
+    np.savez(path, x=timeline.x, y=timeline.y,
+             **{f'level_{k}': level for k, level in enumerate(timeline.levels)})
+    return path
+
+
+def load_timeline(path):
+    with np.load(path, allow_pickle=False) as data:
+        count = sum(name.startswith('level_') for name in data.files)
+        return Timeline(x=data['x'], y=data['y'],
+                        levels=[data[f'level_{k}'] for k in range(count)])
@@ -0,0 +1,103 @@
+"""
+sr_trajectory.py
+================
+Trayectorias de SR por temporada, reconstruidas una sola vez y compartidas
+por todas las gráficas de evolución del SR.
+
+Uso:
+    from sr_trajectory import build_trajectories, sr_summary
+    trajectories = build_trajectories(df)        # temporada -> Trajectory
+    t = trajectories[10]
+    ax.plot(t.game, t.sr)
+
+Reglas de reconstrucción (en orden de 'Game #' dentro de cada temporada):
+  - Las partidas de posicionamiento ('P' en Start/End SR) quedan marcadas
+    en `placement`; solo la última (la que revela el SR) tiene SR.
+  - Si falta End SR pero hay Start SR y SR Change, End SR = Start + Change.
+  - Un End SR que sigue faltando toma el último SR conocido (carry forward).
+  - SR Change faltante se deriva de la diferencia entre SR consecutivos.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from memo_cache import memoize
+
+# game: 'Game #' (int32); sr: SR al terminar la partida (float32, NaN sin SR)
+# delta: cambio de SR (float32); placement: partida de posicionamiento
+# rows: posiciones de fila en el DataFrame original (para Result, Map, ...)
+Trajectory = namedtuple('Trajectory', ['season', 'game', 'sr', 'delta', 'placement', 'rows'])
+
+
+def _is_placement(column):
+    # Solo 'P' marca una partida de posicionamiento; otro texto no numérico
+    # se trata como SR faltante (NaN en pd.to_numeric)
+    text = column.astype(str).str.strip().str.upper()
+    return (text == 'P').to_numpy()
+
+
+@memoize(version=1, columns=['season', 'Game #', 'Start SR', 'End SR', 'SR Change'])
+def build_trajectories(df):
+    """
+    Diccionario temporada -> Trajectory, ordenado por temporada. Memoizado
+    por contenido (memo_cache.py): los scripts que lo piden sobre el mismo
+    CSV comparten el resultado, así que los arreglos no deben modificarse.
+    """
+    start = pd.to_numeric(df['Start SR'], errors='coerce').to_numpy(dtype=float)
+    end = pd.to_numeric(df['End SR'], errors='coerce').to_numpy(dtype=float)
+    change = pd.to_numeric(df['SR Change'], errors='coerce').to_numpy(dtype=float)
+    pending = _is_placement(df['End SR'])
+    placement = _is_placement(df['Start SR']) | pending
+    season = df['season'].to_numpy()
+    game = pd.to_numeric(df['Game #'], errors='coerce').to_numpy(dtype=float)
+
+    # Un solo ordenamiento estable por (temporada, partida) para todo el dataset
+    order = np.lexsort((game, season))
+    season, game = season[order], game[order]
+    placement, pending = placement[order], pending[order]
+    start, end, change = start[order], end[order], change[order]
+
+    end = np.where(np.isnan(end), start + change, end)
+    end[pending] = np.nan
+
+    bounds = np.flatnonzero(np.r_[True, season[1:] != season[:-1], True])
+    trajectories = {}
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        sr = pd.Series(end[a:b]).ffill().to_numpy(copy=True)
+        sr[pending[a:b]] = np.nan
+        # Cambio derivado: SR actual menos el anterior (o Start SR en la primera)
+        previous = np.r_[np.nan, sr[:-1]]
+        previous = np.where(np.isnan(previous), start[a:b], previous)
+        delta = np.where(np.isnan(change[a:b]), sr - previous, change[a:b])
+        delta[pending[a:b]] = np.nan
+        trajectories[season[a]] = Trajectory(
+            season=season[a],
+            game=game[a:b].astype(np.int32),
+            sr=sr.astype(np.float32),
+            delta=delta.astype(np.float32),
+            placement=placement[a:b],
+            rows=order[a:b],
+        )
+    return trajectories
+
+
+def rated(trajectory):
+    """Máscara de partidas con SR (excluye posicionamiento y huecos iniciales)."""
+    return ~np.isnan(trajectory.sr)
+
+
+def sr_summary(trajectory):
+    """SR inicial, final, máximo y mínimo de la temporada (NaN si no hay SR)."""
+    sr = trajectory.sr[rated(trajectory)]
+    if not len(sr):
+        return {'inicio': np.nan, 'final': np.nan, 'maximo': np.nan, 'minimo': np.nan}
+    first = np.flatnonzero(rated(trajectory))[0]
+    start = sr[0] - trajectory.delta[first]
+    return {
+        'inicio': float(start if np.isfinite(start) else sr[0]),
+        'final': float(sr[-1]),
+        'maximo': float(sr.max()),
+        'minimo': float(sr.min()),
+    }
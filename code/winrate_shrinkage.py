@@ -0,0 +1,160 @@
+"""
+winrate_shrinkage.py
+====================
+Winrates encogidos por Bayes empírico (modelo beta-binomial) por mapa,
+modo, rol o cualquier otra dimensión. Un mapa jugado tres veces con tres
+victorias no encabeza el ranking: su winrate se acerca a la media global
+tanto más cuantas menos partidas tiene.
+
+Uso:
+    from winrate_shrinkage import shrunk_winrates, add_shrinkage
+    maps = shrunk_winrates(df, 'Map')     # Winrate_Bayes e intervalo creíble
+    map_stats = add_shrinkage(map_stats, df, 'Map')
+
+Modelo: el winrate real de cada grupo sigue una Beta(alpha, beta) común y
+las victorias de cada grupo son binomiales. Los hiperparámetros se ajustan
+por método de momentos (media y varianza entre grupos ponderadas por
+partidas, descontando la varianza binomial esperada); el posterior de cada
+grupo es Beta(alpha + victorias, beta + derrotas). La fuerza del prior
+(alpha + beta) se limita a la mediana de partidas por grupo: un grupo
+típico pesa al menos tanto como el prior y el ranking conserva sentido
+aunque la dispersión entre grupos sea compatible con el azar. Los
+cuantiles del intervalo creíble se integran numéricamente sobre una
+rejilla, sin scipy.
+
+Para tablas ya agregadas (p. ej. winrate por región a partir de los
+mapas) `shrink_counts` encoge directamente victorias y partidas: el
+encogimiento se aplica una sola vez, al nivel que se muestra.
+
+Todo es vectorizado sobre los grupos y `shrunk_winrates` está memoizada
+por versión del dataset (memo_cache.py), así que recalcular en cada
+actualización cuesta un hash del DataFrame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from memo_cache import memoize
+
+DEFAULT_LEVEL = 0.95
+# Fuerza mínima del prior (alpha + beta); la máxima es la mediana de
+# partidas por grupo
+MIN_PRIOR_STRENGTH = 2.0
+GRID_POINTS = 4001
+
+
+# =============================================================================
+# AJUSTE DEL PRIOR
+# =============================================================================
+
+def fit_beta_prior(wins, games):
+    """
+    Hiperparámetros (alpha, beta) por método de momentos a partir de
+    victorias y partidas por grupo, con alpha + beta limitado a la mediana
+    de partidas por grupo.
+    """
+    wins = np.asarray(wins, dtype=float)
+    games = np.asarray(games, dtype=float)
+    valid = games > 0
+    wins, games = wins[valid], games[valid]
+    total = games.sum()
+    if total == 0:
+        return 1.0, 1.0
+    mean = wins.sum() / total
+    cap = max(float(np.median(games)), MIN_PRIOR_STRENGTH)
+    strength = cap
+    if len(games) >= 2 and 0.0 < mean < 1.0:
+        rates = wins / games
+        observed = np.sum(games * (rates - mean) ** 2) / total
+        # Parte de la varianza observada que no explica el ruido binomial
+        between = observed - mean * (1 - mean) * len(games) / total
+        if between > 0:
+            strength = min(mean * (1 - mean) / between - 1, cap)
+    strength = max(strength, MIN_PRIOR_STRENGTH)
+    return mean * strength, (1 - mean) * strength
+
+
+def beta_interval(alpha, beta, level=DEFAULT_LEVEL, points=GRID_POINTS):
+    """Intervalo creíble central de Beta(alpha, beta), vectorizado por grupo."""
+    alpha = np.atleast_1d(np.asarray(alpha, dtype=float))
+    beta = np.atleast_1d(np.asarray(beta, dtype=float))
+    x = np.linspace(0, 1, points)[1:-1]
+    log_pdf = ((alpha[:, None] - 1) * np.log(x) + (beta[:, None] - 1) * np.log1p(-x))
+    pdf = np.exp(log_pdf - log_pdf.max(axis=1, keepdims=True))
+    cdf = np.cumsum(pdf, axis=1)
+    cdf /= cdf[:, -1:]
+    tail = (1 - level) / 2
+    # Primer punto de la rejilla cuya CDF alcanza cada cuantil
+    lower = x[np.argmax(cdf >= tail, axis=1)]
+    upper = x[np.argmax(cdf >= 1 - tail, axis=1)]
+    return lower, upper
+
+
+# =============================================================================
+# WINRATES ENCOGIDOS
+# =============================================================================
+
+def shrink_counts(wins, games, index, level=DEFAULT_LEVEL):
+    """
+    Tabla de winrates encogidos a partir de victorias y partidas por grupo
+    (arrays alineados con `index`). El prior ajustado queda en
+    `.attrs['prior']`.
+    """
+    wins = np.asarray(wins, dtype=float)
+    games = np.asarray(games, dtype=float)
+    alpha, beta = fit_beta_prior(wins, games)
+    post_alpha, post_beta = alpha + wins, beta + games - wins
+    lower, upper = beta_interval(post_alpha, post_beta, level)
+
+    stats = pd.DataFrame({
+        'Partidas': games.astype(int),
+        'Victorias': np.rint(wins).astype(int),
+        'Winrate %': wins / games * 100,
+        'Winrate_Bayes': post_alpha / (post_alpha + post_beta) * 100,
+        'IC_inf': lower * 100,
+        'IC_sup': upper * 100,
+    }, index=index).round(2)
+    stats.attrs['prior'] = {'alpha': alpha, 'beta': beta,
+                            'media': alpha / (alpha + beta) * 100, 'fuerza': alpha + beta}
+    return stats
+
+
+@memoize(version=2)
+def shrunk_winrates(df, key, level=DEFAULT_LEVEL):
+    """
+    Por cada valor de `key`: partidas, victorias, winrate bruto, winrate
+    encogido (media posterior) e intervalo creíble, ordenado por el
+    winrate encogido. El prior ajustado queda en `.attrs['prior']`.
+    """
+    data = df[df[key].notna()]
+    codes, groups = pd.factorize(data[key], sort=True)
+    games = np.bincount(codes, minlength=len(groups)).astype(float)
+    wins = np.bincount(codes, weights=(data['Result'] == 'Win').to_numpy(),
+                       minlength=len(groups))
+    stats = shrink_counts(wins, games, pd.Index(groups, name=key), level)
+    return stats.sort_values('Winrate_Bayes', ascending=False, kind='stable')
+
+
+def add_shrinkage(stats, df, key, level=DEFAULT_LEVEL):
+    """
+    Añade Winrate_Bayes e intervalo creíble a una tabla indexada por `key`
+    (map_stats, role_stats...) y la reordena por el winrate encogido.
+    """
+    shrunk = shrunk_winrates(df[[key, 'Result']], key, level)
+    stats = stats.join(shrunk[['Winrate_Bayes', 'IC_inf', 'IC_sup']])
+    return stats.sort_values('Winrate_Bayes', ascending=False, kind='stable')
+
+
+def add_shrinkage_from_rates(stats, games_col='Partidas', winrate_col='Winrate',
+                             level=DEFAULT_LEVEL):
+    """
+    Añade Winrate_Bayes e intervalo creíble a una tabla ya agregada con
+    partidas y winrate bruto en % (p. ej. la salida de
+    geo_analytics.region_stats).
+    """
+    games = stats[games_col].to_numpy(dtype=float)
+    wins = games * stats[winrate_col].to_numpy(dtype=float) / 100
+    shrunk = shrink_counts(wins, games, stats.index, level)
+    stats = stats.join(shrunk[['Winrate_Bayes', 'IC_inf', 'IC_sup']])
+    stats.attrs['prior'] = shrunk.attrs['prior']
+    return stats
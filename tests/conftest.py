@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos de análisis viven en code/ como scripts planos, sin paquete
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'code'))
@@ -0,0 +1,71 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+gpd = pytest.importorskip('geopandas')
+shapely = pytest.importorskip('shapely')
+from shapely.geometry import MultiPolygon, Polygon
+
+import geo_analytics
+
+
+def test_fallback_continents_do_not_overlap():
+    world = geo_analytics._fallback_world()
+    for a, b in itertools.combinations(world.geometry, 2):
+        assert a.intersection(b).area == 0
+
+
+def test_orient_fallback_matches_orient_polygons(monkeypatch):
+    if not hasattr(shapely, 'orient_polygons'):
+        pytest.skip('shapely < 2.1: solo existe la ruta de respaldo')
+    ring_with_hole = Polygon([(0, 0), (0, 10), (10, 10), (10, 0)],
+                             [[(2, 2), (4, 2), (4, 4), (2, 4)]])
+    geoms = np.array([ring_with_hole, MultiPolygon([ring_with_hole, shapely.box(20, 20, 21, 21)]),
+                      None], dtype=object)
+    expected = shapely.orient_polygons(geoms, exterior_cw=False)
+
+    monkeypatch.delattr(shapely, 'orient_polygons')
+    result = geo_analytics._orient(geoms)
+    assert result[2] is None
+    assert all(a.equals_exact(b, 0) for a, b in zip(expected[:2], result[:2]))
+
+
+@pytest.fixture
+def offline_world(monkeypatch, tmp_path):
+    # Sin conexión: la descarga falla y se usa el mapa simplificado
+    def unreachable(*args, **kwargs):
+        raise OSError('sin red')
+
+    monkeypatch.setattr(geo_analytics.urllib.request, 'urlopen', unreachable)
+    monkeypatch.setattr(geo_analytics, 'CACHE_DIR', str(tmp_path))
+    load = geo_analytics._load_countries.__wrapped__
+    world = load(str(tmp_path))
+    monkeypatch.setattr(geo_analytics, '_load_countries', lambda cache_dir=None: world)
+    geo_analytics._country_index.cache_clear()
+    yield load, tmp_path
+    geo_analytics._country_index.cache_clear()
+
+
+def test_lunar_map_is_not_counted_in_any_continent(offline_world):
+    # Posición de dibujo de Horizon Lunar Colony en 05, dentro de la caja de Europa
+    points = pd.DataFrame({'x': [0, 0], 'y': [51, 70], 'Partidas': [10, 40], 'Winrate': [50, 50]},
+                          index=["King's Row", 'Horizon Lunar Colony'])
+    regions = geo_analytics.assign_regions(points['x'], points['y'], unmatched='Espacio',
+                                           off_world=points.index == 'Horizon Lunar Colony')
+    points['region'] = regions['region'].to_numpy()
+    stats = geo_analytics.region_stats(points)
+    assert stats.loc['Europa', 'Partidas'] == 10
+    assert stats.loc[geo_analytics.OFF_WORLD_REGION, 'Partidas'] == 40
+    assert set(stats.index) & set(geo_analytics.CONTINENT_REGIONS.values()) == {'Europa'}
+
+
+def test_failed_download_is_not_retried(offline_world, monkeypatch):
+    load, cache_dir = offline_world
+    assert list(cache_dir.glob('*.failed'))
+    calls = []
+    monkeypatch.setattr(geo_analytics.urllib.request, 'urlopen', lambda *a, **k: calls.append(a))
+    world = load(str(cache_dir))
+    assert not calls
+    assert set(world['continent']) == set(geo_analytics._fallback_world()['continent'])
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import hero_stats
+from hero_stats import HeroAggregates, hero_aggregates
+
+
+def _wide(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Result': rng.choice(['Win', 'Loss', 'Draw'], n),
+        'Elim': rng.integers(0, 40, n),
+        'Dmg': rng.integers(0, 20000, n),
+        'Heal': rng.integers(0, 15000, n),
+        'Hero 1': rng.choice(['Ana', 'Reinhardt', 'Genji'], n),
+        'Hero 1 Time': [f'{m}:{s:02d}' for m, s in zip(rng.integers(1, 9, n), rng.integers(0, 60, n))],
+        'Hero 2': rng.choice(['Mercy', 'Lúcio', 'Desconocido', None], n),
+        'Hero 2 Time': rng.integers(30, 400, n),
+        # Campo entrecomillado con saltos de línea y comillas escapadas
+        'Notas': [f'partida {i}\nnota "{i}", con coma' for i in range(n)],
+    })
+
+
+def _packed(n, seed):
+    rng = np.random.default_rng(seed)
+    heroes = rng.choice(['Ana=5:30;Mercy=2:00', 'Soldier: 76;D.Va', 'Zenyatta=300', ''], n)
+    return pd.DataFrame({
+        'Result': rng.choice(['Win', 'Loss'], n),
+        'Elim': rng.integers(0, 40, n),
+        'Dmg': rng.integers(0, 20000, n),
+        'Heal': rng.integers(0, 15000, n),
+        'Heroes': heroes,
+        'Notas': [f'linea 1\nlinea 2 de {i}' for i in range(n)],
+    })
+
+
+FORMATS = {'wide': _wide, 'packed': _packed}
+
+
+def _expected(csv_path):
+    n_heroes = len(hero_stats.load_heroes())
+    return HeroAggregates(n_heroes).update(pd.read_csv(csv_path))
+
+
+def _assert_same(result, expected):
+    for field in HeroAggregates.FIELDS:
+        np.testing.assert_allclose(result.sums[field], expected.sums[field])
+    assert result.unknown == pytest.approx(expected.unknown)
+
+
+@pytest.fixture
+def counted_rows(monkeypatch):
+    # Filas que llegan a HeroAggregates.update (lo que realmente se ingiere)
+    seen = []
+    original = HeroAggregates.update
+
+    def update(self, df, path=hero_stats.CATALOG_PATH):
+        seen.append(len(df))
+        return original(self, df, path)
+
+    monkeypatch.setattr(HeroAggregates, 'update', update)
+    return seen
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_full_ingest_matches_read_csv(fmt, tmp_path):
+    csv_path = tmp_path / 'matches.csv'
+    FORMATS[fmt](50, 0).to_csv(csv_path, index=False)
+    result = hero_aggregates(str(csv_path), cache_dir=str(tmp_path / 'cache'), block_bytes=512)
+    _assert_same(result, _expected(csv_path))
+    assert result.games > 0
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_appended_rows_are_ingested_alone(fmt, tmp_path, counted_rows):
+    csv_path, cache_dir = tmp_path / 'matches.csv', str(tmp_path / 'cache')
+    FORMATS[fmt](40, 0).to_csv(csv_path, index=False)
+    hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=512)
+
+    counted_rows.clear()
+    FORMATS[fmt](15, 1).to_csv(csv_path, mode='a', header=False, index=False)
+    result = hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=512)
+    assert sum(counted_rows) == 15
+    _assert_same(result, _expected(csv_path))
+
+    counted_rows.clear()
+    hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=512)
+    assert sum(counted_rows) == 0
+
+
+def test_unfinished_quoted_record_waits(tmp_path):
+    csv_path, cache_dir = tmp_path / 'matches.csv', str(tmp_path / 'cache')
+    _wide(20, 0).to_csv(csv_path, index=False)
+    complete = csv_path.read_bytes()
+    # Registro a medio escribir: el salto de línea cae dentro de las comillas
+    csv_path.write_bytes(complete + b'Win,10,100,100,Ana,1:00,Mercy,60,"sin\n')
+    result = hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=256)
+    assert result.games == pytest.approx(_expected_from_bytes(complete, tmp_path).games)
+
+    csv_path.write_bytes(complete + b'Win,10,100,100,Ana,1:00,Mercy,60,"sin\ncerrar"\n')
+    result = hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=256)
+    _assert_same(result, _expected(csv_path))
+
+
+def _expected_from_bytes(data, tmp_path):
+    path = tmp_path / 'expected.csv'
+    path.write_bytes(data)
+    return _expected(path)
+
+
+def test_rewritten_file_is_recomputed(tmp_path):
+    csv_path, cache_dir = tmp_path / 'matches.csv', str(tmp_path / 'cache')
+    _packed(30, 0).to_csv(csv_path, index=False)
+    hero_aggregates(str(csv_path), cache_dir=cache_dir)
+    # Mismo tamaño o mayor, pero otro contenido al final de lo procesado
+    _packed(40, 7).to_csv(csv_path, index=False)
+    _assert_same(hero_aggregates(str(csv_path), cache_dir=cache_dir), _expected(csv_path))
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_last_record_without_trailing_newline(fmt, tmp_path, counted_rows):
+    csv_path, cache_dir = tmp_path / 'matches.csv', str(tmp_path / 'cache')
+    first = FORMATS[fmt](2, 0).to_csv(index=False).rstrip('\n')
+    csv_path.write_text(first, encoding='utf-8')
+    result = hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=64)
+    assert sum(counted_rows) == 2
+    _assert_same(result, _expected(csv_path))
+
+    # Quien añade después empieza con el salto de línea que faltaba
+    counted_rows.clear()
+    rest = FORMATS[fmt](5, 1).to_csv(index=False, header=False)
+    csv_path.write_text(first + '\n' + rest, encoding='utf-8')
+    result = hero_aggregates(str(csv_path), cache_dir=cache_dir, block_bytes=64)
+    assert sum(counted_rows) == 5
+    _assert_same(result, _expected(csv_path))
+
+
+def test_extended_last_record_is_recomputed(tmp_path):
+    csv_path, cache_dir = tmp_path / 'matches.csv', str(tmp_path / 'cache')
+    complete = _wide(10, 0).to_csv(index=False)
+    # Último registro escrito a medias, sin comillas abiertas ni '\n'
+    cut = complete.rstrip('\n').rfind(',') + 1
+    csv_path.write_text(complete[:cut], encoding='utf-8')
+    hero_aggregates(str(csv_path), cache_dir=cache_dir)
+    csv_path.write_text(complete, encoding='utf-8')
+    _assert_same(hero_aggregates(str(csv_path), cache_dir=cache_dir), _expected(csv_path))
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import match_ingest
+from column_store import ColumnStore, MANIFEST
+from match_ingest import ingest
+
+
+def _games(first, last, season=1, **columns):
+    games = np.arange(first, last + 1)
+    return pd.DataFrame(dict({
+        'season': season,
+        'Game #': games,
+        'Start SR': 2500,
+        'End SR': 2500 + games,
+        'Result': np.where(games % 2, 'Win', 'Loss'),
+        'Map': 'Ilios',
+        'Elim': games * 2.0,
+    }, **columns))
+
+
+@pytest.fixture
+def paths(tmp_path):
+    def write(name, frame):
+        path = tmp_path / name
+        frame.to_csv(path, index=False)
+        return str(path)
+
+    store_dir, quarantine = str(tmp_path / 'store'), str(tmp_path / 'quarantine.csv')
+    run = lambda files: ingest(files, store_dir=store_dir, quarantine=quarantine)
+    return write, run, store_dir, quarantine
+
+
+def _store_games(store_dir):
+    store = ColumnStore(store_dir)
+    return store.frame(['Game #', 'Elim']).astype({'Game #': int})
+
+
+def test_overlapping_files_are_deduplicated(paths):
+    write, run, store_dir, _ = paths
+    first, second = write('s1a.csv', _games(1, 10)), write('s1b.csv', _games(6, 15))
+    report = run([first, second])
+    assert report['duplicadas'] == 5
+    assert report['nuevas'] == 15
+    assert list(_store_games(store_dir)['Game #']) == list(range(1, 16))
+
+
+def test_repeated_ingest_is_skipped_without_reading_the_store(paths, monkeypatch):
+    write, run, store_dir, _ = paths
+    files = [write('s1a.csv', _games(1, 10)), write('s1b.csv', _games(6, 15))]
+    run(files)
+    mtime = os.stat(os.path.join(store_dir, MANIFEST)).st_mtime_ns
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError('no debería leer el almacén')
+
+    monkeypatch.setattr(match_ingest, '_stored_table', unexpected)
+    monkeypatch.setattr(match_ingest, 'read_chunks', unexpected)
+    report = run(files)
+    assert report['omitidos'] == 2
+    assert report['filas'] == report['nuevas'] == 0
+    assert os.stat(os.path.join(store_dir, MANIFEST)).st_mtime_ns == mtime
+
+
+def test_unchanged_overlap_does_not_rewrite_the_store(paths, monkeypatch):
+    write, run, store_dir, _ = paths
+    run([write('s1a.csv', _games(1, 10))])
+    full_reads = []
+    original = match_ingest._stored_table
+
+    def stored_table(store, rows=None):
+        if rows is None:
+            full_reads.append(store)
+        return original(store, rows)
+
+    monkeypatch.setattr(match_ingest, '_stored_table', stored_table)
+    report = run([write('s1a_reexport.csv', _games(4, 8))])
+    assert report['sin_cambios'] == 5
+    assert report['nuevas'] == report['actualizadas'] == 0
+    assert not full_reads
+    assert len(ColumnStore(store_dir).manifest['fuentes']) == 2
+
+
+def test_changed_game_is_upserted_in_place(paths):
+    write, run, store_dir, _ = paths
+    run([write('s1a.csv', _games(1, 10))])
+    changed = _games(3, 3)
+    changed['Elim'] = 99.0
+    report = run([write('fix.csv', pd.concat([changed, _games(11, 11)]))])
+    assert (report['actualizadas'], report['nuevas'], report['sin_cambios']) == (1, 1, 0)
+
+    stored = _store_games(store_dir)
+    assert list(stored['Game #']) == list(range(1, 12))
+    assert stored['Elim'].tolist() == [2, 4, 99, 8, 10, 12, 14, 16, 18, 20, 22]
+
+
+def test_quarantine_is_kept_across_sources(paths):
+    write, run, _, quarantine = paths
+    first = write('s1.csv', _games(1, 5, Result=['Win', 'Winn', 'Loss', 'Loss', 'Win']))
+    run([first])
+    run([write('s2.csv', _games(1, 3, season=2, Result=['Lose', 'Win', 'Win']))])
+    kept = pd.read_csv(quarantine)
+    assert sorted(kept['_fuente']) == ['s1.csv', 's2.csv']
+
+    # Reingerir s1 corregido: sus filas salen de la cuarentena, las de s2 siguen
+    write('s1.csv', _games(1, 6))
+    run([first])
+    kept = pd.read_csv(quarantine)
+    assert list(kept['_fuente']) == ['s2.csv']
+    assert kept['_motivo'].str.startswith('Result').all()
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import matchmaking
+from memo_cache import memoize
+
+
+def _matches(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'season': np.repeat([1, 2], n // 2),
+        'Team SR avg': rng.integers(2000, 3000, n),
+        'Enemy SR avg': rng.integers(2000, 3000, n),
+        'Result': rng.choice(['Win', 'Loss', 'Draw'], n, p=[0.48, 0.48, 0.04]),
+    })
+
+
+@pytest.fixture
+def analyzed(monkeypatch, tmp_path):
+    # Caché aislada en tmp_path; cuenta los grupos realmente calculados
+    calls = []
+    original = matchmaking._analyze
+
+    def analyze(gap, score):
+        calls.append(len(gap))
+        return original(gap, score)
+
+    monkeypatch.setattr(matchmaking, '_analyze', analyze)
+    cached = memoize(version=1, columns=['season', 'Team SR avg', 'Enemy SR avg', 'Result'],
+                     cache_dir=str(tmp_path))(matchmaking.analyze_season.uncached)
+    monkeypatch.setattr(matchmaking, 'analyze_season', cached)
+    return calls
+
+
+def test_new_game_recomputes_only_its_season(analyzed):
+    df = _matches(200, 0)
+    first = matchmaking.analyze_matchmaking(df)
+    assert sorted(analyzed) == [100, 100, 200]
+
+    analyzed.clear()
+    df = pd.concat([df, _matches(2, 1).assign(season=2)], ignore_index=True)
+    second = matchmaking.analyze_matchmaking(df)
+    assert sorted(analyzed) == [102, 202]
+    assert second[1]['fit'] == first[1]['fit']
+
+
+def test_cached_season_matches_direct_analysis(analyzed):
+    df = _matches(200, 0)
+    result = matchmaking.analyze_matchmaking(df)[2]
+    games = df[df['season'] == 2]
+    expected = matchmaking.analyze_season.uncached(games)
+    assert result['fit'] == expected['fit']
+    pd.testing.assert_frame_equal(result['por_rango'], expected['por_rango'])
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import derived_tables
+import sql_backend
+
+REAL_CSV = sql_backend.DEFAULT_CSV
+
+
+def _synthetic_matches(n=120, seed=0):
+    """Historial con la forma del CSV real: placement 'P', huecos y empates de winrate."""
+    rng = np.random.default_rng(seed)
+    season = np.repeat([1, 2, 3], n // 3)
+    start = rng.integers(1500, 3500, n).astype(str).astype(object)
+    start[::17] = 'P'
+    sr_change = rng.integers(-30, 30, n).astype(float)
+    sr_change[::11] = np.nan
+    elim = rng.integers(0, 40, n).astype(float)
+    elim[season == 1] = np.nan
+    maps = rng.choice(['Ilios', 'Numbani', 'Hanamura', 'Dorado'], n).astype(object)
+    maps[::23] = None
+    return pd.DataFrame({
+        'season': season,
+        'Game #': np.tile(np.arange(1, n // 3 + 1), 3),
+        'Start SR': start,
+        'End SR': start,
+        'SR Change': sr_change,
+        'Team SR avg': rng.integers(1500, 3500, n),
+        'Enemy SR avg': rng.integers(1500, 3500, n),
+        'Stack': rng.integers(1, 6, n),
+        'Role 1': rng.choice(['Tank', 'Damage', 'Support'], n),
+        'Role 2': np.nan,
+        'Result': rng.choice(['Win', 'Loss', 'Draw'], n, p=[0.48, 0.48, 0.04]),
+        'Map': maps,
+        'Mode': rng.choice(['Escort', 'Hybrid', 'Control'], n),
+        'Elim': elim,
+        'Death': elim / 2,
+        'Heal': elim * 100,
+        'Dmg': elim * 300,
+        'Gold medals': rng.integers(0, 5, n),
+        'Silver medals': rng.integers(0, 5, n),
+        'Bronze medals': rng.integers(0, 5, n),
+        'Streak': rng.integers(-5, 6, n),
+        'Leaver': rng.choice(['Yes', 'No'], n),
+    })
+
+
+@pytest.fixture
+def synthetic_csv(tmp_path):
+    path = tmp_path / 'matches.csv'
+    _synthetic_matches().to_csv(path, index=False)
+    return str(path)
+
+
+def _assert_equivalent(csv_path, db_path):
+    df = pd.read_csv(csv_path)
+    con = sql_backend.connect(csv_path, db_path)
+    try:
+        report = sql_backend.verify_equivalence(con, df)
+    finally:
+        con.close()
+    failures = {name: problem for name, problem in report.items() if problem is not None}
+    assert not failures, failures
+
+
+def test_sql_tables_match_derived_tables(synthetic_csv, tmp_path):
+    _assert_equivalent(synthetic_csv, str(tmp_path / 'matches.sqlite'))
+
+
+@pytest.mark.skipif(not os.path.exists(REAL_CSV), reason='sin el CSV real')
+def test_sql_tables_match_derived_tables_real_csv(tmp_path):
+    _assert_equivalent(REAL_CSV, str(tmp_path / 'matches.sqlite'))
+
+
+def test_load_matches_matches_read_csv(synthetic_csv, tmp_path):
+    con = sql_backend.connect(synthetic_csv, str(tmp_path / 'matches.sqlite'))
+    try:
+        loaded = sql_backend.load_matches(con)
+    finally:
+        con.close()
+    pd.testing.assert_frame_equal(loaded, pd.read_csv(synthetic_csv))
+
+
+def test_connect_reuses_fresh_database(synthetic_csv, tmp_path):
+    db_path = str(tmp_path / 'matches.sqlite')
+    sql_backend.connect(synthetic_csv, db_path).close()
+    mtime = os.stat(db_path).st_mtime_ns
+    sql_backend.connect(synthetic_csv, db_path).close()
+    assert os.stat(db_path).st_mtime_ns == mtime
+
+
+def test_map_stats_breaks_winrate_ties_by_name(tmp_path):
+    # Tres mapas con el mismo winrate (tras redondear) en orden no alfabético
+    df = _synthetic_matches(n=30)
+    df['Map'] = ['Route 66', 'Eichenwalde', 'Busan'] * 10
+    df['Result'] = (['Win'] * 3 + ['Loss'] * 3) * 5
+    path = tmp_path / 'ties.csv'
+    df.to_csv(path, index=False)
+    df = pd.read_csv(path)
+
+    expected = ['Busan', 'Eichenwalde', 'Route 66']
+    assert list(derived_tables.map_stats.uncached(df).index) == expected
+    con = sql_backend.connect(str(path), str(tmp_path / 'ties.sqlite'))
+    try:
+        assert list(sql_backend.map_stats(con).index) == expected
+    finally:
+        con.close()